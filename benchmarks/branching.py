@@ -0,0 +1,68 @@
+"""
+Cost of exploring game branches: deep-copy snapshots versus persistent versions and forks.
+
+    python benchmarks/branching.py [--grid 50] [--branches 10000] [--depth 4]
+
+Plays a seeded game a few moves in, then explores branches from it: each branch takes a
+snapshot of the state (snapshot() or version()), plays --depth random commands on a fresh game
+built from it (from_snapshot() or fork()) and keeps the snapshot, as a search keeping its
+frontier would. Reports branches per second and the memory the kept snapshots hold.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import Game  # noqa: E402
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "drop all", "use torch", "look"]
+
+
+def explore(game, branches, depth, seed, persistent):
+    """Run branches branches from game and return (seconds, bytes held by the kept states)."""
+    rng = random.Random(seed)
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for _ in range(branches):
+        if persistent:
+            state = game.version()
+            branch = game.fork(state)
+        else:
+            state = game.snapshot()
+            branch = Game.from_snapshot(state)
+        for _ in range(depth):
+            branch.execute(rng.choice(COMMANDS))
+        kept.append(state)
+        game = branch
+    elapsed = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed, held
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grid", type=int, default=50, help="grid from -GRID to GRID")
+    parser.add_argument("--branches", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=4, help="commands played on each branch")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'state':>12} {'branches/s':>11} {'KiB held':>10} {'bytes/branch':>13}")
+    for name, persistent in (("snapshot", False), ("version+fork", True)):
+        game = Game(seed=args.seed, quiet=True, grid_min=-args.grid, grid_max=args.grid)
+        for command in ("take all", "go north", "go west"):
+            game.execute(command)
+        branches = args.branches if persistent else max(1, args.branches // 100)
+        elapsed, held = explore(game, branches, args.depth, args.seed, persistent)
+        print(f"{name:>12} {branches / elapsed:>11,.1f} {held / 1024:>10,.0f} {held / branches:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Startup cost of content packs: parsing and validating a pack versus reading its compiled cache.
+
+    python benchmarks/content_loading.py [--sizes 8 100 1000] [--repeat 20]
+
+Each size writes a pack with that many room types (capped at content.MAX_ROOM_TYPES), items
+and monsters, in JSON and TOML, into a temporary directory. "parse" compiles it from source
+every time, "cached" is a later startup reading the .ccpack written by the first load (also
+into the temporary directory).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import content  # noqa: E402
+
+
+def make_pack(size):
+    """The castle's pack with size room types, items and monsters added."""
+    with open(content.DEFAULT_PACK) as f:
+        pack = json.load(f)
+    pack["rooms"] += [{"name": f"hall {i}", "description": f"You enter hall number {i}."}
+                      for i in range(min(size, content.MAX_ROOM_TYPES - len(pack["rooms"])))]
+    pack["items"] += [{"name": f"trinket {i}", "spawn": True} for i in range(size)]
+    pack["monsters"] += [{"name": f"beast {i}", "damage": i % 40 + 1, "spawn": True} for i in range(size)]
+    return pack
+
+
+def to_toml(pack):
+    lines = [f"name = {json.dumps(pack['name'])}", ""]
+    for slot, spec in pack["slots"].items():
+        lines.append(f"[slots.{slot}]")
+        lines += [f"{key} = {json.dumps(value)}" for key, value in spec.items()]
+        lines.append("")
+    for section in ("rooms", "items", "monsters"):
+        for entry in pack[section]:
+            lines.append(f"[[{section}]]")
+            lines += [f"{key} = {json.dumps(value)}" for key, value in entry.items()]
+            lines.append("")
+    return "\n".join(lines)
+
+
+def timed(load, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        load()
+    return (time.perf_counter() - started) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'entries':>8} {'format':>6} {'parse ms':>9} {'cached ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            pack = make_pack(size)
+            entries = len(pack["rooms"]) + len(pack["items"]) + len(pack["monsters"])
+            for kind, text in (("json", json.dumps(pack)), ("toml", to_toml(pack))):
+                if kind == "toml" and content.tomllib is None:
+                    continue
+                path = os.path.join(directory, f"pack-{size}.{kind}")
+                with open(path, "w") as f:
+                    f.write(text)
+                with open(path, "rb") as f:
+                    source = f.read()
+                parse = timed(lambda: content.compile_pack(content.parse(source, path), origin=path), args.repeat)
+                content.load(path, directory)
+                cached = timed(lambda: content.load(path, directory), args.repeat)
+                print(f"{entries:>8,} {kind:>6} {parse * 1e3:>9.2f} {cached * 1e3:>10.2f} {parse / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compare room-by-room initialize_grid() against NumPy-vectorized generation.
+
+    python benchmarks/generation.py [--sizes 50 200 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import vectorgen, world  # noqa: E402
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500],
+                        help="grid half-widths; a size of n spans -n..n")
+    args = parser.parse_args(argv)
+
+    print(f"{'cells':>10} {'loop dicts':>12} {'numpy dicts':>12} {'numpy store':>12}")
+    for size in args.sizes:
+        cells = (2 * size + 1) ** 2
+        loop = timed(lambda: world.distribute_silver_keys(world.initialize_grid(random.Random(0), -size, size)))
+        dicts = timed(vectorgen.generate_grid, 0, -size, size)
+        store = timed(vectorgen.generate_store, 0, -size, size)
+        print(f"{cells:>10} {loop:>11.3f}s {dicts:>11.3f}s {store:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main()
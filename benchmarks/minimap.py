@@ -0,0 +1,63 @@
+"""
+Cost of refreshing the 'map' after every move: cached map tiles versus rendering the whole window.
+
+    python benchmarks/minimap.py [--grid 200] [--moves 5000] [--radius 10]
+
+A seeded player with plenty of silver keys walks at random, showing 'map RADIUS' after every
+move. "cached" is the game's own Minimap, which re-renders only the tiles a move changed or
+brought into view; "full" renders every tile of the window again for each refresh.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import Game  # noqa: E402
+from castle_crawler.minimap import Minimap  # noqa: E402
+
+DIRECTIONS = ["go north", "go south", "go east", "go west"]
+
+
+def walk(grid, moves, radius, seed, cached):
+    """Return (seconds spent in map refreshes, tiles rendered) for one walk."""
+    game = Game(seed=seed, quiet=True, grid_min=-grid, grid_max=grid, compact=True)
+    game.player_state["inventory"].add("silver key", moves)
+    rng = random.Random(seed)
+    spent = 0.0
+    rendered = 0
+    for _ in range(moves):
+        game.execute(rng.choice(DIRECTIONS))
+        if not isinstance(game.player_state["position"], tuple):
+            game.execute("go back")  # Out of a secret path's reward room.
+        if not cached:
+            game.minimap = Minimap()
+        started = time.perf_counter()
+        game.show_map(str(radius))
+        spent += time.perf_counter() - started
+        rendered += game.minimap.misses
+        game.minimap.misses = 0
+    return spent, rendered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grid", type=int, default=200, help="grid from -GRID to GRID")
+    parser.add_argument("--moves", type=int, default=5000)
+    parser.add_argument("--radius", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'map':>7} {'us/refresh':>11} {'tiles/refresh':>14}")
+    results = {}
+    for name, cached in (("full", False), ("cached", True)):
+        spent, rendered = walk(args.grid, args.moves, args.radius, args.seed, cached)
+        results[name] = spent
+        print(f"{name:>7} {spent / args.moves * 1e6:>11.1f} {rendered / args.moves:>14.2f}")
+    print(f"speedup: {results['full'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Scaling of parallel tiled world generation (castle_crawler.parallelgen) from 1 to N workers.
+
+    python benchmarks/parallel_generation.py [--size 4000] [--workers 1 2 4 8]
+
+Every run builds the same world, which is checked by comparing digests of its columns.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import parallelgen, vectorgen  # noqa: E402
+
+
+def digest(shared_world):
+    sha = hashlib.sha1()
+    for column in (shared_world.types, shared_world.flags, shared_world.item_masks, shared_world.monster_masks):
+        sha.update(column)
+    return sha.hexdigest()
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=4000, help="grid half-width; the grid spans -size..size")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1))))
+    parser.add_argument("--tile-size", type=int, default=parallelgen.TILE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cells = (2 * args.size + 1) ** 2
+    started = time.perf_counter()
+    vectorgen.generate_arrays(args.seed, -args.size, args.size)
+    single = time.perf_counter() - started
+    print(f"{cells:,} cells; vectorgen.generate_arrays (one process): {single:.2f}s")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'Mcells/s':>9}  digest")
+    base = None
+    digests = set()
+    for workers in args.workers:
+        started = time.perf_counter()
+        shared_world = parallelgen.generate_shared(args.seed, -args.size, args.size, workers, args.tile_size)
+        elapsed = time.perf_counter() - started
+        digests.add(digest(shared_world))
+        shared_world.close()
+        base = base or elapsed
+        print(f"{workers:>8} {elapsed:>8.2f}s {base / elapsed:>7.2f}x {cells / elapsed / 1e6:>9.1f}  "
+              f"{sorted(digests)[0][:12] if len(digests) == 1 else 'MISMATCH'}")
+    if len(digests) != 1:
+        sys.exit("worlds differ between worker counts")
+
+
+if __name__ == "__main__":
+    main()
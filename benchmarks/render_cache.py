@@ -0,0 +1,56 @@
+"""
+Room description cache: hit rate and describe time for many sessions sharing one world.
+
+    python benchmarks/render_cache.py [--sessions 200 --commands 500 --size 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import render  # noqa: E402
+from castle_crawler.engine import Game  # noqa: E402
+from castle_crawler.render import RenderCache  # noqa: E402
+from castle_crawler.server import build_world  # noqa: E402
+from castle_crawler.sim import RandomPolicy  # noqa: E402
+
+
+def play(sessions, commands, size, cache):
+    """Play sessions in turn on one shared world; return seconds spent and the cache used."""
+    grid_rooms = build_world(0, -size, size)
+    policy = RandomPolicy()
+    games = [Game(seed=i, grid_rooms=grid_rooms, grid_min=-size, grid_max=size, render_cache=cache)
+             for i in range(sessions)]
+    rngs = [random.Random(i) for i in range(sessions)]
+    started = time.perf_counter()
+    for _ in range(commands):
+        for game, rng in zip(games, rngs):
+            if not game.dead:
+                game.execute(policy(game, rng))
+                game.output.clear()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=500, help="commands per session")
+    parser.add_argument("--size", type=int, default=5, help="grid half-width")
+    args = parser.parse_args(argv)
+
+    cache = RenderCache()
+    cached = play(args.sessions, args.commands, args.size, cache)
+    uncached_cache = RenderCache(max_entries=0)
+    uncached_cache.describe = lambda coord, room, visible: render.render_room(room, visible)
+    uncached = play(args.sessions, args.commands, args.size, uncached_cache)
+    stats = cache.stats()
+    print(f"hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['entries']} entries)")
+    print(f"with cache {cached:.3f}s, without {uncached:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
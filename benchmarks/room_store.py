@@ -0,0 +1,66 @@
+"""
+Compare memory and lookup latency of the dict-per-room grid against RoomStore.
+
+    python benchmarks/room_store.py [--size 200]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import world  # noqa: E402
+from castle_crawler.store import RoomStore  # noqa: E402
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes reachable from obj, counting shared objects once."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200, help="grid spans -size..size on both axes")
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    grid_rooms = world.initialize_grid(rng, -args.size, args.size)
+    world.distribute_silver_keys(grid_rooms, rng)
+    store = RoomStore.from_grid(grid_rooms, -args.size, args.size)
+    rooms = len(grid_rooms)
+
+    # Shared description strings are counted once, like the interned strings they are.
+    dict_bytes = deep_sizeof(grid_rooms)
+    store_bytes = store.nbytes()
+    print(f"rooms: {rooms}")
+    print(f"dict grid_rooms: {dict_bytes / rooms:8.1f} bytes/room")
+    print(f"RoomStore:       {store_bytes / rooms:8.1f} bytes/room ({dict_bytes / store_bytes:.0f}x smaller)")
+
+    coords = [rng.choice(list(grid_rooms)) for _ in range(1000)] * (args.lookups // 1000)
+    cases = {
+        "dict get + ['locked']": lambda: [grid_rooms.get(c)["locked"] for c in coords],
+        "store get + ['locked']": lambda: [store.get(c)["locked"] for c in coords],
+        "store flags[index()]": lambda: [store.flags[store.index(c)] & 1 for c in coords],
+        "dict 'silver key' in items": lambda: ["silver key" in grid_rooms[c]["items"] for c in coords],
+        "store has_item()": lambda: [store.has_item(c, "silver key") for c in coords],
+    }
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=1, repeat=5))
+        print(f"{name:28} {seconds / len(coords) * 1e9:8.1f} ns/lookup")
+
+
+if __name__ == "__main__":
+    main()
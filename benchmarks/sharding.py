@@ -0,0 +1,83 @@
+"""
+Sharded hosting on one machine: command throughput and handoff cost through the shard router.
+
+    python benchmarks/sharding.py [--shards 1 2 4] [--players 32] [--commands 5000] [--verify]
+
+Every run starts a ShardRouter over the same seeded world, joins --players players and sends
+random commands (mostly moves, so players keep crossing stripes) one at a time. Reports
+commands per second and the share and latency of commands that handed a player to another
+shard. --verify also plays the same commands on single-process games sharing one world and
+checks that every command gave the same text and event.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import Game  # noqa: E402
+from castle_crawler.render import RenderCache  # noqa: E402
+from castle_crawler.shards import ShardRouter, build_stripe  # noqa: E402
+
+COMMANDS = ["go north", "go south", "go east", "go west", "go east", "go west", "take all", "drop all",
+            "use torch", "equip sword", "attack goblin", "attack skeleton", "run", "inventory", "look"]
+
+
+def run(seed, grid, shards, players, commands, verify):
+    """Return (seconds, handoff command latencies, other command latencies, mismatches)."""
+    with ShardRouter(seed, -grid, grid, shards) as router:
+        seeds = random.Random(seed)
+        world = build_stripe(seed, -grid, grid) if verify else None
+        cache = RenderCache()
+        sessions = []
+        for _ in range(players):
+            player_seed = seeds.getrandbits(64)  # The router seeds its players the same way.
+            player, _, _ = router.join()
+            game = Game(seed=player_seed, grid_rooms=world, grid_min=-grid, grid_max=grid,
+                        render_cache=cache) if verify else None
+            sessions.append((player, game))
+        rng = random.Random(seed)
+        crossed, stayed = [], []
+        mismatches = 0
+        started = time.perf_counter()
+        for _ in range(commands):
+            player, game = rng.choice(sessions)
+            command = rng.choice(COMMANDS)
+            handoffs = router.handoffs
+            sent = time.perf_counter()
+            lines, prompt, event = router.execute(player, command)
+            (crossed if router.handoffs > handoffs else stayed).append(time.perf_counter() - sent)
+            if game is not None:
+                expected = game.execute(command)
+                mismatches += (lines, prompt, event) != (game.take_output(), game.prompt, expected)
+        return time.perf_counter() - started, crossed, stayed, mismatches
+
+
+def median_ms(latencies):
+    return sorted(latencies)[len(latencies) // 2] * 1e3 if latencies else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--grid", type=int, default=20, help="grid from -GRID to GRID")
+    parser.add_argument("--players", type=int, default=32)
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verify", action="store_true", help="check every command against a single process")
+    args = parser.parse_args(argv)
+
+    print(f"{'shards':>6} {'commands/s':>11} {'handoffs':>9} {'p50 ms':>7} {'handoff p50 ms':>15}"
+          + (f" {'mismatches':>10}" if args.verify else ""))
+    for shards in args.shards:
+        seconds, crossed, stayed, mismatches = run(args.seed, args.grid, shards, args.players, args.commands,
+                                                   args.verify)
+        print(f"{shards:>6} {args.commands / seconds:>11,.0f} {len(crossed) / args.commands:>9.1%} "
+              f"{median_ms(stayed):>7.3f} {median_ms(crossed):>15.3f}"
+              + (f" {mismatches:>10}" if args.verify else ""))
+
+
+if __name__ == "__main__":
+    main()
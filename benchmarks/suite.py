@@ -0,0 +1,265 @@
+"""
+Benchmark suite: generation, movement, combat, rendering and full playthroughs.
+
+    python benchmarks/suite.py                                # run and compare with baseline.json
+    python benchmarks/suite.py --json results.json            # also write the results
+    python benchmarks/suite.py --save-baseline                # record this machine's baseline
+    python benchmarks/suite.py --only move --repeat 10
+
+Every benchmark is seeded and all but the describe ones run quiet games, so runs only differ
+by timing noise. Each one is timed --repeat times with gc off and the fastest run counts. A
+benchmark more than --tolerance slower per operation than the stored baseline (also when
+measured a second time) is reported as a REGRESSION and the exit status is 1.
+
+Every run also times a fixed calibration loop of plain dict and list work, and a baseline
+keeps its own machine's calibration time. Baseline times are scaled by how much faster or
+slower the loop runs here before comparing, so the committed baseline.json, recorded on
+another host, still flags benchmarks that got slower relative to the interpreter. A baseline
+without a calibration time is not compared.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler import world  # noqa: E402
+from castle_crawler.engine import Game  # noqa: E402
+from castle_crawler.sim import RandomPolicy, play_game, secret_path_script  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+# ===============================
+# BENCHMARKS
+# ===============================
+# A benchmark is a function that does its setup, then returns (run, ops): run() is the timed
+# part and ops is how many operations one call of run() performs.
+def bench_initialize_grid(size):
+    def run():
+        for seed in range(count):
+            world.initialize_grid(random.Random(seed), -size, size)
+    count = max(1, 20000 // (2 * size + 1) ** 2)
+    return run, count
+
+
+def bench_distribute_silver_keys(size):
+    grids = [world.initialize_grid(random.Random(seed), -size, size) for seed in range(20)]
+
+    def run():
+        for seed, grid_rooms in enumerate(grids):
+            world.distribute_silver_keys(grid_rooms, random.Random(seed))
+    return run, len(grids)
+
+
+def bench_move_random(moves=20000):
+    game = Game(seed=1, quiet=True)
+    rng = random.Random(1)
+    directions = [rng.choice(DIRECTIONS) for _ in range(moves)]
+
+    def run():
+        game.player_state["position"] = (0, 0)
+        move = game.move
+        for direction in directions:
+            move(direction)
+    return run, moves
+
+
+def bench_move_secret(walks=2000):
+    game = Game(seed=1, quiet=True)
+    trigger = world.secret_sequence[:-1]
+
+    def run():
+        move = game.move
+        for _ in range(walks):
+            game.player_state["position"] = (0, 0)
+            game.secret_state = 0
+            for direction in trigger:
+                move(direction)
+            move("back")
+    return run, walks * (len(trigger) + 1)
+
+
+def bench_attack(attacks=20000):
+    game = Game(seed=1, quiet=True)
+    game.player_state["equipment"]["weapon_right"] = "sword"
+    room = game.get_current_room()
+
+    def run():
+        game.player_state["health"] = 10 ** 9
+        monsters = room["monsters"]
+        attack = game.attack
+        for _ in range(attacks):
+            if not monsters:
+                monsters.append("goblin")
+            attack("goblin")
+        monsters.clear()
+    return run, attacks
+
+
+def bench_describe(renders=20000, cached=True):
+    game = Game(seed=1)
+    pos = game.player_state["position"]
+    output = game.output
+
+    def run():
+        describe, bump = game.describe_current_room, game.render_cache.bump
+        for _ in range(renders):
+            if not cached:
+                bump(pos)
+            describe()
+        output.clear()
+    return run, renders
+
+
+def bench_playthrough(games=200):
+    script = secret_path_script()
+
+    def run():
+        for seed in range(games):
+            game = Game(seed=seed, quiet=True)
+            for command in script:
+                game.execute(command)
+            if not game.found_treasure:
+                raise AssertionError(f"seed {seed} did not reach the secret treasure room")
+    return run, games
+
+
+def bench_random_games(games=50):
+    policy = RandomPolicy()
+
+    def run():
+        for seed in range(games):
+            play_game(seed, policy, max_turns=1000)
+    return run, games
+
+
+def bench_calibration(ops=200000):
+    """Interpreter speed, for scaling baselines from other machines: dict lookups and list appends."""
+    def run():
+        rooms = {}
+        for i in range(ops):
+            key = (i % 97, i % 89)
+            room = rooms.get(key)
+            if room is None:
+                rooms[key] = [i]
+            else:
+                room.append(i)
+    return run, ops
+
+
+BENCHMARKS = {
+    "initialize_grid[5]": lambda: bench_initialize_grid(5),
+    "initialize_grid[25]": lambda: bench_initialize_grid(25),
+    "initialize_grid[50]": lambda: bench_initialize_grid(50),
+    "initialize_grid[100]": lambda: bench_initialize_grid(100),
+    "distribute_silver_keys[5]": lambda: bench_distribute_silver_keys(5),
+    "distribute_silver_keys[50]": lambda: bench_distribute_silver_keys(50),
+    "move_random": bench_move_random,
+    "move_secret": bench_move_secret,
+    "attack": bench_attack,
+    "describe_cached": lambda: bench_describe(cached=True),
+    "describe_render": lambda: bench_describe(cached=False),
+    "playthrough_secret_treasure": bench_playthrough,
+    "random_policy_games": bench_random_games,
+}
+
+
+# ===============================
+# RUNNER
+# ===============================
+def measure(factory, repeat):
+    """Return the fastest seconds per operation over repeat timed runs (with gc off, like timeit)."""
+    run, ops = factory()
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best / ops
+
+
+def compare(results, baseline, tolerance, scale):
+    """Return the names of benchmarks slower than the baseline (times scale) by more than tolerance."""
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is not None and seconds > base * scale * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", default=None, help="run benchmarks whose name contains any of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    calibration = measure(bench_calibration, args.repeat)
+    scale = 1.0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("calibration"):
+            baseline = stored["results"]
+            scale = calibration / stored["calibration"]
+            print(f"Calibration loop runs {scale:.2f}x as long as on the baseline's machine; "
+                  "baseline times are scaled by that.")
+        else:
+            print(f"{args.baseline} has no calibration time; record one with --save-baseline to compare.")
+
+    results = {}
+    print(f"{'benchmark':<30} {'per op':>12} {'ops/s':>12} {'vs baseline':>12}")
+    for name, factory in BENCHMARKS.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        seconds = results[name] = measure(factory, args.repeat)
+        base = baseline.get(name)
+        ratio = f"{seconds / (base * scale):>11.2f}x" if base else f"{'-':>12}"
+        print(f"{name:<30} {seconds * 1e6:>10.2f}us {1 / seconds:>12,.0f} {ratio}")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "calibration": calibration,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    # Timing noise only ever makes a run slower, so give each suspect a second chance.
+    for name in compare(results, baseline, args.tolerance, scale):
+        results[name] = min(results[name], measure(BENCHMARKS[name], args.repeat))
+    regressions = compare(results, baseline, args.tolerance, scale)
+    for name in regressions:
+        print(f"REGRESSION: {name} is {results[name] / (baseline[name] * scale):.2f}x slower than the baseline "
+              f"(tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Cost of a turn with wandering monsters on small and large worlds.
+
+    python benchmarks/wandering.py [--sizes 20 200 2000] [--turns 2000]
+
+Only monsters near the player are simulated, so the cost of a turn should not grow with the
+world; "world monsters" is what ticking every monster would have to move instead.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from castle_crawler.engine import Game  # noqa: E402
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000],
+                        help="grid half-widths; a size of n spans -n..n")
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"{'cells':>12} {'world monsters':>15} {'us/turn':>9} {'moves/turn':>11} {'simulated':>10}")
+    for size in args.sizes:
+        game = Game(seed=0, grid_min=-size, grid_max=size, compact=True, vectorized=True, quiet=True,
+                    wandering=True)
+        monsters = sum(game.grid_rooms.monster_masks[i].bit_count() for i in range(len(game.grid_rooms.types)))
+        rng = random.Random(0)
+        started = time.perf_counter()
+        for _ in range(args.turns):
+            game.execute(rng.choice(COMMANDS))
+        elapsed = time.perf_counter() - started
+        wanderers = game.wanderers
+        print(f"{(2 * size + 1) ** 2:>12,} {monsters:>15,} {elapsed / args.turns * 1e6:>9.1f} "
+              f"{wanderers.moves / args.turns:>11.1f} {len(wanderers.wanderers):>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Castle Crawler: a text-based adventure game engine."""
+from .engine import Game
+from .worldconfig import WorldConfig
+
+__all__ = ["Game", "WorldConfig"]
@@ -0,0 +1,65 @@
+"""
+Play Castle Crawler at the terminal:
+
+    python -m castle_crawler [--seed N] [--content PACK] [--world-cache DIR] [--script FILE]
+    python -m castle_crawler --load FILE [--script FILE]
+
+Nothing runs on import; main() parses the arguments, builds the Game and its world, and plays.
+"""
+import argparse
+import sys
+
+from . import content, world
+from .console import play_interactive, play_script
+from .engine import Game
+from .savefile import load_game
+from .worldconfig import WorldConfig
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="castle_crawler", description="Play Castle Crawler.")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the world and every roll (default: random)")
+    parser.add_argument("--grid-min", type=int, default=world.GRID_MIN)
+    parser.add_argument("--grid-max", type=int, default=world.GRID_MAX)
+    parser.add_argument("--content", help="play with this JSON or TOML content pack instead of the castle's own")
+    parser.add_argument("--world-cache", help="directory of pre-generated worlds: load the world from it "
+                                              "if it is there, and store it there if not "
+                                              "(the grid is then kept compact)")
+    parser.add_argument("--wandering", action="store_true", help="let monsters roam, hunt and respawn")
+    parser.add_argument("--undo", action="store_true", help="keep the game's history for 'undo' and checkpoints "
+                                                           "(not with --wandering)")
+    parser.add_argument("--load", help="continue a game written by 'save' (its world replaces --seed, --grid-min, "
+                                       "--grid-max and --world-cache)")
+    parser.add_argument("--journal", help="record every command here, for python -m castle_crawler.replay")
+    parser.add_argument("--script", help="run the commands in this file ('-' for stdin) without prompts; "
+                                         "piped input is run this way too")
+    args = parser.parse_args(argv)
+    if args.undo and args.wandering:
+        parser.error("--undo cannot be used with --wandering")
+    if args.load and args.journal:
+        parser.error("--journal cannot be used with --load (a journal replays a game from its seed)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.content:
+        content.use(args.content)
+    if args.load:
+        game = load_game(args.load, wandering=args.wandering, history=args.undo, admin=True)
+    else:
+        config = WorldConfig(args.grid_min, args.grid_max, compact=args.world_cache is not None,
+                             world_cache=args.world_cache)
+        game = Game(seed=args.seed, world_config=config, wandering=args.wandering, journal=args.journal,
+                    history=args.undo, admin=True)
+    if args.script == "-" or (args.script is None and not sys.stdin.isatty()):
+        play_script(game, sys.stdin)
+    elif args.script:
+        with open(args.script) as f:
+            play_script(game, f)
+    else:
+        play_interactive(game)
+
+
+if __name__ == "__main__":
+    main()
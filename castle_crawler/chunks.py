@@ -0,0 +1,238 @@
+"""
+Chunked world mode: rooms are generated a chunk at a time, on first access.
+
+Every chunk draws from its own random.Random seeded from (world seed, chunk x, chunk y),
+so a chunk's content never depends on which chunks were loaded before it. Generation is
+split into two passes over the chunk's cells:
+  1. presence: which cells hold a room, and of which type;
+  2. content:  items, monsters, locked and dark rolls for those rooms.
+Exits across a chunk border only need the neighbouring chunk's presence pass, so they
+are resolved without generating (or keeping) the neighbour's rooms.
+"""
+import os
+import pickle
+import random
+from collections import OrderedDict
+
+from .world import (GRID_MIN, GRID_MAX, ROOM_PROBABILITY, room_types, secret_keys_needed,
+                    create_room, entry_hall, throne_room)
+
+CHUNK_SIZE = 32
+MAX_CHUNKS = 256  # Default LRU cap on chunks kept in memory.
+
+_FORCED_ROOMS = {(0, 0): entry_hall, (0, 1): throne_room}
+
+
+class ChunkedWorld:
+    """
+    A lazily generated grid with the same lookup interface Game uses on a grid_rooms dict.
+      - seed: world seed; the same seed always produces the same world.
+      - grid_min/grid_max: world bounds (can be huge, e.g. -100000..100000).
+      - chunk_size: chunk edge length in cells.
+      - max_chunks: how many chunks to keep loaded before evicting the least recently used.
+      - save_dir: where modified chunks are written on eviction; None keeps them in memory.
+    Silver keys are distributed over the classic GRID_MIN..GRID_MAX area around the entry hall.
+    """
+
+    def __init__(self, seed, grid_min=GRID_MIN, grid_max=GRID_MAX, chunk_size=CHUNK_SIZE,
+                 max_chunks=MAX_CHUNKS, save_dir=None):
+        if max_chunks < 2:
+            raise ValueError("max_chunks must be at least 2 (a move touches two chunks)")
+        self.seed = seed
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.save_dir = save_dir
+        self.chunks = OrderedDict()   # (cx, cy) -> {coord: room}, least recently used first.
+        self.dirty = set()            # Loaded chunks modified since they were generated or loaded.
+        self.saved = {}               # (cx, cy) -> pickled rooms, when save_dir is None.
+        self.presence_cache = OrderedDict()
+        self.chunks_generated = 0
+        self.chunks_evicted = 0
+        self.key_coords = self.place_silver_keys()
+
+    # -------------------------------
+    # Chunk addressing & seeding
+    # -------------------------------
+    def chunk_of(self, coord):
+        return (coord[0] // self.chunk_size, coord[1] // self.chunk_size)
+
+    def chunk_rng(self, key):
+        # String seeds are hashed with SHA-512, so this is stable across processes and runs.
+        return random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+
+    def chunk_cells(self, key):
+        """Yield the in-bounds coordinates of a chunk in generation order."""
+        size = self.chunk_size
+        x0, y0 = key[0] * size, key[1] * size
+        for x in range(max(x0, self.grid_min), min(x0 + size - 1, self.grid_max) + 1):
+            for y in range(max(y0, self.grid_min), min(y0 + size - 1, self.grid_max) + 1):
+                yield (x, y)
+
+    # -------------------------------
+    # Generation
+    # -------------------------------
+    def roll_presence(self, key, rng):
+        """Pass 1: return {coord: room type id or None for forced rooms} for the chunk."""
+        layout = {}
+        for coord in self.chunk_cells(key):
+            # Skip cells along the center column with negative y.
+            if coord[0] == 0 and coord[1] < 0:
+                continue
+            if coord in _FORCED_ROOMS:
+                layout[coord] = None
+            elif rng.random() < ROOM_PROBABILITY:
+                layout[coord] = rng.randrange(len(room_types))
+        return layout
+
+    def presence(self, key):
+        """Return the set of coordinates in a chunk that hold a room (cached, LRU)."""
+        cells = self.presence_cache.get(key)
+        if cells is not None:
+            self.presence_cache.move_to_end(key)
+            return cells
+        rooms = self.chunks.get(key)
+        if rooms is not None:
+            cells = frozenset(rooms)
+        else:
+            cells = frozenset(self.roll_presence(key, self.chunk_rng(key)))
+        self.presence_cache[key] = cells
+        if len(self.presence_cache) > 4 * self.max_chunks:
+            self.presence_cache.popitem(last=False)
+        return cells
+
+    def has_room(self, coord):
+        if not (self.grid_min <= coord[0] <= self.grid_max and self.grid_min <= coord[1] <= self.grid_max):
+            return False
+        return coord in self.presence(self.chunk_of(coord))
+
+    def generate_chunk(self, key):
+        """Pass 2: build the rooms of a chunk, with exits and any silver keys placed in it."""
+        rng = self.chunk_rng(key)
+        layout = self.roll_presence(key, rng)
+        rooms = {}
+        for coord, type_id in layout.items():
+            if type_id is None:
+                rooms[coord] = _FORCED_ROOMS[coord]()
+            else:
+                rooms[coord] = create_room(type_id, rng)
+        for (x, y), room in rooms.items():
+            exits = {}
+            for direction, neighbor in (("north", (x, y + 1)), ("south", (x, y - 1)),
+                                        ("east", (x + 1, y)), ("west", (x - 1, y))):
+                if neighbor in rooms or (self.chunk_of(neighbor) != key and self.has_room(neighbor)):
+                    exits[direction] = neighbor
+            room["exits"] = exits
+        for coord in self.key_coords:
+            if coord in rooms:
+                rooms[coord]["items"].append("silver key")
+        self.chunks_generated += 1
+        return rooms
+
+    def generate_columns(self, lo, hi):
+        """Return {coord: room} for the columns lo <= x < hi, generating only the chunks over them."""
+        size = self.chunk_size
+        low, high = max(lo, self.grid_min), min(hi - 1, self.grid_max)
+        rooms = {}
+        for cx in range(low // size, high // size + 1):
+            for cy in range(self.grid_min // size, self.grid_max // size + 1):
+                rooms.update((coord, room) for coord, room in self.generate_chunk((cx, cy)).items()
+                             if lo <= coord[0] < hi)
+        return rooms
+
+    def place_silver_keys(self):
+        """Choose the silver key rooms among the random rooms of the classic grid area."""
+        low, high = max(GRID_MIN, self.grid_min), min(GRID_MAX, self.grid_max)
+        keys = sorted({self.chunk_of((x, y)) for x in (low, high) for y in (low, high)})
+        available_coords = []
+        for cx in range(keys[0][0], keys[-1][0] + 1):
+            for cy in range(keys[0][1], keys[-1][1] + 1):
+                available_coords.extend(coord for coord in self.presence((cx, cy))
+                                        if low <= coord[0] <= high and low <= coord[1] <= high
+                                        and coord not in _FORCED_ROOMS)
+        available_coords.sort()
+        if len(available_coords) < secret_keys_needed:
+            return set(available_coords)
+        return set(random.Random(f"{self.seed}:keys").sample(available_coords, secret_keys_needed))
+
+    # -------------------------------
+    # Loading, eviction & write-back
+    # -------------------------------
+    def chunk_path(self, key):
+        return os.path.join(self.save_dir, f"chunk_{key[0]}_{key[1]}.pickle")
+
+    def load_saved(self, key):
+        """Return the previously written rooms of a modified chunk, or None."""
+        if self.save_dir is None:
+            data = self.saved.get(key)
+        else:
+            path = self.chunk_path(key)
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+        return None if data is None else pickle.loads(data)
+
+    def write_chunk(self, key):
+        data = pickle.dumps(self.chunks[key], pickle.HIGHEST_PROTOCOL)
+        if self.save_dir is None:
+            self.saved[key] = data
+        else:
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(self.chunk_path(key), "wb") as f:
+                f.write(data)
+
+    def load_chunk(self, key):
+        """Return the rooms of a chunk, loading or generating it and evicting cold chunks."""
+        rooms = self.chunks.get(key)
+        if rooms is not None:
+            self.chunks.move_to_end(key)
+            return rooms
+        rooms = self.load_saved(key)
+        if rooms is None:
+            rooms = self.generate_chunk(key)
+        self.chunks[key] = rooms
+        while len(self.chunks) > self.max_chunks:
+            self.evict(next(iter(self.chunks)))
+        return rooms
+
+    def evict(self, key):
+        """Drop a loaded chunk from memory, writing it out first if it was modified."""
+        if key in self.dirty:
+            self.write_chunk(key)
+            self.dirty.discard(key)
+        del self.chunks[key]
+        self.chunks_evicted += 1
+
+    def flush(self):
+        """Write out every modified chunk that is still loaded."""
+        for key in list(self.dirty):
+            self.write_chunk(key)
+        self.dirty.clear()
+
+    def mark_dirty(self, coord):
+        """Record that the room at coord was changed, so its chunk is written out on eviction."""
+        self.dirty.add(self.chunk_of(coord))
+
+    # -------------------------------
+    # grid_rooms interface
+    # -------------------------------
+    def get(self, coord, default=None):
+        if not (self.grid_min <= coord[0] <= self.grid_max and self.grid_min <= coord[1] <= self.grid_max):
+            return default
+        return self.load_chunk(self.chunk_of(coord)).get(coord, default)
+
+    def __getitem__(self, coord):
+        room = self.get(coord)
+        if room is None:
+            raise KeyError(coord)
+        return room
+
+    def __contains__(self, coord):
+        return self.has_room(coord)
+
+    def items(self):
+        """Iterate over the rooms of the currently loaded chunks only."""
+        for rooms in list(self.chunks.values()):
+            yield from rooms.items()
@@ -0,0 +1,213 @@
+"""
+Combat rules, a precomputed damage table, and a Monte Carlo fight-odds estimator.
+
+A monster's hit only depends on the monster, how many armor slots are filled and the
+player's secret-path progress, so every possible value is computed once into DAMAGE_TABLE,
+one row per monster id of the content pack, and attack() just looks it up. The same rules
+drive a batched resolver that plays one attack round for many fights at once; fight_odds()
+repeats it until every fight is over and reports win, death and damage-taken distributions
+for a loadout.
+"""
+import random
+
+from . import content
+
+np = None  # NumPy, imported on the first estimate: it takes longer to load than the whole game.
+
+# Filled from the active content pack, in place (see content.py).
+ARMOR_SLOTS = []          # Equipment keys of the non-weapon slots.
+WEAPONS = []              # Items of the weapon slots.
+ITEM_SLOTS = {}           # Item name -> the content.Slot it is equipped in.
+base_damages = {}
+DEFAULT_DAMAGE = 5        # Base damage of monsters the content does not define.
+ARMOR_REDUCTION = 0.15    # Damage reduction per filled armor slot...
+MAX_REDUCTION = 0.75      # ...capped here.
+PROGRESS_BONUS = 2        # Extra damage per step of secret-path progress.
+FIRST_STRIKE_CHANCE = 0.25
+MISS_CHANCE = 0.25
+
+
+def compute_damage(base_damage, armor_count, progress):
+    """The rule itself: damage after the progress bonus and armor reduction, at least 1."""
+    total_damage = base_damage + progress * PROGRESS_BONUS
+    reduction_percentage = min(armor_count * ARMOR_REDUCTION, MAX_REDUCTION)
+    inflicted_damage = round(total_damage * (1 - reduction_percentage))
+    if inflicted_damage < 1 and total_damage > 0:
+        inflicted_damage = 1
+    return inflicted_damage
+
+
+def armor_count(equipment):
+    return sum(1 for slot in ARMOR_SLOTS if equipment.get(slot) is not None)
+
+
+def is_armed(equipment):
+    return equipment["weapon_left"] in WEAPONS or equipment["weapon_right"] in WEAPONS
+
+
+class DamageTable:
+    """damage[monster id][armor count][progress], precomputed for every monster of a content pack."""
+
+    def __init__(self, pack=None, max_progress=16):
+        self.max_progress = max_progress
+        self.ids, self.base, self.rows, self.default = {}, [], [], None
+        if pack is not None:
+            self.load(pack)
+
+    def load(self, pack):
+        self.ids = pack.monster_ids
+        self.base = pack.monster_damages
+        self.rows = [self.row(base) for base in self.base]
+        self.default = self.row(DEFAULT_DAMAGE)
+
+    def row(self, base):
+        return [[compute_damage(base, armor, progress) for progress in range(self.max_progress + 1)]
+                for armor in range(len(ARMOR_SLOTS) + 1)]
+
+    def damage(self, monster_name, armor, progress):
+        monster_id = self.ids.get(monster_name)
+        if progress > self.max_progress:
+            base = DEFAULT_DAMAGE if monster_id is None else self.base[monster_id]
+            return compute_damage(base, armor, progress)
+        return (self.default if monster_id is None else self.rows[monster_id])[armor][progress]
+
+
+DAMAGE_TABLE = DamageTable()  # Loaded with the content.
+
+
+def _apply_content(pack):
+    ARMOR_SLOTS[:] = [key for slot in pack.slots if not slot.weapon for key in slot.fills]
+    WEAPONS[:] = [name for name, slot in zip(pack.item_names, pack.item_slots) if slot is not None and slot.weapon]
+    ITEM_SLOTS.clear()
+    ITEM_SLOTS.update((name, slot) for name, slot in zip(pack.item_names, pack.item_slots) if slot is not None)
+    base_damages.clear()
+    base_damages.update(zip(pack.monster_names, pack.monster_damages))
+    DAMAGE_TABLE.load(pack)
+
+
+content.subscribe(_apply_content)
+
+
+# ===============================
+# BATCHED RESOLUTION
+# ===============================
+def resolve_round(first_rolls, miss_rolls, health, damage, armed):
+    """
+    Play one attack round for a batch of fights (NumPy arrays, one element per fight).
+    Returns (health after the round, monster killed, player died), following attack():
+      - a first strike (first roll < 25%) hits before the player acts, and can kill;
+      - a miss (miss roll < 25%) lets the monster counterattack and survive the round;
+      - otherwise the monster dies, and an unarmed player takes one more hit first
+        (then runs at once, as the best answer to the 'run' prompt).
+    """
+    first = first_rolls < FIRST_STRIKE_CHANCE
+    health = health - first * damage
+    slain = health <= 0
+    missed = ~slain & (miss_rolls < MISS_CHANCE)
+    health = health - missed * damage
+    killed = ~slain & ~missed
+    if not armed:
+        health = health - killed * damage
+    died = health <= 0
+    return health, killed, died
+
+
+def _load_numpy():
+    """Return the numpy module, or None if it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+def _odds_numpy(damage, armed, health, fights, max_rounds, seed):
+    rng = np.random.default_rng(seed)
+    start = health
+    health = np.full(fights, health, dtype=np.int64)
+    rounds = np.zeros(fights, dtype=np.int64)
+    won = np.zeros(fights, dtype=bool)
+    dead = np.zeros(fights, dtype=bool)
+    active = np.arange(fights)
+    for _ in range(max_rounds):
+        if not len(active):
+            break
+        new_health, killed, died = resolve_round(rng.random(len(active)), rng.random(len(active)),
+                                                 health[active], damage, armed)
+        health[active] = new_health
+        rounds[active] += 1
+        dead[active] = died
+        won[active] = killed & ~died
+        active = active[~(killed | died)]
+    return won, dead, start - health, rounds
+
+
+def _odds_python(damage, armed, health, fights, max_rounds, seed):
+    rng = random.Random(seed)
+    won, dead, taken, rounds = [], [], [], []
+    for _ in range(fights):
+        hp = health
+        result = None
+        played = 0
+        while result is None and played < max_rounds:
+            played += 1
+            if rng.random() < FIRST_STRIKE_CHANCE:
+                hp -= damage
+                if hp <= 0:
+                    result = "dead"
+                    break
+            if rng.random() < MISS_CHANCE:
+                hp -= damage
+                if hp <= 0:
+                    result = "dead"
+                continue
+            if not armed:
+                hp -= damage
+            result = "dead" if hp <= 0 else "won"
+        won.append(result == "won")
+        dead.append(result == "dead")
+        taken.append(health - hp)
+        rounds.append(played)
+    return won, dead, taken, rounds
+
+
+def fight_odds(monster_name, equipment=None, health=100, progress=0, fights=1_000_000, max_rounds=100, seed=None):
+    """
+    Estimate how a fight to the finish against monster_name goes for a loadout.
+      - equipment: a player_state["equipment"] dict (default: nothing equipped).
+      - progress: secret-path progress, which makes monsters hit harder.
+    Returns a dict with win, death and unresolved probabilities, expected damage taken and
+    rounds, and damage_distribution {damage taken: probability}. Uses NumPy when available.
+    """
+    equipment = equipment or {slot: None for slot in ARMOR_SLOTS + ["weapon_left", "weapon_right"]}
+    damage = DAMAGE_TABLE.damage(monster_name, armor_count(equipment), progress)
+    armed = is_armed(equipment)
+    if _load_numpy() is not None:
+        won, dead, taken, rounds = _odds_numpy(damage, armed, health, fights, max_rounds, seed)
+        values, counts = np.unique(taken, return_counts=True)
+        distribution = {int(v): int(c) / fights for v, c in zip(values, counts)}
+        wins, deaths = int(won.sum()), int(dead.sum())
+        expected_damage, expected_rounds = float(taken.mean()), float(rounds.mean())
+    else:
+        won, dead, taken, rounds = _odds_python(damage, armed, health, fights, max_rounds, seed)
+        distribution = {}
+        for value in taken:
+            distribution[value] = distribution.get(value, 0) + 1 / fights
+        distribution = dict(sorted(distribution.items()))
+        wins, deaths = sum(won), sum(dead)
+        expected_damage, expected_rounds = sum(taken) / fights, sum(rounds) / fights
+    return {
+        "monster": monster_name,
+        "damage_per_hit": damage,
+        "armed": armed,
+        "fights": fights,
+        "win": wins / fights,
+        "death": deaths / fights,
+        "unresolved": (fights - wins - deaths) / fights,
+        "expected_damage": expected_damage,
+        "expected_rounds": expected_rounds,
+        "damage_distribution": distribution,
+    }
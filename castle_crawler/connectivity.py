@@ -0,0 +1,258 @@
+"""
+Reachability and routes through the castle.
+
+Connectivity keeps a union-find over the unlocked rooms of a world, so "can I walk from A to B
+without a key" is two near-constant finds. Locked rooms are the doors between components: each
+one costs a silver key to open, after which move() tells the index and the room's neighbours
+are merged in place instead of rebuilding anything. Whether a world is winnable is then a small
+search over components and doors rather than over rooms, cheap enough to run on every
+generated world, and repair_keys() moves the keys of a world that fails it within reach.
+find_path() is an A* search over the rooms themselves for the 'path to' and 'walk to' commands.
+"""
+import heapq
+import random
+
+from .world import secret_keys_needed
+
+KEY = "silver key"
+SEARCH_LIMIT = 100_000  # States a single search may visit before giving up.
+_STEPS = (("north", 0, 1), ("south", 0, -1), ("east", 1, 0), ("west", -1, 0))
+
+
+def _neighbours(coord):
+    x, y = coord
+    return ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+
+
+class Connectivity:
+    """Union-find over the unlocked rooms of one world; share one instance between games on that world."""
+
+    def __init__(self):
+        self.parent = {}     # unlocked coord -> parent coord
+        self.size = {}       # root coord -> rooms in its component
+        self.locked = set()  # coords of rooms that are still locked
+
+    @classmethod
+    def build(cls, grid_rooms):
+        """Index every room of a world with one full scan."""
+        connectivity = cls()
+        parent, size = connectivity.parent, connectivity.size
+        for coord, room in grid_rooms.items():
+            if room["locked"]:
+                connectivity.locked.add(coord)
+            else:
+                parent[coord] = coord
+                size[coord] = 1
+        for coord in list(parent):
+            x, y = coord
+            for other in ((x + 1, y), (x, y + 1)):
+                if other in parent:
+                    connectivity.union(coord, other)
+        return connectivity
+
+    # -------------------------------
+    # Union-find
+    # -------------------------------
+    def find(self, coord):
+        """Return the root of coord's component (coord must be an unlocked room)."""
+        parent = self.parent
+        while parent[coord] != coord:
+            parent[coord] = parent[parent[coord]]
+            coord = parent[coord]
+        return coord
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        return a
+
+    def connected(self, a, b):
+        """True if both rooms are unlocked and joined by unlocked rooms."""
+        return a in self.parent and b in self.parent and self.find(a) == self.find(b)
+
+    def component_size(self, coord):
+        return self.size[self.find(coord)] if coord in self.parent else 0
+
+    # -------------------------------
+    # Updates from the commands
+    # -------------------------------
+    def unlocked(self, coord):
+        """A door was opened: coord joins the components of its unlocked neighbours."""
+        if coord in self.parent:
+            return
+        self.locked.discard(coord)
+        self.parent[coord] = coord
+        self.size[coord] = 1
+        for other in _neighbours(coord):
+            if other in self.parent:
+                self.union(coord, other)
+
+    # -------------------------------
+    # Key-gated reachability
+    # -------------------------------
+    def node(self, coord):
+        """The search node of a room: its component root, or the room itself while locked."""
+        return self.find(coord) if coord in self.parent else coord
+
+    def door_graph(self):
+        """Return {node: set of adjacent nodes}, where locked rooms are the only links between components."""
+        graph = {}
+        for door in self.locked:
+            for other in _neighbours(door):
+                if other in self.parent or other in self.locked:
+                    other_node = self.node(other)
+                    graph.setdefault(door, set()).add(other_node)
+                    graph.setdefault(other_node, set()).add(door)
+        return graph
+
+    def collectible_keys(self, key_rooms, start=(0, 0), target=None, limit=SEARCH_LIMIT):
+        """
+        Return the most silver keys a player starting at start can pick up, when every locked
+        room costs one key to enter.
+          - key_rooms: {coord: number of keys there}.
+          - target: stop searching as soon as this many keys are collectible.
+        Keys are interchangeable, so the search is over the set of doors opened so far; it
+        never opens more doors than there are keys, which keeps it small.
+        """
+        if start not in self.parent and start not in self.locked:
+            return 0
+        graph = self.door_graph()
+        keys_at = {}
+        for coord, count in key_rooms.items():
+            node = self.node(coord)
+            keys_at[node] = keys_at.get(node, 0) + count
+        start_node = self.node(start)
+        locked = self.locked
+
+        def explore(opened):
+            reached, doors = {start_node}, set()
+            stack = [start_node]
+            while stack:
+                for other in graph.get(stack.pop(), ()):
+                    if other in reached:
+                        continue
+                    if other in locked and other not in opened:
+                        doors.add(other)
+                        continue
+                    reached.add(other)
+                    stack.append(other)
+            return sum(keys_at.get(node, 0) for node in reached), doors
+
+        best = 0
+        seen = {frozenset()}
+        stack = [frozenset()]
+        while stack and len(seen) <= limit:
+            opened = stack.pop()
+            keys, doors = explore(opened)
+            best = max(best, keys)
+            if target is not None and best >= target:
+                break
+            if keys > len(opened):
+                for door in doors:
+                    state = opened | {door}
+                    if state not in seen:
+                        seen.add(state)
+                        stack.append(state)
+        return best
+
+    def winnable(self, grid_rooms, start=(0, 0), needed=secret_keys_needed, key_rooms=None):
+        """True if a player starting at start can collect the silver keys the secret path calls for."""
+        if key_rooms is None:
+            key_rooms = find_keys(grid_rooms)
+        return self.collectible_keys(key_rooms, start, target=needed) >= needed
+
+
+def find_keys(grid_rooms, coords=None):
+    """Return {coord: silver keys there}, scanning coords (default: every room)."""
+    if coords is None:
+        coords = (coord for coord, room in grid_rooms.items() if KEY in room["items"])
+    return {coord: grid_rooms[coord]["items"].count(KEY) for coord in coords}
+
+
+def repair_keys(grid_rooms, connectivity, rng=random, index=None, start=(0, 0), needed=secret_keys_needed):
+    """
+    Make a world winnable by moving every silver key outside the start component into random
+    rooms of it (avoiding the forced rooms where possible). Does nothing if the world is
+    already winnable. Returns the list of (from, to) moves; a WorldIndex, if given, is updated.
+    """
+    key_rooms = find_keys(grid_rooms)
+    if connectivity.winnable(grid_rooms, start, needed, key_rooms):
+        return []
+    root = connectivity.find(start)
+    members = sorted(coord for coord in connectivity.parent if connectivity.find(coord) == root)
+    targets = [coord for coord in members if grid_rooms[coord]["name"] not in ["entry_hall", "throne_room"]]
+    targets = targets or members
+    moves = []
+    for coord in sorted(key_rooms):
+        if connectivity.connected(coord, start):
+            continue
+        room = grid_rooms[coord]
+        for _ in range(key_rooms[coord]):
+            room["items"].remove(KEY)
+            dest = rng.choice(targets)
+            grid_rooms[dest]["items"].append(KEY)
+            moves.append((coord, dest))
+            if index is not None:
+                index.item_removed(coord, KEY, room)
+                index.item_added(dest, KEY)
+    return moves
+
+
+# ===============================
+# ROUTES
+# ===============================
+def find_path(grid_rooms, start, goal, keys=0, grid_min=None, grid_max=None, connectivity=None,
+              limit=SEARCH_LIMIT):
+    """
+    Return the shortest list of directions from start to goal, or None if there is none.
+    Up to keys locked rooms may be entered on the way (each uses one key). A* with the
+    Manhattan distance; with a Connectivity and no keys, unreachable goals are rejected at once.
+    """
+    goal_room = grid_rooms.get(goal)
+    if goal_room is None or grid_rooms.get(start) is None:
+        return None
+    if start == goal:
+        return []
+    if connectivity is not None and keys == 0:
+        if not connectivity.connected(start, goal):
+            return None
+    gx, gy = goal
+    # Frontier entries: (estimate, moves so far, keys used, coord); search states are (coord, keys used).
+    frontier = [(abs(start[0] - gx) + abs(start[1] - gy), 0, 0, start)]
+    best = {(start, 0): 0}
+    came_from = {(start, 0): None}
+    while frontier and len(best) <= limit:
+        _, cost, used, coord = heapq.heappop(frontier)
+        if cost > best[(coord, used)]:
+            continue
+        if coord == goal:
+            path = []
+            state = (coord, used)
+            while came_from[state] is not None:
+                state, direction = came_from[state]
+                path.append(direction)
+            path.reverse()
+            return path
+        x, y = coord
+        for direction, dx, dy in _STEPS:
+            nx, ny = x + dx, y + dy
+            if grid_min is not None and not (grid_min <= nx <= grid_max and grid_min <= ny <= grid_max):
+                continue
+            room = grid_rooms.get((nx, ny))
+            if room is None:
+                continue
+            now_used = used + 1 if room["locked"] else used
+            if now_used > keys:
+                continue
+            state = ((nx, ny), now_used)
+            if cost + 1 >= best.get(state, cost + 2):
+                continue
+            best[state] = cost + 1
+            came_from[state] = ((coord, used), direction)
+            heapq.heappush(frontier, (cost + 1 + abs(nx - gx) + abs(ny - gy), cost + 1, now_used, (nx, ny)))
+    return None
@@ -0,0 +1,57 @@
+"""
+Terminal front ends: the interactive prompt loop and a batch mode for scripted sessions.
+
+Game text collects in game.output and is written out with one write() per flush instead of
+one print() per line. Interactive play flushes after every command. Batch mode runs commands
+from a script or a pipe without printing prompts and flushes once at the end (or whenever
+FLUSH_LINES lines are waiting); the answer to the 'run' prompt of an unarmed fight is simply
+the next line of the script.
+"""
+import sys
+
+from .engine import WELCOME_TEXT
+
+FLUSH_LINES = 4096
+
+
+def flush(game, out):
+    """Write everything the game has said since the last flush in one call."""
+    output = game.output
+    if output:
+        out.write("\n".join(output) + "\n")
+        output.clear()
+
+
+def play_interactive(game, out=None):
+    """Play at the terminal until 'quit' or end of input."""
+    out = out or sys.stdout
+    out.write(WELCOME_TEXT + "\n")
+    game.describe_current_room()
+    flush(game, out)
+    while True:
+        try:
+            command = input(game.prompt)
+        except EOFError:
+            break
+        event = game.execute(command)
+        flush(game, out)
+        if event == "quit":
+            break
+
+
+def play_script(game, lines, out=None):
+    """Run the commands in lines (an iterable of strings) without prompts; return how many ran."""
+    out = out or sys.stdout
+    out.write(WELCOME_TEXT + "\n")
+    game.describe_current_room()
+    output, execute = game.output, game.execute
+    count = 0
+    for line in lines:
+        count += 1
+        if execute(line) == "quit":
+            break
+        if len(output) >= FLUSH_LINES:
+            flush(game, out)
+    flush(game, out)
+    out.flush()
+    return count
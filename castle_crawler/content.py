@@ -0,0 +1,427 @@
+"""
+Content packs: the room types, items, monsters and equipment slots of a castle, as data.
+
+A pack is a JSON file (or TOML, on Python 3.11+) with four sections:
+  - rooms:    [{name, description}], the room types random rooms are drawn from;
+  - items:    [{name, slot?, spawn?}], every item in item-id order; spawn items are the pool
+              random rooms draw from, and slot names the equipment slot the item goes in;
+  - monsters: [{name, damage, spawn?}], every monster and its base damage; spawn monsters
+              are the ones random rooms (and respawns) draw from;
+  - slots:    {name: {fills, equip, full, weapon?}}, the equipment keys a slot fills, in order,
+              the message for filling each, the message when all are taken, and whether items
+              in it arm the player.
+The castle's own content is packs/castle.json. The forced and special rooms, and the items and
+monster they hold, are part of the rules rather than the content: every pack must define them.
+
+load() validates a pack and compiles it into a Content: every string interned once, and every
+room type, item and monster numbered by its position in the pack. The compiled form is cached
+as a .ccpack file in the user's cache directory (user_cache_dir()), keyed by a digest of the
+source, so later startups read a few struct records instead of parsing and validating the
+pack again. Only use() and the command line write the cache. The content the modules read at
+import (see subscribe()) comes from the cache if it is there and is compiled in memory if not,
+so importing the package never writes a file.
+
+use(path) makes a pack the active one for this process and, through CASTLE_CRAWLER_CONTENT,
+for the worker processes it starts. The tables world, store, combat and savefile derive from
+the active content are refilled in place, so use() belongs before any world is generated.
+
+    python -m castle_crawler.content my_pack.toml   # validate and compile a pack
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover - Python < 3.11
+    tomllib = None
+
+ENV_VAR = "CASTLE_CRAWLER_CONTENT"
+CACHE_VAR = "CASTLE_CRAWLER_CACHE"  # Overrides where compiled packs are cached.
+DEFAULT_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs", "castle.json")
+
+# The player's equipment keys; slots fill some of them.
+EQUIPMENT_SLOTS = ("helmet", "armor", "shield", "boots", "gloves", "weapon_left", "weapon_right")
+# Names the rules rely on: the forced and special rooms and what they hold.
+RESERVED_ROOMS = ("entry_hall", "throne_room", "final_boss_room", "secret_treasure_room")
+REQUIRED_ITEMS = ("torch", "sword", "silver key", "legendary sword", "enchanted armor",
+                  "infinite health potion", "golden crown")
+REQUIRED_MONSTERS = ("final boss",)
+MAX_ROOM_TYPES = 253  # Compact worlds store the room type in a byte; 0 and two ids go to the forced rooms.
+
+MAGIC = b"CCPACK\x00\x00"
+VERSION = 1
+# magic, version, source digest, pack name id, strings, rooms, items, monsters, slots
+HEADER = struct.Struct("<8sH16sHIIIII")
+_U16 = struct.Struct("<H")
+_ROOM = struct.Struct("<HH")     # name id, description id
+_ITEM = struct.Struct("<HhB")    # name id, slot index (-1 for none), spawn
+_MONSTER = struct.Struct("<HHB")  # name id, base damage, spawn
+_SLOT = struct.Struct("<HHBB")   # name id, full message id, weapon, keys filled
+_FILL = struct.Struct("<HH")     # equipment key id, equip message id
+
+_active = None
+_listeners = []
+
+
+class Slot:
+    """An equipment slot: the keys it fills, in order, and what filling each one says."""
+
+    def __init__(self, name, fills, equip, full, weapon=False):
+        self.name = name
+        self.fills = tuple(fills)
+        self.equip = tuple(equip)   # One message per key in fills.
+        self.full = full
+        self.weapon = weapon
+
+    def __repr__(self):
+        return f"Slot({self.name!r}, fills={self.fills!r})"
+
+
+class Content:
+    """
+    A compiled pack. Room types, items and monsters are numbered in pack order:
+      - room_names / room_descriptions: by room type id;
+      - item_names / item_slots: by item id, the Slot of an equippable item or None;
+      - monster_names / monster_damages: by monster id;
+      - spawn_items / spawn_monsters: the names random rooms draw from, in pack order.
+    """
+
+    def __init__(self, name, digest, rooms, items, monsters, slots):
+        self.name = name
+        self.digest = digest
+        self.slots = slots
+        self.room_names = [room_name for room_name, _ in rooms]
+        self.room_descriptions = [description for _, description in rooms]
+        self.item_names = [item_name for item_name, _, _ in items]
+        self.item_slots = [slots[slot] if slot >= 0 else None for _, slot, _ in items]
+        self.spawn_items = [item_name for item_name, _, spawn in items if spawn]
+        self.monster_names = [monster_name for monster_name, _, _ in monsters]
+        self.monster_damages = [damage for _, damage, _ in monsters]
+        self.spawn_monsters = [monster_name for monster_name, _, spawn in monsters if spawn]
+        self.room_ids = {room_name: i for i, room_name in enumerate(self.room_names)}
+        self.item_ids = {item_name: i for i, item_name in enumerate(self.item_names)}
+        self.monster_ids = {monster_name: i for i, monster_name in enumerate(self.monster_names)}
+
+    def slot_of(self, item_name):
+        """The Slot item_name is equipped in, or None."""
+        item_id = self.item_ids.get(item_name)
+        return None if item_id is None else self.item_slots[item_id]
+
+    def __repr__(self):
+        return (f"Content({self.name!r}, rooms={len(self.room_names)}, items={len(self.item_names)}, "
+                f"monsters={len(self.monster_names)})")
+
+
+# ===============================
+# VALIDATION & COMPILATION
+# ===============================
+def _text(origin, where, value):
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"{origin}: {where} must be a non-empty string")
+    return value
+
+
+def _entries(origin, data, section):
+    entries = data.get(section)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{origin}: '{section}' must be a non-empty list")
+    names = set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{origin}: {section}[{i}] must be a table")
+        name = _text(origin, f"{section}[{i}].name", entry.get("name"))
+        if name in names:
+            raise ValueError(f"{origin}: {section} defines {name!r} twice")
+        names.add(name)
+    return entries, names
+
+
+def _flag(origin, entry, section):
+    spawn = entry.get("spawn", False)
+    if not isinstance(spawn, bool):
+        raise ValueError(f"{origin}: {section} entry {entry['name']!r}: spawn must be true or false")
+    return spawn
+
+
+def compile_pack(data, digest=b"", origin="<pack>"):
+    """Validate a parsed pack (a dict) and return it as a Content; raises ValueError naming the problem."""
+    if not isinstance(data, dict):
+        raise ValueError(f"{origin}: a content pack must be a table")
+    name = _text(origin, "name", data.get("name", "custom"))
+
+    raw_slots = data.get("slots")
+    if not isinstance(raw_slots, dict) or not raw_slots:
+        raise ValueError(f"{origin}: 'slots' must be a non-empty table")
+    slots, slot_ids, taken = [], {}, set()
+    for slot_name, spec in raw_slots.items():
+        where = f"slots.{slot_name}"
+        if not isinstance(spec, dict):
+            raise ValueError(f"{origin}: {where} must be a table")
+        fills, equip = spec.get("fills"), spec.get("equip")
+        if not isinstance(fills, list) or not fills or not isinstance(equip, list) or len(equip) != len(fills):
+            raise ValueError(f"{origin}: {where} needs 'fills' and one 'equip' message per key filled")
+        for key in fills:
+            if key not in EQUIPMENT_SLOTS:
+                raise ValueError(f"{origin}: {where} fills unknown equipment key {key!r} "
+                                 f"(one of {', '.join(EQUIPMENT_SLOTS)})")
+            if key in taken:
+                raise ValueError(f"{origin}: equipment key {key!r} is filled by two slots")
+            taken.add(key)
+        weapon = spec.get("weapon", False)
+        if not isinstance(weapon, bool):
+            raise ValueError(f"{origin}: {where}.weapon must be true or false")
+        slot_ids[slot_name] = len(slots)
+        slots.append(Slot(sys.intern(slot_name), [sys.intern(key) for key in fills],
+                          [sys.intern(_text(origin, f"{where}.equip", message)) for message in equip],
+                          sys.intern(_text(origin, f"{where}.full", spec.get("full"))), weapon))
+
+    room_entries, room_names = _entries(origin, data, "rooms")
+    reserved = room_names.intersection(RESERVED_ROOMS)
+    if reserved:
+        raise ValueError(f"{origin}: room names {sorted(reserved)} are reserved for the forced and special rooms")
+    if len(room_entries) > MAX_ROOM_TYPES:
+        raise ValueError(f"{origin}: at most {MAX_ROOM_TYPES} room types are supported")
+    rooms = [(sys.intern(entry["name"]),
+              sys.intern(_text(origin, f"room {entry['name']!r} description", entry.get("description"))))
+             for entry in room_entries]
+
+    item_entries, item_names = _entries(origin, data, "items")
+    items = []
+    for entry in item_entries:
+        slot = entry.get("slot")
+        if slot is not None and slot not in slot_ids:
+            raise ValueError(f"{origin}: item {entry['name']!r} goes in unknown slot {slot!r}")
+        items.append((sys.intern(entry["name"]), -1 if slot is None else slot_ids[slot],
+                      _flag(origin, entry, "items")))
+
+    monster_entries, monster_names = _entries(origin, data, "monsters")
+    monsters = []
+    for entry in monster_entries:
+        damage = entry.get("damage")
+        if not isinstance(damage, int) or isinstance(damage, bool) or not 0 <= damage <= 0xFFFF:
+            raise ValueError(f"{origin}: monster {entry['name']!r} needs an integer damage from 0 to 65535")
+        monsters.append((sys.intern(entry["name"]), damage, _flag(origin, entry, "monsters")))
+
+    for names, required, section in ((item_names, REQUIRED_ITEMS, "items"),
+                                     (monster_names, REQUIRED_MONSTERS, "monsters")):
+        missing = [required_name for required_name in required if required_name not in names]
+        if missing:
+            raise ValueError(f"{origin}: {section} must include {', '.join(map(repr, missing))}")
+    if not any(spawn for _, _, spawn in items):
+        raise ValueError(f"{origin}: no item has spawn = true, so rooms have nothing to hold")
+    if not any(spawn for _, _, spawn in monsters):
+        raise ValueError(f"{origin}: no monster has spawn = true, so rooms have nothing to hold")
+    strings = {name, *(text for room in rooms for text in room)}
+    strings.update(entry[0] for entry in items + monsters)
+    for slot in slots:
+        strings.update((slot.name, slot.full, *slot.fills, *slot.equip))
+    if len(strings) > 0xFFFF:
+        raise ValueError(f"{origin}: too many distinct strings ({len(strings)})")
+    return Content(sys.intern(name), digest, rooms, items, monsters, slots)
+
+
+def parse(source, path):
+    """Parse a pack's bytes as TOML (by file extension) or JSON."""
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ImportError("TOML content packs need Python 3.11+; use JSON instead")
+        try:
+            return tomllib.loads(source.decode("utf-8"))
+        except tomllib.TOMLDecodeError as error:
+            raise ValueError(f"{path}: {error}") from None
+    try:
+        return json.loads(source)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"{path}: {error}") from None
+
+
+# ===============================
+# COMPILED CACHE
+# ===============================
+class _Interner:
+    """One shared object per distinct string, numbered in order of first use."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def __call__(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return string_id
+
+
+def encode(content):
+    """The compiled form of content: a string table, then fixed-size records that refer into it."""
+    intern = _Interner()
+    body = bytearray()
+    for slot in content.slots:
+        body += _SLOT.pack(intern(slot.name), intern(slot.full), slot.weapon, len(slot.fills))
+        for key, message in zip(slot.fills, slot.equip):
+            body += _FILL.pack(intern(key), intern(message))
+    for room_name, description in zip(content.room_names, content.room_descriptions):
+        body += _ROOM.pack(intern(room_name), intern(description))
+    slot_index = {id(slot): i for i, slot in enumerate(content.slots)}
+    spawn_items, spawn_monsters = set(content.spawn_items), set(content.spawn_monsters)
+    for item_name, slot in zip(content.item_names, content.item_slots):
+        body += _ITEM.pack(intern(item_name), -1 if slot is None else slot_index[id(slot)], item_name in spawn_items)
+    for monster_name, damage in zip(content.monster_names, content.monster_damages):
+        body += _MONSTER.pack(intern(monster_name), damage, monster_name in spawn_monsters)
+    name_id = intern(content.name)
+    strings = bytearray()
+    for string in intern.strings:
+        data = string.encode("utf-8")
+        strings += _U16.pack(len(data)) + data
+    header = HEADER.pack(MAGIC, VERSION, content.digest, name_id, len(intern.strings), len(content.room_names),
+                         len(content.item_names), len(content.monster_names), len(content.slots))
+    return header + strings + body
+
+
+def decode(data, digest):
+    """Rebuild a Content from its compiled form, or return None if it was compiled from another source."""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, source_digest, name_id, string_count, room_count, item_count, monster_count, slot_count = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or source_digest != digest:
+        return None
+    strings = []
+    offset = HEADER.size
+    for _ in range(string_count):
+        (length,) = _U16.unpack_from(data, offset)
+        strings.append(sys.intern(data[offset + 2:offset + 2 + length].decode("utf-8")))
+        offset += 2 + length
+    slots = []
+    for _ in range(slot_count):
+        slot_name, full, weapon, count = _SLOT.unpack_from(data, offset)
+        offset += _SLOT.size
+        fills = [_FILL.unpack_from(data, offset + i * _FILL.size) for i in range(count)]
+        offset += count * _FILL.size
+        slots.append(Slot(strings[slot_name], [strings[key] for key, _ in fills],
+                          [strings[message] for _, message in fills], strings[full], bool(weapon)))
+    rooms = [(strings[room_name], strings[description])
+             for room_name, description in _ROOM.iter_unpack(data[offset:offset + room_count * _ROOM.size])]
+    offset += room_count * _ROOM.size
+    items = [(strings[item_name], slot, bool(spawn))
+             for item_name, slot, spawn in _ITEM.iter_unpack(data[offset:offset + item_count * _ITEM.size])]
+    offset += item_count * _ITEM.size
+    monsters = [(strings[monster_name], damage, bool(spawn)) for monster_name, damage, spawn
+                in _MONSTER.iter_unpack(data[offset:offset + monster_count * _MONSTER.size])]
+    return Content(strings[name_id], digest, rooms, items, monsters, slots)
+
+
+def user_cache_dir():
+    """Where compiled packs go by default: $CASTLE_CRAWLER_CACHE, or castle-crawler in the user's cache."""
+    directory = os.environ.get(CACHE_VAR)
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "castle-crawler")
+
+
+def cache_path(path, cache_dir=None):
+    """
+    Where the compiled form of the pack at path is cached: <stem>.ccpack in cache_dir, or in
+    user_cache_dir() under a name that also tells apart packs of the same name elsewhere.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if cache_dir is not None:
+        return os.path.join(cache_dir, stem + ".ccpack")
+    where = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(user_cache_dir(), f"{stem}-{where}.ccpack")
+
+
+def load(path, cache_dir=None, write=True):
+    """
+    Return the compiled content of the pack at path, from its cache when the pack has not
+    changed since it was compiled. With write, a fresh compile is written to the cache; a
+    cache that cannot be written only costs the next startup a parse.
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.blake2b(source, digest_size=16).digest()
+    cached = cache_path(path, cache_dir)
+    try:
+        with open(cached, "rb") as f:
+            content = decode(f.read(), digest)
+        if content is not None:
+            return content
+    except (OSError, ValueError, struct.error, IndexError):
+        pass  # Missing, unreadable or corrupt: compile again.
+    content = compile_pack(parse(source, path), digest, path)
+    if not write:
+        return content
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(encode(content))
+        os.replace(temporary, cached)
+    except OSError:
+        pass
+    return content
+
+
+# ===============================
+# ACTIVE CONTENT
+# ===============================
+def active():
+    """
+    The content this process plays with: CASTLE_CRAWLER_CONTENT's pack, or the castle's own.
+    Read from its cache if it is there, compiled in memory if not; never written (see use()).
+    """
+    global _active
+    if _active is None:
+        _active = load(os.environ.get(ENV_VAR) or DEFAULT_PACK, write=False)
+    return _active
+
+
+def subscribe(apply):
+    """Call apply(content) with the active content now, and again whenever use() installs another."""
+    _listeners.append(apply)
+    apply(active())
+
+
+def use(path, cache_dir=None):
+    """
+    Load the pack at path (compiling it into the cache if needed) and make it the active content
+    of this process and its workers.
+    """
+    global _active
+    content = load(path, cache_dir)
+    _active = content
+    os.environ[ENV_VAR] = os.path.abspath(path)
+    for apply in _listeners:
+        apply(content)
+    return content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m castle_crawler.content",
+                                     description="Validate content packs and compile their caches.")
+    parser.add_argument("packs", nargs="+", help="JSON or TOML content packs")
+    parser.add_argument("--cache-dir", help="where to write the compiled packs (default: the user cache "
+                                             f"directory, or ${CACHE_VAR})")
+    args = parser.parse_args(argv)
+    failed = False
+    for path in args.packs:
+        try:
+            content = load(path, args.cache_dir)
+        except (OSError, ValueError, ImportError) as error:
+            print(f"error: {error}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"{path}: {len(content.room_names)} room types, {len(content.item_names)} items "
+              f"({len(content.spawn_items)} spawn), {len(content.monster_names)} monsters "
+              f"({len(content.spawn_monsters)} spawn), {len(content.slots)} slots -> {cache_path(path, args.cache_dir)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
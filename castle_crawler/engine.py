@@ -0,0 +1,1099 @@
+import copy
+import random
+import time
+from collections import deque
+
+from . import world
+from .chunks import ChunkedWorld
+from .connectivity import SEARCH_LIMIT, Connectivity, find_path, repair_keys
+from .combat import ITEM_SLOTS, DAMAGE_TABLE, armor_count, fight_odds, is_armed
+from .index import WorldIndex
+from .journal import CommandJournal
+from .metrics import Metrics
+from .minimap import DEFAULT_RADIUS, LEGEND, MAX_RADIUS, Explored, Minimap
+from .persistent import GameVersion, PersistentWorld
+from .render import RenderCache, render_room
+from .inventory import distinct
+from .secret_paths import DEFAULT_MATCHER
+from .wander import Wanderers
+from .world import get_offset
+from .worldconfig import WorldConfig
+
+# ===============================
+# HEADLESS GAME ENGINE
+# ===============================
+# Every command method appends its text to game.output (or discards it when the
+# game is quiet) and returns a short event string describing what happened, so a
+# caller can drive the game without reading any text at all.
+
+PROMPT = "\n> "
+RUN_PROMPT = "You must escape! Type 'run' to flee: "
+
+WELCOME_TEXT = """
+Welcome to Castle Crawler!
+
+Venture into the shadowed halls of this ancient castle, where whispers of a hidden treasure echo in every corridor.
+Legends speak of riches beyond imagination—and of those who perished seeking them. Your mission, should you dare,
+is to uncover the secret path leading to the treasure, or fall to the castle’s eternal curse.
+
+May fortune favor the brave!
+"""
+
+HELP_TEXT = """
+Available Commands:
+- go <direction>   : Move in the specified direction (e.g., 'go north', 'go east', etc.).
+- look             : Describe your current surroundings.
+- take <item>      : Pick up an item (e.g., 'take sword').
+- take all         : Pick up all items in the room.
+- drop <item>      : Drop a specific item from your inventory into the current room.
+- drop all         : Drop everything you are carrying.
+- use <item>       : Use an item (e.g., 'use health potion', 'use torch').
+- equip <item>     : Equip an item (e.g., 'equip helmet', 'equip sword').
+- inventory        : Show your current inventory.
+- equipment        : Show what you currently have equipped.
+- attack <monster> : Attack a monster in the room.
+- odds <monster>   : Estimate your chances against a monster with your current gear.
+- locate <thing>   : (admin) Find the nearest item or monster of that name.
+- map [radius]     : Show a map of the rooms you have explored around you.
+- path to <x>,<y>  : Show the shortest route to a room, using your silver keys for locked doors.
+- walk to <x>,<y>  : Follow that route, stopping if anything gets in the way.
+- save <file>      : (admin) Save the game; saving again to the same file only writes what changed.
+- undo [n]         : Take back the last command (or n commands) that changed anything.
+- checkpoint <name>: Remember the game as it is now; 'restore <name>' goes back to it.
+- checkpoints      : List your checkpoints.
+- stats [on|off]   : (admin) Show command latencies and counters, or turn them on or off.
+- stats save <file>: (admin) Write them to a JSON file.
+- profile on|off   : (admin) Profile this session's commands; 'off' shows where the time went.
+- help             : Display this help message.
+- quit             : Exit the game.
+Shortcuts: n/s/e/w (or north/south/east/west) to move, i for inventory, x or l to look.
+"""
+
+ODDS_FIGHTS = 100_000  # Simulated fights behind one 'odds' command.
+PROFILE_LINES = 20     # Functions listed by 'profile off'.
+UNDO_LIMIT = 1000      # Commands 'undo' can take back.
+
+
+def _discard(text):
+    pass
+
+
+class Game:
+    """
+    One independent game: its own world, player and secret-path progress.
+      - seed: seeds the game's private random.Random, which every roll of world generation
+        and combat draws from; None picks a fresh seed (kept in game.seed).
+      - quiet: if True, text output is discarded and only events are returned.
+      - world_config: the WorldConfig that builds the world (grid bounds, chunked, compact,
+        vectorized, winnable, world cache); or pass its options as keywords here.
+      - grid_rooms: an already generated world to play in instead of a new one (world_config
+        then only gives its grid bounds).
+      - secret_matcher: the compiled SecretMatcher of secret paths; games can share one.
+      - world_index: a WorldIndex of grid_rooms, shared by every game on that world; built on
+        first use if not given.
+      - connectivity: a Connectivity of grid_rooms, shared the same way; built on first use.
+      - render_cache: a RenderCache of room descriptions, shared by every game on the world.
+      - journal: a path to write the command journal to as the game is played (it is always
+        kept in memory as game.journal; see replay).
+      - metrics: a Metrics to record command latencies and counters in, shared by every game
+        of a server; None leaves the game uninstrumented until 'stats on'.
+      - wandering: if True, monsters roam, hunt and respawn between turns (see wander).
+      - wanderers: the Wanderers of grid_rooms, shared by every game on that world; implies
+        wandering.
+      - history: if True, keep the rooms copy-on-write (see persistent) and the state before
+        each of the last UNDO_LIMIT commands, for 'undo' and checkpoints.
+      - admin: if True, the game also runs ADMIN_COMMANDS (locate, save, stats, profile); only
+        the local console sets it, never a network session.
+      - odds_fights, search_limit: the fights 'odds' simulates and the states a 'path to' or
+        'walk to' search may visit; a server lowers them, since a command holds up every session.
+    """
+
+    # State that snapshot() leaves out: output, caches rebuilt on demand, and open files.
+    TRANSIENT = ("output", "say", "world_index", "connectivity", "save_file", "journal", "render_cache",
+                 "metrics", "profiler", "minimap")
+
+    def __init__(self, seed=None, quiet=False, world_config=None, grid_rooms=None, secret_matcher=DEFAULT_MATCHER,
+                 world_index=None, connectivity=None, journal=None, render_cache=None, metrics=None,
+                 wandering=False, wanderers=None, history=False, admin=False, odds_fights=ODDS_FIGHTS,
+                 search_limit=SEARCH_LIMIT, **world_options):
+        if world_config is None:
+            world_config = WorldConfig(**world_options)
+        elif world_options:
+            raise ValueError(f"pass either world_config or world options, not both ({', '.join(world_options)})")
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.world_config = world_config
+        self.grid_min = world_config.grid_min
+        self.grid_max = world_config.grid_max
+        # Everything besides the seed that decides the world, for replaying the game.
+        self.options = None if grid_rooms is not None else {
+            **world_config.options(), "wandering": wandering, "history": history,
+        }
+        self.metrics = metrics
+        self.profiler = None           # A cProfile.Profile while 'profile on' is in effect.
+        self.admin = admin
+        self.odds_fights = odds_fights
+        self.search_limit = search_limit
+        if grid_rooms is None:
+            grid_rooms = world_config.build(seed, self.rng, metrics)
+        self.grid_rooms = grid_rooms
+        self.connectivity = connectivity
+        self.save_file = None          # The savefile.SaveFile this game was loaded from or last saved to.
+        if world_config.winnable and world_config.chunk_size is None:
+            repair_keys(grid_rooms, self.get_connectivity(), self.rng, world_index)
+        self.special_rooms = world.new_special_rooms()
+        self.player_state = world.new_player_state()
+        self.explored = Explored([self.player_state["position"]])  # Grid rooms the player has been in.
+        self.world_index = world_index
+        self.render_cache = render_cache if render_cache is not None else RenderCache()
+        self.minimap = Minimap(self.render_cache)
+        self.secret_matcher = secret_matcher
+        self.secret_state = 0          # Automaton state of the secret-path matcher.
+        self.pending_flee = None       # Damage of the monster still chasing us, while waiting for 'run'.
+        self.turns = 0
+        self.damage_taken = 0
+        self.kills = 0
+        if wanderers is None and wandering:
+            wanderers = Wanderers(grid_rooms, seed)
+        self.wanderers = wanderers
+        self.wander_token = object()   # This game's player among the wanderers' players.
+        self.history = None            # GameVersions before the commands 'undo' can take back.
+        self.last_version = None       # The GameVersion after the last command, while history is kept.
+        self.checkpoints = {}          # name -> GameVersion
+        if history:
+            self.make_persistent()
+            self.history = deque(maxlen=UNDO_LIMIT)
+        self.journal = CommandJournal(seed, self.options, journal)
+        self.output = []
+        self.say = _discard if quiet else self.output.append
+
+    # -------------------------------
+    # Snapshots
+    # -------------------------------
+    def snapshot(self):
+        """Return a deep copy of the game's state, without its output, caches or journal."""
+        state = {key: value for key, value in self.__dict__.items() if key not in self.TRANSIENT}
+        return copy.deepcopy(state, {id(self.secret_matcher): self.secret_matcher})
+
+    @classmethod
+    def from_snapshot(cls, snapshot, quiet=True):
+        """Return a new game in the state a snapshot() was taken in; the snapshot stays reusable."""
+        game = cls.__new__(cls)
+        game.__dict__.update(copy.deepcopy(snapshot, {id(snapshot["secret_matcher"]): snapshot["secret_matcher"]}))
+        game.world_index = None
+        game.connectivity = None
+        game.save_file = None
+        game.render_cache = RenderCache()
+        game.minimap = Minimap(game.render_cache)
+        game.metrics = None
+        game.profiler = None
+        game.journal = CommandJournal(game.seed, game.options)
+        game.output = []
+        game.say = _discard if quiet else game.output.append
+        return game
+
+    # -------------------------------
+    # Versions and forks
+    # -------------------------------
+    def make_persistent(self):
+        """
+        Play on in copy-on-write rooms over the current ones (see persistent), so taking a version
+        of the game costs O(1). The rooms played in so far are not changed from here on.
+        """
+        if isinstance(self.grid_rooms, PersistentWorld):
+            return
+        if self.wanderers is not None:
+            raise ValueError("wandering monsters change the shared world between commands; "
+                             "versions need a world only commands change")
+        self.grid_rooms = PersistentWorld(self.grid_rooms)
+        self.special_rooms = PersistentWorld(self.special_rooms)
+
+    def version(self):
+        """Return the game's current state as a GameVersion, in O(1); no later command changes it."""
+        self.make_persistent()
+        return GameVersion(self)
+
+    def restore(self, version):
+        """Put the game back in the state of a version() of it (or of one of its forks); O(1)."""
+        self.make_persistent()
+        version.apply(self)
+        self.last_version = version
+        self.drop_caches()
+        if self.save_file is not None:
+            # Rooms changed without being marked dirty: the next save writes the whole world.
+            self.save_file.close()
+            self.save_file = None
+
+    def fork(self, version=None, quiet=True):
+        """
+        Return a new game that carries on from this one's current state (or from version), sharing
+        every room neither of them changes. Commands in one game never affect the other.
+        """
+        if version is None:
+            version = self.version()
+        game = copy.copy(self)
+        game.grid_rooms = PersistentWorld(self.grid_rooms.base)
+        game.special_rooms = PersistentWorld(self.special_rooms.base)
+        version.apply(game)
+        game.last_version = version
+        game.rng = random.Random()
+        game.rng.setstate(self.rng.getstate())
+        if self.history is not None:
+            game.history = self.history.copy()
+        game.checkpoints = dict(self.checkpoints)
+        game.explored = self.explored.copy()
+        game.drop_caches()
+        game.save_file = None
+        game.metrics = None
+        game.profiler = None
+        game.journal = CommandJournal(game.seed, game.options)
+        game.output = []
+        game.say = _discard if quiet else game.output.append
+        return game
+
+    def drop_caches(self):
+        """Forget the world index, connectivity and rendered rooms and maps after rooms changed wholesale."""
+        self.world_index = None
+        self.connectivity = None
+        self.render_cache = RenderCache()
+        self.minimap = Minimap(self.render_cache)
+
+    def remember(self):
+        """After a command: keep the state it started from for 'undo', if it changed anything."""
+        version = GameVersion(self)
+        if not version.same_state(self.last_version):
+            self.history.append(self.last_version)
+            self.last_version = version
+
+    # -------------------------------
+    # State queries
+    # -------------------------------
+    @property
+    def dead(self):
+        return self.player_state["health"] <= 0
+
+    @property
+    def found_treasure(self):
+        return self.player_state["position"] == "secret_treasure_room"
+
+    @property
+    def secret_path_progress(self):
+        """How many moves of a secret path the player has made so far."""
+        return self.secret_matcher.depth[self.secret_state]
+
+    def get_current_room(self):
+        """Return the current room object from grid_rooms or special_rooms."""
+        pos = self.player_state["position"]
+        if isinstance(pos, tuple):
+            return self.grid_rooms.get(pos)
+        else:
+            return self.special_rooms.get(pos)
+
+    def edit_room(self, pos):
+        """Return the room at pos for a command to change: a private copy once versions share it."""
+        rooms = self.grid_rooms if isinstance(pos, tuple) else self.special_rooms
+        edit = getattr(rooms, "edit", None)
+        return rooms.get(pos) if edit is None else edit(pos)
+
+    def room_changed(self, pos):
+        """
+        Called after a command changes the room at pos, so lazily stored worlds keep the change
+        and its cached description is rendered again.
+        """
+        if isinstance(pos, tuple):
+            self.render_cache.bump(pos)
+            mark_dirty = getattr(self.grid_rooms, "mark_dirty", None)
+            if mark_dirty is not None:
+                mark_dirty(pos)
+            if self.save_file is not None:
+                self.save_file.dirty.add(pos)
+
+    def explore(self, pos):
+        """Called when the player enters the grid room at pos, to add it to their map."""
+        if self.explored.add(pos):
+            self.minimap.changed(pos)
+
+    @property
+    def prompt(self):
+        """The prompt to show before reading the next command."""
+        # An unarmed fight leaves the monster chasing us until we answer 'run'.
+        return RUN_PROMPT if self.pending_flee is not None else PROMPT
+
+    def get_world_index(self):
+        """Return the world's item and monster index, building it with one scan the first time."""
+        if self.world_index is None:
+            self.world_index = WorldIndex.build(self.grid_rooms)
+        return self.world_index
+
+    def get_connectivity(self):
+        """Return the world's Connectivity, building it with one scan the first time (None for chunked worlds)."""
+        if self.connectivity is None and not isinstance(getattr(self.grid_rooms, "base", self.grid_rooms),
+                                                        ChunkedWorld):
+            self.connectivity = Connectivity.build(self.grid_rooms)
+        return self.connectivity
+
+    def take_output(self):
+        """Return the text produced since the last call and clear it."""
+        lines = self.output[:]
+        self.output.clear()
+        return lines
+
+    # -------------------------------
+    # Command dispatch
+    # -------------------------------
+    def execute(self, command):
+        """
+        Run one typed command and return its event.
+        While a monster is chasing the player, the command is the answer to the 'run' prompt.
+        Otherwise aliases are expanded and the command is looked up in COMMAND_TRIE. Admin
+        commands act on the host rather than the game: they take no turn, let no monster move
+        and are not journaled, so a journal replays the same without them.
+        """
+        command = command.strip().lower()
+        match = match_command(command) if self.pending_flee is None else None
+        if match is not None and match[0][2] and not self.admin:
+            match = None  # Network sessions are not told which admin commands exist.
+        if match is not None and match[0][2]:
+            (handler, takes_argument, _), name, argument = match
+            args = (self, argument) if takes_argument else (self,)
+            if self.metrics is None and self.profiler is None:
+                return handler(*args)
+            return self.run_instrumented(name, handler, args)
+        self.turns += 1
+        self.journal.record(command)
+        if self.history is not None and self.last_version is None:
+            self.last_version = self.version()
+        if self.pending_flee is not None:
+            if self.metrics is None and self.profiler is None:
+                event = self.respond_to_flee(command)
+            else:
+                event = self.run_instrumented("run", Game.respond_to_flee, (self, command))
+            if self.wanderers is not None:
+                self.wander()
+            if self.history is not None:
+                self.remember()
+            return event
+        if match is None:
+            if self.metrics is not None:
+                self.metrics.count("unknown_commands")
+            self.say("I don't understand that command.")
+            event = "unknown"
+        else:
+            (handler, takes_argument, _), name, argument = match
+            if self.metrics is None and self.profiler is None:
+                event = handler(self, argument) if takes_argument else handler(self)
+            else:
+                event = self.run_instrumented(name, handler, (self, argument) if takes_argument else (self,))
+        if self.wanderers is not None:
+            self.wander()
+        if self.history is not None:
+            self.remember()
+        return event
+
+    def run_instrumented(self, name, handler, args):
+        """Run a command handler under the session's profiler and record its latency as command name."""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            event = handler(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+        # Checked afterwards: 'stats on' and 'stats off' change it.
+        if self.metrics is not None:
+            self.metrics.command(name, elapsed)
+        return event
+
+    def wander(self):
+        """Advance the world's wandering monsters one turn and tell the player what came or went."""
+        pos = self.player_state["position"]
+        for name, source, target, hunting in self.wanderers.tick(self):
+            if target == pos:
+                self.say(f"A {name} {'stalks in after you' if hunting else 'wanders in'}!")
+            elif source == pos:
+                self.say(f"The {name} wanders off.")
+
+    def quit(self):
+        """Say goodbye; the caller ends the session on the 'quit' event."""
+        self.say("Goodbye, brave crawler.")
+        return "quit"
+
+    # ===============================
+    # GAME ENGINE FUNCTIONS (GRID-BASED)
+    # ===============================
+    def describe_current_room(self):
+        """Display the current room's description, items, monsters, and available exits."""
+        room = self.get_current_room()
+        if room is None:
+            self.say("There's nothing here.")
+            return "nothing"
+        if self.say is _discard:
+            return "look"
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+        # If the room is dark and the player has no torch, nothing is visible.
+        visible = not room["dark"] or "torch" in self.player_state["inventory"]
+        pos = self.player_state["position"]
+        if isinstance(pos, tuple):
+            self.say(self.render_cache.describe(pos, room, visible))
+        else:
+            # Special rooms belong to one game and their exits change, so they are not cached.
+            self.say(render_room(room, visible))
+        if metrics is not None:
+            metrics.observe("render", time.perf_counter() - started)
+        return "look"
+
+    def move(self, direction):
+        """
+        Move the player in the specified direction.
+          - If in a grid room, compute the new coordinate and check for boundaries.
+          - Before moving, if the destination room is locked, check if the player has a silver key.
+              * If yes, consume the key and unlock the room.
+              * If not, inform the player that the door is locked.
+          - Integrate secret path logic: advance the secret-path matcher; once a path's trigger moves
+            are complete, transition to its reward room (the Final Boss Room for the castle's path),
+            spending a silver key per locked move of the path. Short of keys, the door stays shut
+            and the move goes ahead as usual.
+          - In special rooms, use fixed exit mapping.
+          - Process torch burnout upon entering a new room.
+        """
+        player_state = self.player_state
+
+        # Special room processing.
+        if not isinstance(player_state["position"], tuple):
+            room = self.special_rooms.get(player_state["position"])
+            if room and direction in room.get("exits", {}):
+                player_state["position"] = room["exits"][direction]
+                self.describe_current_room()
+                return "moved"
+            self.say("You can't go that way.")
+            return "blocked"
+
+        # Grid room processing.
+        current_coord = player_state["position"]
+        room = self.grid_rooms.get(current_coord)
+        if room is None:
+            self.say("You are in an empty void!")
+            return "void"
+
+        # Secret Path Logic.
+        self.secret_state = self.secret_matcher.step(self.secret_state, direction)
+        path = self.secret_matcher.matched(self.secret_state)
+
+        # If a secret path is complete, transition to its reward room.
+        if path is not None and path.keys > player_state["inventory"].count("silver key"):
+            self.say(f"A heavy door rattles in the wall, but it has {path.keys} locks and you lack the keys.")
+            self.secret_state = 0
+            path = None
+        if path is not None:
+            if path.keys:
+                player_state["inventory"].discard("silver key", path.keys)
+                if self.metrics is not None:
+                    self.metrics.count("keys_consumed", path.keys)
+            player_state["last_room"] = current_coord
+            self.say("A heavy door creaks open, revealing a foreboding chamber...")
+            self.edit_room(path.reward_room)["exits"] = {"back": current_coord, **path.reward_exits}
+            player_state["position"] = path.reward_room
+            self.secret_state = 0
+            self.describe_current_room()
+            return "secret_path"
+
+        # Compute new coordinate.
+        dx, dy = get_offset(direction)
+        new_coord = (current_coord[0] + dx, current_coord[1] + dy)
+        if not (self.grid_min <= new_coord[0] <= self.grid_max and self.grid_min <= new_coord[1] <= self.grid_max):
+            self.say("You can't go that way; the castle's walls block your path!")
+            return "wall"
+        return self.enter(new_coord)
+
+    def enter(self, new_coord):
+        """
+        The second half of a grid move(), once the player heads for new_coord: unlock the room with a
+        silver key if needed, step in and burn out an active torch. (Sharded worlds hand the player
+        to the shard owning new_coord here; see shards.)
+        """
+        player_state = self.player_state
+        dest_room = self.grid_rooms.get(new_coord)
+        if dest_room is not None:
+            # Check if destination room is locked.
+            if dest_room.get("locked", False):
+                if "silver key" in player_state["inventory"]:
+                    player_state["inventory"].remove("silver key")
+                    self.edit_room(new_coord)["locked"] = False
+                    self.room_changed(new_coord)
+                    if self.connectivity is not None:
+                        self.connectivity.unlocked(new_coord)
+                    if self.metrics is not None:
+                        self.metrics.count("keys_consumed")
+                    self.say("You unlock the door with a silver key.")
+                else:
+                    self.say("The door is locked! You need a silver key to enter.")
+                    return "locked"
+            player_state["position"] = new_coord
+            self.explore(new_coord)
+            self.describe_current_room()
+            event = "moved"
+        else:
+            self.say("You can't go that way.")
+            event = "blocked"
+
+        # Torch burnout: if a torch was active, it burns out when entering a new room.
+        if player_state["torch_active"]:
+            self.say("Your torch burns out as you enter the new room.")
+            if "torch" in player_state["inventory"]:
+                player_state["inventory"].remove("torch")
+            player_state["torch_active"] = False
+        return event
+
+    # ===============================
+    # INVENTORY, EQUIPMENT & COMBAT FUNCTIONS
+    # ===============================
+    def take(self, item_name):
+        """Pick up a specific item from the current room."""
+        room = self.get_current_room()
+        if room and item_name in room.get("items", []):
+            pos = self.player_state["position"]
+            room = self.edit_room(pos)
+            self.player_state["inventory"].append(item_name)
+            room["items"].remove(item_name)
+            self.room_changed(pos)
+            if self.world_index is not None and isinstance(pos, tuple):
+                self.world_index.item_removed(pos, item_name, room)
+            self.say(f"You took the {item_name}.")
+            return "took"
+        self.say(f"There is no {item_name} here.")
+        return "missing"
+
+    def take_all(self):
+        """Pick up all items in the current room."""
+        room = self.get_current_room()
+        if room and room.get("items"):
+            pos = self.player_state["position"]
+            room_items = self.edit_room(pos)["items"]
+            names = distinct(room_items)
+            # Bag to bag, this moves one count per distinct item rather than one item at a time.
+            self.player_state["inventory"].extend(room_items)
+            room_items.clear()
+            self.room_changed(pos)
+            if self.world_index is not None and isinstance(pos, tuple):
+                self.world_index.items_cleared(pos, names)
+            self.say("You took all the items in the room.")
+            return "took"
+        self.say("There are no items to take.")
+        return "missing"
+
+    def drop(self, item_name):
+        """
+        Drop a specified item from your inventory into the current room.
+        The item is removed from inventory and added to the room's items list.
+        """
+        if item_name in self.player_state["inventory"]:
+            self.player_state["inventory"].remove(item_name)
+            pos = self.player_state["position"]
+            room = self.edit_room(pos)
+            if room is not None:
+                room.setdefault("items", []).append(item_name)
+                self.room_changed(pos)
+                if self.world_index is not None and isinstance(pos, tuple):
+                    self.world_index.item_added(pos, item_name)
+            self.say(f"You dropped the {item_name}.")
+            return "dropped"
+        self.say(f"You don't have {item_name} in your inventory.")
+        return "missing"
+
+    def drop_all(self):
+        """Drop everything in your inventory into the current room."""
+        inventory = self.player_state["inventory"]
+        if not inventory:
+            self.say("You have nothing to drop.")
+            return "missing"
+        pos = self.player_state["position"]
+        room = self.edit_room(pos)
+        if room is not None:
+            names = distinct(inventory)
+            room.setdefault("items", []).extend(inventory)
+            self.room_changed(pos)
+            if self.world_index is not None and isinstance(pos, tuple):
+                for item_name in names:
+                    self.world_index.item_added(pos, item_name)
+        inventory.clear()
+        self.say("You dropped everything you were carrying.")
+        return "dropped"
+
+    def show_inventory(self):
+        """Display the items in your inventory, stacking duplicates ("health potion x12")."""
+        inventory = self.player_state["inventory"]
+        if inventory:
+            self.say("You have:")
+            for item, count in inventory.stacks():
+                self.say(f"- {item} x{count}" if count > 1 else f"- {item}")
+        else:
+            self.say("Your inventory is empty.")
+        return "inventory"
+
+    def equip(self, item_name):
+        """
+        Equip an item from your inventory into the slot its content metadata names, taking the
+        slot's first free equipment key. In the castle's pack:
+          - One each: helmet, armor (or enchanted armor), shield, boots, gloves.
+          - Two weapon slots for a sword or legendary sword.
+        """
+        inventory = self.player_state["inventory"]
+        equipment = self.player_state["equipment"]
+        if item_name not in inventory:
+            self.say(f"You don't have a {item_name} to equip.")
+            return "missing"
+        slot = ITEM_SLOTS.get(item_name)
+        if slot is None:
+            self.say(f"The {item_name} cannot be equipped.")
+            return "unequippable"
+        for key, message in zip(slot.fills, slot.equip):
+            if equipment[key] is None:
+                equipment[key] = item_name
+                inventory.remove(item_name)
+                self.say(message)
+                return "equipped"
+        self.say(slot.full)
+        return "slot_full"
+
+    def show_equipment(self):
+        """Display your currently equipped items."""
+        self.say("Equipped Items:")
+        for slot, item in self.player_state["equipment"].items():
+            self.say(f"{slot.capitalize()}: {item if item is not None else 'Empty'}")
+        return "equipment"
+
+    def use(self, item_name):
+        """
+        Use a consumable item:
+          - Health potion: increases health by 25 (capped at 100).
+          - Torch: lights the current room and marks the torch as active (so it burns out on the next move).
+        """
+        player_state = self.player_state
+        if item_name not in player_state["inventory"]:
+            self.say(f"You don't have a {item_name}.")
+            return "missing"
+        if item_name == "health potion":
+            new_health = min(100, player_state["health"] + 25)
+            player_state["health"] = new_health
+            self.say(f"You used a health potion. Your health is now: {new_health}")
+            player_state["inventory"].remove("health potion")
+            return "healed"
+        elif item_name == "torch":
+            pos = player_state["position"]
+            room = self.edit_room(pos)
+            if room is not None:
+                room["dark"] = False
+                self.room_changed(pos)
+            self.say("You light the torch. The room is now illuminated.")
+            player_state["torch_active"] = True
+            return "lit"
+        self.say(f"You cannot 'use' the {item_name} directly.")
+        return "unusable"
+
+    def monster_damage(self, monster_name):
+        """Damage the monster deals to the player after armor, given current secret-path progress."""
+        armor = armor_count(self.player_state["equipment"])
+        return DAMAGE_TABLE.damage(monster_name, armor, self.secret_path_progress)
+
+    def hurt(self, damage):
+        """Apply damage to the player and report the new health."""
+        health = self.player_state["health"]
+        self.player_state["health"] = health - damage
+        self.damage_taken += damage
+        if self.metrics is not None and health > 0 >= health - damage:
+            self.metrics.count("deaths")
+        self.say(f"Your health is now: {self.player_state['health']}")
+
+    def attack(self, monster_name):
+        """
+        Attack a monster in the current room.
+        New randomness:
+          - ~25% chance the monster attacks first.
+          - ~25% chance your attack misses, leaving you vulnerable to a counterattack.
+        If armed (with a sword or legendary sword), your attack normally defeats the monster.
+        If unarmed, the monster deals damage reduced by 15% per equipped item (capped at 75%),
+        and the player must answer 'run' to flee (see respond_to_flee).
+        """
+        room = self.get_current_room()
+        if room is None or monster_name not in room.get("monsters", []):
+            self.say(f"There is no {monster_name} here.")
+            return "missing"
+
+        monster_first_roll = self.rng.random()  # 25% chance for monster to strike first.
+        miss_roll = self.rng.random()             # 25% chance for your attack to miss.
+
+        inflicted_damage = self.monster_damage(monster_name)
+        armed = is_armed(self.player_state["equipment"])
+
+        if monster_first_roll < 0.25:
+            self.say("The monster strikes before you can act!")
+            self.say(f"The {monster_name} deals {inflicted_damage} damage to you!")
+            self.hurt(inflicted_damage)
+            if self.dead:
+                self.say("You have been slain by the monster's preemptive strike!")
+                return "slain"
+
+        if miss_roll < 0.25:
+            self.say("You swing your weapon, but miss the monster entirely!")
+            self.say(f"Your miss leaves you vulnerable! The {monster_name} counterattacks, "
+                     f"dealing {inflicted_damage} damage!")
+            self.hurt(inflicted_damage)
+            return "missed"
+
+        pos = self.player_state["position"]
+        room = self.edit_room(pos)
+        room["monsters"].remove(monster_name)
+        self.room_changed(pos)
+        if self.world_index is not None and isinstance(pos, tuple):
+            self.world_index.monster_removed(pos, monster_name, room)
+        if self.wanderers is not None and isinstance(pos, tuple):
+            self.wanderers.killed(pos, monster_name)
+        self.kills += 1
+        if self.metrics is not None:
+            self.metrics.count("kills")
+        if armed:
+            self.say(f"You attack the {monster_name} with your weapon and defeat it!")
+            return "killed"
+        self.say(f"You are unarmed! The {monster_name} attacks, dealing {inflicted_damage} damage!")
+        self.hurt(inflicted_damage)
+        self.pending_flee = inflicted_damage
+        return "flee"
+
+    def respond_to_flee(self, response):
+        """Answer the 'run' prompt left open by an unarmed attack."""
+        if response != "run":
+            self.say("You hesitate! The monster strikes again!")
+            self.hurt(self.pending_flee)
+            return "hesitated"
+        self.pending_flee = None
+        room = self.get_current_room()
+        if room.get("exits"):
+            pos = self.player_state["position"] = self.rng.choice(list(room["exits"].values()))
+            if isinstance(pos, tuple):
+                self.explore(pos)
+            self.describe_current_room()
+            return "fled"
+        self.say("There is nowhere to run!")
+        return "cornered"
+
+    def odds(self, monster_name):
+        """Estimate the chances of fighting monster_name to the finish with the current loadout."""
+        player_state = self.player_state
+        odds = fight_odds(monster_name, player_state["equipment"], health=player_state["health"],
+                          progress=self.secret_path_progress, fights=self.odds_fights,
+                          seed=self.rng.getrandbits(64))
+        self.say(f"Against a {monster_name} ({odds['damage_per_hit']} damage per hit, "
+                 f"{'armed' if odds['armed'] else 'unarmed'}):")
+        self.say(f"  win {odds['win']:.1%}, death {odds['death']:.1%}, "
+                 f"expected damage {odds['expected_damage']:.1f} over {odds['expected_rounds']:.2f} rounds")
+        return "odds"
+
+    def locate(self, name):
+        """Admin command: report the nearest room holding an item or monster, using the world index."""
+        pos = self.player_state["position"]
+        origin = pos if isinstance(pos, tuple) else (self.player_state["last_room"] or (0, 0))
+        index = self.get_world_index()
+        hit = index.nearest(name, origin)
+        if hit is None:
+            self.say(f"There is no {name} anywhere in the castle.")
+            return "missing"
+        kind, coord, distance = hit
+        self.say(f"The nearest {name} is at {coord}, {distance} rooms away "
+                 f"({index.count(name)} rooms hold one).")
+        return "located"
+
+    def route_to(self, target):
+        """Return (goal, directions) for a 'path to'/'walk to' target, saying why when there is no route."""
+        try:
+            x, y = (int(part) for part in target.strip("() ").replace(",", " ").split())
+        except ValueError:
+            self.say("Name a room by its coordinates, e.g. 'path to 2,-3'.")
+            return None, None
+        pos = self.player_state["position"]
+        if not isinstance(pos, tuple):
+            self.say("No map of the castle reaches this place.")
+            return (x, y), None
+        keys = self.player_state["inventory"].count("silver key")
+        path = find_path(self.grid_rooms, pos, (x, y), keys, self.grid_min, self.grid_max, self.get_connectivity(),
+                         self.search_limit)
+        if path is None:
+            self.say(f"There is no way to reach {(x, y)} from here.")
+        return (x, y), path
+
+    def path_to(self, target):
+        """Show the shortest route to a grid room."""
+        goal, path = self.route_to(target)
+        if path is None:
+            return "unknown" if goal is None else "unreachable"
+        if not path:
+            self.say("You are already there.")
+        else:
+            self.say(f"Route to {goal} ({len(path)} moves): {', '.join(path)}")
+        return "path"
+
+    def walk_to(self, target):
+        """Walk the shortest route to a grid room, one move at a time, stopping at the first surprise."""
+        goal, path = self.route_to(target)
+        if path is None:
+            return "unknown" if goal is None else "unreachable"
+        for direction in path:
+            event = self.move(direction)
+            if event != "moved":
+                return event
+        return "walked"
+
+    def show_map(self, radius=str(DEFAULT_RADIUS)):
+        """Show the explored rooms within radius of the player, with exits, locked doors and dark rooms."""
+        try:
+            radius = int(radius)
+        except ValueError:
+            radius = -1
+        if not 0 <= radius <= MAX_RADIUS:
+            self.say(f"Give the map a radius from 0 to {MAX_RADIUS}, e.g. 'map 8'.")
+            return "unknown"
+        pos = self.player_state["position"]
+        if not isinstance(pos, tuple):
+            self.say("No map of the castle reaches this place.")
+            return "map"
+        self.explore(pos)  # A loaded game starts where it was saved.
+        lines = self.minimap.render(self.grid_rooms, self.explored, pos, radius,
+                                    "torch" in self.player_state["inventory"])
+        while not lines[0]:
+            lines.pop(0)
+        while not lines[-1]:
+            lines.pop()
+        self.say("\n".join(lines + [LEGEND]))
+        return "map"
+
+    def save(self, path):
+        """Save the game to path (see savefile); later saves to the same path append to its journal."""
+        from .savefile import save_game
+        try:
+            size = save_game(self, path)
+        except (OSError, ValueError) as error:
+            self.say(f"Could not save the game: {error}")
+            return "unsaved"
+        self.say(f"Game saved to {path} ({size} bytes written).")
+        return "saved"
+
+    # -------------------------------
+    # Undo and checkpoints
+    # -------------------------------
+    def undo(self, count="1"):
+        """Take back the last count commands that changed the game (turns keep counting)."""
+        if self.history is None:
+            self.say("Undo is off; start the game with --undo to use it.")
+            return "unavailable"
+        try:
+            count = int(count)
+        except ValueError:
+            count = 0
+        if count < 1:
+            self.say("Say how many commands to take back, e.g. 'undo 3'.")
+            return "unknown"
+        history = self.history
+        if not history:
+            self.say("There is nothing to undo.")
+            return "nothing"
+        count = min(count, len(history))
+        for _ in range(count - 1):
+            history.pop()
+        self.restore(history.pop())
+        self.say(f"Undid {count} command{'s' if count > 1 else ''}.")
+        self.describe_current_room()
+        return "undone"
+
+    def checkpoint(self, name):
+        """Remember the current state under a name, for 'restore <name>'."""
+        if self.history is None:
+            self.say("Checkpoints are off; start the game with --undo to use them.")
+            return "unavailable"
+        self.checkpoints[name] = self.version()
+        self.say(f"Checkpoint '{name}' saved.")
+        return "checkpoint"
+
+    def restore_checkpoint(self, name):
+        """Go back to a named checkpoint; 'undo' takes the restore back."""
+        version = self.checkpoints.get(name)
+        if version is None:
+            self.say(f"There is no checkpoint named '{name}'.")
+            return "missing"
+        self.history.append(self.last_version)
+        self.restore(version)
+        self.say(f"Restored checkpoint '{name}'.")
+        self.describe_current_room()
+        return "restored"
+
+    def show_checkpoints(self):
+        """List the named checkpoints."""
+        if self.checkpoints:
+            self.say(f"Checkpoints: {', '.join(self.checkpoints)}")
+        else:
+            self.say("You have no checkpoints.")
+        return "checkpoints"
+
+    # -------------------------------
+    # Instrumentation (admin)
+    # -------------------------------
+    def show_stats(self):
+        """Admin command: report the command latencies and counters being recorded."""
+        if self.metrics is None:
+            self.say("Stats are off; 'stats on' starts recording them for this session.")
+            return "stats"
+        for line in self.metrics.summary():
+            self.say(line)
+        return "stats"
+
+    def stats_on(self):
+        """Admin command: start recording stats for this session (if it isn't sharing a server's)."""
+        if self.metrics is None:
+            self.metrics = Metrics()
+        self.say("Recording stats.")
+        return "stats"
+
+    def stats_off(self):
+        """Admin command: stop recording stats for this session."""
+        self.metrics = None
+        self.say("Stats are off.")
+        return "stats"
+
+    def save_stats(self, path):
+        """Admin command: write the recorded stats to a JSON file."""
+        if self.metrics is None:
+            self.say("Stats are off; there is nothing to save.")
+            return "stats"
+        try:
+            self.metrics.dump_json(path)
+        except OSError as error:
+            self.say(f"Could not save the stats: {error}")
+            return "unsaved"
+        self.say(f"Stats saved to {path}.")
+        return "saved"
+
+    def profile_on(self):
+        """Admin command: profile every command this session runs until 'profile off'."""
+        import cProfile
+
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+        self.say("Profiling this session's commands.")
+        return "profile"
+
+    def profile_off(self):
+        """Admin command: stop profiling and show the functions that took the most time."""
+        profiler, self.profiler = self.profiler, None
+        if profiler is None:
+            self.say("The profiler is not running.")
+            return "profile"
+        profiler.disable()
+        import io
+        import pstats
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        self.say(report.getvalue().rstrip())
+        return "profile"
+
+    def show_help(self):
+        """Display a list of available commands."""
+        self.say(HELP_TEXT)
+        return "help"
+
+
+# ===============================
+# COMMAND TABLE
+# ===============================
+# (words, Game method, takes an argument). A command runs the entry matching the most of its
+# leading words: entries that take an argument are given the remaining words, the others only
+# match when no words are left over. The same words can have one entry of each kind.
+COMMANDS = [
+    ("quit", Game.quit, False),
+    ("go", Game.move, True),
+    ("look", Game.describe_current_room, False),
+    ("take all", Game.take_all, False),
+    ("take", Game.take, True),
+    ("drop all", Game.drop_all, False),
+    ("drop", Game.drop, True),
+    ("inventory", Game.show_inventory, False),
+    ("equip", Game.equip, True),
+    ("equipment", Game.show_equipment, False),
+    ("use", Game.use, True),
+    ("attack", Game.attack, True),
+    ("odds", Game.odds, True),
+    ("map", Game.show_map, False),
+    ("map", Game.show_map, True),
+    ("path to", Game.path_to, True),
+    ("walk to", Game.walk_to, True),
+    ("undo", Game.undo, False),
+    ("undo", Game.undo, True),
+    ("checkpoint", Game.checkpoint, True),
+    ("restore", Game.restore_checkpoint, True),
+    ("checkpoints", Game.show_checkpoints, False),
+    ("help", Game.show_help, False),
+]
+
+# Commands only a Game(admin=True) runs: they reveal the whole world, touch files on the host or
+# the server's own instrumentation. Other games treat them as unknown commands.
+ADMIN_COMMANDS = [
+    ("locate", Game.locate, True),
+    ("save", Game.save, True),
+    ("stats", Game.show_stats, False),
+    ("stats on", Game.stats_on, False),
+    ("stats off", Game.stats_off, False),
+    ("stats save", Game.save_stats, True),
+    ("profile on", Game.profile_on, False),
+    ("profile off", Game.profile_off, False),
+]
+
+# Whole commands that stand for longer ones.
+ALIASES = {
+    "n": "go north", "s": "go south", "e": "go east", "w": "go west",
+    "north": "go north", "south": "go south", "east": "go east", "west": "go west",
+    "i": "inventory", "inv": "inventory", "x": "look", "l": "look", "q": "quit",
+}
+
+
+def build_command_trie(commands, admin_commands=()):
+    """
+    Return a word trie of commands. Each entry (handler, takes an argument, admin only) sits in its
+    last word's node, under the key "" if it takes an argument (no word is empty) and None if not.
+    """
+    trie = {}
+    for admin, table in ((False, commands), (True, admin_commands)):
+        for words, handler, takes_argument in table:
+            node = trie
+            for word in words.split():
+                node = node.setdefault(word, {})
+            node["" if takes_argument else None] = (handler, takes_argument, admin)
+    return trie
+
+
+COMMAND_TRIE = build_command_trie(COMMANDS, ADMIN_COMMANDS)
+
+
+def match_command(command):
+    """
+    Return (entry, command name, argument) for the longest command in COMMAND_TRIE that a
+    typed line (aliases expanded) starts with, or None.
+    """
+    words = ALIASES.get(command, command).split()
+    node = COMMAND_TRIE
+    match = None
+    for depth, word in enumerate(words, 1):
+        node = node.get(word)
+        if node is None:
+            break
+        entry = node.get("" if depth < len(words) else None)
+        if entry is not None:
+            match = entry, depth
+    if match is None:
+        return None
+    entry, depth = match
+    return entry, " ".join(words[:depth]), " ".join(words[depth:])
@@ -0,0 +1,160 @@
+"""
+Inverted index of where items and monsters are in the world.
+
+For every item (or monster) name the index keeps the set of grid coordinates holding at least
+one, bucketed by a coarse spatial hash so that "nearest X" only looks at buckets around the
+player instead of at every room. The index is built by one full scan and then kept up to date
+by the commands that move things around (take, drop, kills, key distribution) and by
+wandering monsters.
+"""
+
+BUCKET_SIZE = 16
+SCAN_LIMIT = 64  # Below this many locations a plain scan beats the ring search.
+
+
+class SpatialIndex:
+    """name -> coordinates holding it, with a per-name spatial hash for nearest queries."""
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.where = {}    # name -> set of coords
+        self.buckets = {}  # name -> {(bx, by): set of coords}
+
+    def bucket_of(self, coord):
+        return (coord[0] // self.bucket_size, coord[1] // self.bucket_size)
+
+    def add(self, name, coord):
+        coords = self.where.setdefault(name, set())
+        if coord in coords:
+            return
+        coords.add(coord)
+        self.buckets.setdefault(name, {}).setdefault(self.bucket_of(coord), set()).add(coord)
+
+    def discard(self, name, coord):
+        coords = self.where.get(name)
+        if not coords or coord not in coords:
+            return
+        coords.discard(coord)
+        buckets = self.buckets[name]
+        key = self.bucket_of(coord)
+        bucket = buckets[key]
+        bucket.discard(coord)
+        if not bucket:
+            del buckets[key]
+        if not coords:
+            del self.where[name]
+            del self.buckets[name]
+
+    def locate(self, name):
+        """Return the set of coordinates holding name (do not modify it)."""
+        return self.where.get(name, set())
+
+    def count(self, name):
+        return len(self.where.get(name, ()))
+
+    def nearest(self, name, origin):
+        """Return (coord, distance) of the closest location of name by Manhattan distance, or None."""
+        coords = self.where.get(name)
+        if not coords:
+            return None
+        ox, oy = origin
+        if len(coords) <= SCAN_LIMIT:
+            best = min(coords, key=lambda c: (abs(c[0] - ox) + abs(c[1] - oy), c))
+            return best, abs(best[0] - ox) + abs(best[1] - oy)
+
+        # Search square rings of buckets around the player's bucket. After ring r, anything not
+        # yet seen is more than r * bucket_size moves away, so stop once the best beats that.
+        buckets = self.buckets[name]
+        bx, by = self.bucket_of(origin)
+        best, best_distance = None, None
+        ring = 0
+        while True:
+            for key in _ring(bx, by, ring):
+                bucket = buckets.get(key)
+                if bucket is None:
+                    continue
+                for coord in bucket:
+                    distance = abs(coord[0] - ox) + abs(coord[1] - oy)
+                    if best is None or (distance, coord) < (best_distance, best):
+                        best, best_distance = coord, distance
+            if best is not None and best_distance <= ring * self.bucket_size:
+                return best, best_distance
+            ring += 1
+
+
+def _ring(cx, cy, r):
+    """Yield the bucket keys at Chebyshev distance exactly r from (cx, cy)."""
+    if r == 0:
+        yield (cx, cy)
+        return
+    for x in range(cx - r, cx + r + 1):
+        yield (x, cy - r)
+        yield (x, cy + r)
+    for y in range(cy - r + 1, cy + r):
+        yield (cx - r, y)
+        yield (cx + r, y)
+
+
+class WorldIndex:
+    """Item and monster indexes for one world; share one instance between games on that world."""
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.items = SpatialIndex(bucket_size)
+        self.monsters = SpatialIndex(bucket_size)
+
+    @classmethod
+    def build(cls, grid_rooms, bucket_size=BUCKET_SIZE):
+        """Index every room of a world with one full scan."""
+        index = cls(bucket_size)
+        iter_contents = getattr(grid_rooms, "iter_contents", None)
+        if iter_contents is not None:
+            contents = iter_contents()
+        else:
+            contents = ((coord, room["items"], room["monsters"]) for coord, room in grid_rooms.items())
+        add_item, add_monster = index.items.add, index.monsters.add
+        for coord, items, monsters in contents:
+            for item in items:
+                add_item(item, coord)
+            for monster in monsters:
+                add_monster(monster, coord)
+        return index
+
+    # -------------------------------
+    # Updates from the commands
+    # -------------------------------
+    def item_added(self, coord, item_name):
+        self.items.add(item_name, coord)
+
+    def item_removed(self, coord, item_name, room):
+        """Forget item_name at coord unless the room still holds another one."""
+        if item_name not in room["items"]:
+            self.items.discard(item_name, coord)
+
+    def items_cleared(self, coord, item_names):
+        for item_name in item_names:
+            self.items.discard(item_name, coord)
+
+    def monster_added(self, coord, monster_name):
+        self.monsters.add(monster_name, coord)
+
+    def monster_removed(self, coord, monster_name, room):
+        if monster_name not in room["monsters"]:
+            self.monsters.discard(monster_name, coord)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def nearest(self, name, origin):
+        """Return (kind, coord, distance) for the nearest item or monster called name, or None."""
+        found = []
+        for kind, index in (("item", self.items), ("monster", self.monsters)):
+            hit = index.nearest(name, origin)
+            if hit is not None:
+                found.append((hit[1], kind, hit[0]))
+        if not found:
+            return None
+        distance, kind, coord = min(found)
+        return kind, coord, distance
+
+    def count(self, name):
+        return self.items.count(name) + self.monsters.count(name)
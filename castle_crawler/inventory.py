@@ -0,0 +1,158 @@
+"""
+Item registry and counted item bags.
+
+Items are interned to small integer ids by an ItemRegistry, which compact encodings (room
+bitmasks, saved worlds) use. An ItemBag is a multiset of items (name -> count) used for both
+the player's inventory and room item lists: membership, counts, adding and removing one item
+are O(1), and moving everything from one bag to another costs one step per distinct item
+rather than per item. ItemBag keeps the list methods the commands already use (in, append,
+remove, extend, clear, iteration) so it can stand in for a list.
+"""
+
+
+class ItemRegistry:
+    """Two-way mapping between item names and small integer ids."""
+
+    def __init__(self, names=()):
+        self.ids = {}
+        self.names = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        """Return the id of name, registering it if it is new."""
+        item_id = self.ids.get(name)
+        if item_id is None:
+            item_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return item_id
+
+    def id_of(self, name):
+        """Return the id of name, or None if it was never registered."""
+        return self.ids.get(name)
+
+    def name_of(self, item_id):
+        return self.names[item_id]
+
+
+# The shared registry; world.py registers the castle's items first so their ids are stable.
+ITEMS = ItemRegistry()
+
+
+class ItemBag:
+    """A multiset of items, iterated one item at a time, grouped by name in order of arrival."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, items=()):
+        self.counts = {}  # item name -> count (> 0)
+        self.total = 0
+        self.update(items)
+
+    # -------------------------------
+    # Multiset operations
+    # -------------------------------
+    def add(self, name, count=1):
+        self.counts[name] = self.counts.get(name, 0) + count
+        self.total += count
+
+    def discard(self, name, count=1):
+        """Remove up to count of name and return how many were removed."""
+        held = self.counts.get(name, 0)
+        if not held:
+            return 0
+        removed = min(held, count)
+        if removed == held:
+            del self.counts[name]
+        else:
+            self.counts[name] = held - removed
+        self.total -= removed
+        return removed
+
+    def count(self, name):
+        return self.counts.get(name, 0)
+
+    def update(self, items):
+        """Add every item from an iterable, or merge another bag count by count."""
+        if isinstance(items, ItemBag):
+            counts = self.counts
+            for name, count in items.counts.items():
+                counts[name] = counts.get(name, 0) + count
+            self.total += items.total
+        else:
+            for name in items:
+                self.add(name)
+
+    def stacks(self):
+        """Return [(name, count), ...] in order of arrival."""
+        return list(self.counts.items())
+
+    def names(self):
+        """Return the distinct item names held."""
+        return list(self.counts)
+
+    def id_counts(self, registry=None):
+        """Return {item id: count}, registering any item the registry has not seen yet."""
+        intern = (registry or ITEMS).intern
+        return {intern(name): count for name, count in self.counts.items()}
+
+    def copy(self):
+        bag = ItemBag()
+        bag.counts = dict(self.counts)
+        bag.total = self.total
+        return bag
+
+    # -------------------------------
+    # List compatibility
+    # -------------------------------
+    def append(self, name):
+        self.add(name)
+
+    extend = update
+
+    def remove(self, name):
+        if not self.discard(name):
+            raise ValueError(f"{name!r} is not in the bag")
+
+    def clear(self):
+        self.counts.clear()
+        self.total = 0
+
+    def __contains__(self, name):
+        return name in self.counts
+
+    def __len__(self):
+        return self.total
+
+    def __bool__(self):
+        return self.total > 0
+
+    def __iter__(self):
+        for name, count in list(self.counts.items()):
+            for _ in range(count):
+                yield name
+
+    def __eq__(self, other):
+        if isinstance(other, ItemBag):
+            return self.counts == other.counts
+        try:
+            return self.counts == ItemBag(other).counts
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"ItemBag({list(self)!r})"
+
+    def __getstate__(self):
+        return self.counts
+
+    def __setstate__(self, counts):
+        self.counts = counts
+        self.total = sum(counts.values())
+
+
+def distinct(items):
+    """The distinct names in an ItemBag or a plain list of items."""
+    if isinstance(items, ItemBag):
+        return items.names()
+    return list(dict.fromkeys(items))
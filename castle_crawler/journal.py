@@ -0,0 +1,75 @@
+"""
+Command journals: the seed and options a game started with, and every command it ran.
+
+Worlds and combat only draw from the game's seeded random.Random, so the journal is enough
+to rebuild a game exactly (see replay). On disk a journal is a header line followed by one
+command per line:
+
+    # castle-crawler journal v1 {"seed": 1234, "options": {"grid_min": -5, ...}}
+    take all
+    go north
+"""
+import json
+
+HEADER = "# castle-crawler journal v1 "
+
+
+class CommandJournal:
+    """
+    The seed and world options of one game and the commands it has run.
+      - options: the Game arguments its world was generated from, or None if the game was
+        given an existing world (such a journal cannot be replayed on its own).
+      - path: if given, the journal is also written there, flushed after every command.
+    """
+
+    def __init__(self, seed, options, path=None):
+        self.seed = seed
+        self.options = options
+        self.commands = []
+        self.file = None
+        if path is not None:
+            self.file = open(path, "w")
+            self.file.write(self.header() + "\n")
+            self.file.flush()
+
+    def header(self):
+        return HEADER + json.dumps({"seed": self.seed, "options": self.options})
+
+    def record(self, command):
+        self.commands.append(command)
+        if self.file is not None:
+            self.file.write(command + "\n")
+            self.file.flush()
+
+    def __len__(self):
+        return len(self.commands)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.header() + "\n")
+            for command in self.commands:
+                f.write(command + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            header = f.readline()
+            if not header.startswith(HEADER):
+                raise ValueError(f"{path} is not a Castle Crawler command journal")
+            meta = json.loads(header[len(HEADER):])
+            journal = cls(meta["seed"], meta["options"])
+            journal.commands = [line.rstrip("\n") for line in f]
+        return journal
+
+    def new_game(self, **game_options):
+        """Start the game this journal was recorded from, before any command ran."""
+        from .engine import Game
+
+        if self.options is None:
+            raise ValueError("this journal was recorded on a shared world and cannot be replayed on its own")
+        return Game(seed=self.seed, **self.options, **game_options)
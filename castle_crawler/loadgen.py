@@ -0,0 +1,121 @@
+"""
+Load generator for the game server: many concurrent sessions, each sending a stream of commands.
+
+    python -m castle_crawler.loadgen --spawn --sessions 2000 --commands 100
+
+Reports p50/p99 command latency and throughput. With --spawn the server is started as a
+child process, so its CPU time can be measured and turned into sessions per core.
+"""
+import argparse
+import asyncio
+import resource
+import signal
+import subprocess
+import sys
+import time
+
+from .engine import PROMPT, RUN_PROMPT
+from .server import raise_file_limit
+
+COMMANDS = ["look", "go north", "take all", "go east", "inventory", "go south", "go west", "equip sword"]
+
+_PROMPTS = (PROMPT.encode(), RUN_PROMPT.encode())
+
+
+async def read_response(reader):
+    """Read one server response, i.e. everything up to and including the next prompt."""
+    data = b""
+    while not data.endswith(_PROMPTS):
+        chunk = await reader.read(65536)
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        data += chunk
+    return data
+
+
+async def run_session(host, port, commands, offset, latencies):
+    """Play one session of `commands` commands, appending each command's latency in seconds."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        response = await read_response(reader)
+        for i in range(commands):
+            command = "run" if response.endswith(_PROMPTS[1]) else COMMANDS[(offset + i) % len(COMMANDS)]
+            started = time.perf_counter()
+            writer.write(command.encode() + b"\n")
+            response = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+        writer.write(b"quit\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, sessions, commands, ramp=0.0):
+    """Run all sessions concurrently and return (latencies, wall seconds, failed sessions)."""
+    latencies = []
+    started = time.perf_counter()
+    tasks = []
+    for i in range(sessions):
+        tasks.append(asyncio.create_task(run_session(host, port, commands, i, latencies)))
+        if ramp:
+            await asyncio.sleep(ramp / sessions)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    return latencies, time.perf_counter() - started, failed
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def spawn_server(port, extra_args):
+    """Start a server child process and wait until it is listening."""
+    process = subprocess.Popen([sys.executable, "-m", "castle_crawler.server", "--port", str(port)] + extra_args,
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if "listening" not in line:
+        process.kill()
+        raise RuntimeError(f"server failed to start: {line!r}")
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure game server latency under many concurrent sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=100, help="commands per session")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which to open the sessions")
+    parser.add_argument("--spawn", action="store_true", help="start a server child process and measure its CPU")
+    parser.add_argument("server_args", nargs="*", help="extra arguments for the spawned server (after --)")
+    args = parser.parse_args(argv)
+
+    raise_file_limit()
+    server = spawn_server(args.port, args.server_args) if args.spawn else None
+    try:
+        latencies, wall, failed = asyncio.run(run_load(args.host, args.port, args.sessions, args.commands, args.ramp))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+    latencies.sort()
+    print(f"sessions:        {args.sessions} ({failed} failed)")
+    print(f"commands:        {len(latencies)} in {wall:.2f}s ({len(latencies) / wall:,.0f}/s)")
+    if latencies:
+        print(f"latency p50:     {percentile(latencies, 0.50) * 1e3:.3f} ms")
+        print(f"latency p99:     {percentile(latencies, 0.99) * 1e3:.3f} ms")
+    if server is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = usage.ru_utime + usage.ru_stime
+        print(f"server CPU:      {cpu:.2f}s ({cpu / wall:.0%} of one core)")
+        if cpu:
+            # Sessions one fully busy core could carry at this per-session command rate.
+            print(f"sessions/core:   {args.sessions * wall / cpu:,.0f}")
+            print(f"commands/core-s: {len(latencies) / cpu:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
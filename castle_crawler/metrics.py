@@ -0,0 +1,171 @@
+"""
+Instrumentation: command latencies, game counters and their export.
+
+A Game given a Metrics (Game(metrics=...), or 'stats on' at the local console) times every command
+it runs, the rendering of room descriptions and world generation, and counts rooms generated,
+silver keys consumed, kills and deaths. A game without one only pays for a None check per
+command. Share one Metrics between the games of a server, like its RenderCache.
+
+Latencies go into fixed-bucket histograms, so recording is a bisect and an increment. The
+collected numbers can be written as JSON (dump_json) or served in the Prometheus text
+exposition format (serve_prometheus):
+
+    castle_crawler_command_seconds_bucket{command="go",le="1e-05"} 8812
+    castle_crawler_keys_consumed_total 3
+"""
+import bisect
+import json
+import threading
+
+PREFIX = "castle_crawler"
+# Upper bounds of the latency buckets, in seconds (the last bucket, +Inf, is implicit).
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+           1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNTERS = ("commands", "unknown_commands", "rooms_generated", "keys_consumed", "kills", "deaths")
+
+
+class Histogram:
+    """Counts of observations per latency bucket, with their sum."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None past the last bucket or if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum, "buckets": dict(zip(map(str, BUCKETS), self.counts)),
+                "overflow": self.counts[-1]}
+
+
+class Metrics:
+    """
+    Counters and latency histograms of one game or of every game on a server.
+      - commands: histograms of command latency, by command ("go", "take all", ...).
+      - timings: histograms of other timed work ("render", "generate_world", "load_world").
+      - counters: totals named in COUNTERS.
+      - gauges: name -> function returning a current value, read at export time
+        (e.g. the server's active sessions).
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.timings = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.gauges = {}
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def command(self, name, seconds):
+        histogram = self.commands.get(name)
+        if histogram is None:
+            histogram = self.commands[name] = Histogram()
+        histogram.observe(seconds)
+        self.counters["commands"] += 1
+
+    def observe(self, name, seconds):
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = Histogram()
+        histogram.observe(seconds)
+
+    # -------------------------------
+    # Reports & export
+    # -------------------------------
+    def summary(self):
+        """Return the lines of a human-readable report, for the 'stats' command."""
+        lines = ["Counters: " + ", ".join(f"{name} {value}" for name, value in self.counters.items())]
+        for name, value in self.gauges.items():
+            lines.append(f"{name}: {value()}")
+        for title, histograms in (("Commands", self.commands), ("Timings", self.timings)):
+            if not histograms:
+                continue
+            lines.append(f"{title}:")
+            for name, histogram in sorted(histograms.items(), key=lambda item: -item[1].sum):
+                p50, p99 = histogram.quantile(0.5), histogram.quantile(0.99)
+                mean = histogram.sum / histogram.count
+                lines.append(f"  {name:<14} {histogram.count:>8} calls, mean {_format_bound(mean)}, "
+                             f"p50 <= {_format_bound(p50)}, p99 <= {_format_bound(p99)}")
+        return lines
+
+    def to_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "gauges": {name: value() for name, value in list(self.gauges.items())},
+            "commands": {name: histogram.to_dict() for name, histogram in list(self.commands.items())},
+            "timings": {name: histogram.to_dict() for name, histogram in list(self.timings.items())},
+        }
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def prometheus_text(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        # Exports may run on the HTTP thread while games record, so iterate over copies.
+        lines = []
+        for name, value in list(self.counters.items()):
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f"{PREFIX}_{name}_total {value}")
+        for name, value in list(self.gauges.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines.append(f"{PREFIX}_{name} {value()}")
+        for metric, label, histograms in (("command_seconds", "command", self.commands),
+                                          ("seconds", "operation", self.timings)):
+            lines.append(f"# TYPE {PREFIX}_{metric} histogram")
+            for name, histogram in list(histograms.items()):
+                labels = f'{label}="{name}"'
+                seen = 0
+                for bound, count in zip(BUCKETS, list(histogram.counts)):
+                    seen += count
+                    lines.append(f'{PREFIX}_{metric}_bucket{{{labels},le="{bound}"}} {seen}')
+                lines.append(f'{PREFIX}_{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{PREFIX}_{metric}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{PREFIX}_{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port, host="127.0.0.1"):
+        """Serve prometheus_text() over HTTP from a daemon thread; return the HTTP server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _format_bound(seconds):
+    if seconds is None:
+        return "inf"
+    return f"{seconds * 1e6:.3g}us" if seconds < 1e-3 else f"{seconds * 1e3:.3g}ms"
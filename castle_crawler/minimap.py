@@ -0,0 +1,170 @@
+"""
+The 'map' command: an ASCII minimap of the rooms a player has explored.
+
+    #-.-.         @ you       . a room you have been in
+      | |         ? a dark room you cannot see in without a torch
+    .-@-.         # a locked door next to a room you can see
+      |           - and | exits of rooms you can see
+
+Explored keeps the rooms a player has been in as a sparse bitset: one TILE-bit word per
+(tile column, row). Minimap caches the map a tile at a time, as the two text lines one tile of
+a row renders to (its rooms with their east exits, and the south exits below them), for both
+torch states. A tile only depends on the explored bits and rooms of its own row and the rows
+next to it, so exploring a room or changing one (an unlocked door, a lit torch) drops just the
+few tiles around it, and a refresh after a move re-renders only those: the rest of the window
+is cut from cached tiles, and the player's '@' is put in afterwards. Rooms are shared by every
+game on a world, so changes to them are counted per tile in the world's RenderCache (see
+tiles_showing) and a cached tile older than its count is rendered again; a player's own
+exploring drops their tiles directly.
+"""
+TILE = 16               # Columns per tile (and bits per explored word).
+MAX_TILES = 4096        # Cached tiles, oldest dropped first.
+DEFAULT_RADIUS = 5      # Radius of a plain 'map'.
+MAX_RADIUS = 20         # Largest 'map <radius>'.
+
+LEGEND = "@ you  . room  ? too dark to see  # locked door"
+_SHIFT = TILE.bit_length() - 1
+_COLUMN = TILE - 1
+_BLANK = (" " * (2 * TILE), " " * (2 * TILE))
+
+
+class Explored:
+    """The grid coordinates one player has been in."""
+
+    __slots__ = ("words",)
+
+    def __init__(self, coords=()):
+        self.words = {}  # (x >> _SHIFT, y) -> bits of the explored columns of that tile row
+        for coord in coords:
+            self.add(coord)
+
+    def add(self, coord):
+        """Mark coord explored; return whether it is new."""
+        x, y = coord
+        key = (x >> _SHIFT, y)
+        word = self.words.get(key, 0)
+        bit = 1 << (x & _COLUMN)
+        if word & bit:
+            return False
+        self.words[key] = word | bit
+        return True
+
+    def __contains__(self, coord):
+        x, y = coord
+        return bool(self.words.get((x >> _SHIFT, y), 0) >> (x & _COLUMN) & 1)
+
+    def __len__(self):
+        return sum(word.bit_count() for word in self.words.values())
+
+    def __iter__(self):
+        for (tx, y), word in self.words.items():
+            for column in range(TILE):
+                if word >> column & 1:
+                    yield (tx << _SHIFT) + column, y
+
+    def copy(self):
+        explored = Explored()
+        explored.words = dict(self.words)
+        return explored
+
+
+def tiles_showing(coord):
+    """The (tile column, row) keys of the tiles that show the room at coord: its own and its neighbours'."""
+    x, y = coord
+    return [(tx, row) for tx in {(x - 1) >> _SHIFT, (x + 1) >> _SHIFT} for row in (y - 1, y, y + 1)]
+
+
+def render_tile(grid_rooms, explored, tx, y, torch):
+    """Return the room line and the exit line below it for TILE columns of row y."""
+    words = explored.words
+    if not any(words.get((column, row)) for column in (tx - 1, tx, tx + 1) for row in (y - 1, y, y + 1)):
+        return _BLANK
+    seen = {}
+
+    def visible(coord):
+        """Whether the player has been in the room at coord and can see it now (the torch rules)."""
+        shown = seen.get(coord)
+        if shown is None:
+            room = grid_rooms.get(coord) if coord in explored else None
+            shown = seen[coord] = room is not None and (torch or not room["dark"])
+        return shown
+
+    rooms, links = [], []
+    x0 = tx << _SHIFT
+    for x in range(x0, x0 + TILE):
+        coord = (x, y)
+        east, south = (x + 1, y), (x, y - 1)
+        here = visible(coord)
+        if coord in explored:
+            glyph = "." if here else "?"
+        elif visible((x - 1, y)) or visible(east) or visible((x, y + 1)) or visible(south):
+            room = grid_rooms.get(coord)
+            glyph = "#" if room is not None and room["locked"] else " "
+        else:  # Nothing the player can see is next to it.
+            rooms.append("  ")
+            links.append("  ")
+            continue
+        rooms.append(glyph)
+        rooms.append(_link(grid_rooms, coord, "east", "-") if here or visible(east) else " ")
+        links.append(_link(grid_rooms, coord, "south", "|") if here or visible(south) else " ")
+        links.append(" ")
+    return "".join(rooms), "".join(links)
+
+
+def _link(grid_rooms, coord, direction, glyph):
+    room = grid_rooms.get(coord)
+    return glyph if room is not None and direction in room["exits"] else " "
+
+
+class Minimap:
+    """
+    One player's cached map tiles, keyed by (tile column, row, carrying a torch). render_cache is
+    the world's RenderCache, whose tile versions say when another game changed a room on a tile.
+    """
+
+    def __init__(self, render_cache=None, max_tiles=MAX_TILES):
+        self.render_cache = render_cache
+        self.max_tiles = max_tiles
+        self.tiles = {}  # (tile column, row, torch) -> (tile version, lines)
+        self.hits = 0
+        self.misses = 0
+
+    def changed(self, coord):
+        """Drop the tiles that show coord: its own and those of the rooms around it."""
+        tiles = self.tiles
+        for tx, row in tiles_showing(coord):
+            tiles.pop((tx, row, False), None)
+            tiles.pop((tx, row, True), None)
+
+    def tile(self, grid_rooms, explored, tx, y, torch):
+        key = (tx, y, torch)
+        version = 0 if self.render_cache is None else self.render_cache.tile_version((tx, y))
+        entry = self.tiles.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        lines = render_tile(grid_rooms, explored, tx, y, torch)
+        tiles = self.tiles
+        if entry is None and len(tiles) >= self.max_tiles:
+            del tiles[next(iter(tiles))]  # Drop the oldest tile.
+        tiles[key] = (version, lines)
+        return lines
+
+    def render(self, grid_rooms, explored, center, radius, torch):
+        """Return the map of the rooms within radius of center (the player's room) as lines of text."""
+        cx, cy = center
+        left = cx - radius
+        first, last = left >> _SHIFT, (cx + radius) >> _SHIFT
+        start = 2 * (left - (first << _SHIFT))
+        end = start + 4 * radius + 1
+        lines = []
+        for y in range(cy + radius, cy - radius - 1, -1):
+            tiles = [self.tile(grid_rooms, explored, tx, y, torch) for tx in range(first, last + 1)]
+            line = "".join(room_line for room_line, _ in tiles)[start:end]
+            if y == cy:
+                line = line[:2 * radius] + "@" + line[2 * radius + 1:]
+            lines.append(line.rstrip())
+            if y > cy - radius:
+                lines.append("".join(link_line for _, link_line in tiles)[start:end].rstrip())
+        return lines
@@ -0,0 +1,217 @@
+"""
+Parallel world generation: tiles of the grid generated by a process pool into shared memory.
+
+The grid is split into square tiles of TILE_SIZE cells a side. Every tile draws its rooms
+(vectorgen.roll_rooms, so the same rules and distributions as the vectorized generator) from
+its own numpy Generator seeded from (world seed, tile x, tile y), and workers write the
+columns straight into one multiprocessing.shared_memory block, laid out like a RoomStore:
+
+    item_masks (uint16) | types (uint8) | flags (uint8) | monster_masks (uint8)
+
+Generation runs in three steps:
+  1. rooms: every tile rolls its cells and reports how many key candidates it holds;
+  2. exits: every tile sets its exit bits from its cells plus a one-cell border of its
+     neighbours', so exits across tile edges are stitched without another pass;
+  3. keys: the parent draws secret_keys_needed distinct candidates over the whole world from
+     a stream of their own and finds each one in its tile.
+No step depends on which worker ran which tile, so a seed gives the same world, bit for bit,
+with any number of workers (and a different world than vectorgen.generate_arrays).
+
+    world = generate_shared(seed, -20000, 20000, workers=8)
+    game = Game(grid_rooms=world, grid_min=-20000, grid_max=20000)
+    ...
+    world.close()
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from . import world
+from .store import ITEM_BITS, ROOM_IDS, RoomStore
+from .vectorgen import _require_numpy, exit_flags, np, roll_rooms
+
+TILE_SIZE = 1024
+KEY_STREAM = 0x6B657973  # Extra seed word of the key-placement stream ("keys").
+_SEED_MASK = (1 << 64) - 1
+
+_worker = None  # This process's _Columns over the shared block, set by the pool initializer.
+
+
+class _Columns:
+    """numpy views of the four columns of a shared block, shaped (width, width)."""
+
+    def __init__(self, name, width, create=False):
+        cells = width * width
+        self.memory = shared_memory.SharedMemory(name=name, create=create, size=5 * cells if create else 0)
+        shape = (width, width)
+        buffer = self.memory.buf
+        self.item_masks = np.ndarray(shape, np.uint16, buffer, 0)
+        self.types = np.ndarray(shape, np.uint8, buffer, 2 * cells)
+        self.flags = np.ndarray(shape, np.uint8, buffer, 3 * cells)
+        self.monster_masks = np.ndarray(shape, np.uint8, buffer, 4 * cells)
+        self.width = width
+
+    def close(self):
+        del self.item_masks, self.types, self.flags, self.monster_masks
+        self.memory.close()
+
+
+class SharedWorld(RoomStore):
+    """
+    A RoomStore whose columns live in a shared memory block, as generate_shared() left them.
+    Other processes can attach to the same rooms with SharedWorld(name, grid_min, grid_max);
+    close() releases this process's mapping and, in the process that created it, frees the block.
+    """
+
+    def __init__(self, name, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX, owner=False):
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.width = grid_max - grid_min + 1
+        cells = self.width * self.width
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = owner
+        buffer = self.memory.buf
+        self.item_masks = buffer[:2 * cells].cast("H")
+        self.types = buffer[2 * cells:3 * cells]
+        self.flags = buffer[3 * cells:4 * cells]
+        self.monster_masks = buffer[4 * cells:5 * cells]
+        self.overflow_items = {}
+        self.overflow_monsters = {}
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def room_count(self):
+        return len(self.types) - bytes(self.types).count(0)
+
+    def nbytes(self):
+        return 5 * len(self.types)
+
+    def close(self):
+        for column in (self.item_masks, self.types, self.flags, self.monster_masks):
+            column.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# ===============================
+# TILES
+# ===============================
+def tiles(grid_min, grid_max, tile_size=TILE_SIZE):
+    """Every tile of the grid as (tile x, tile y, x0, x1, y0, y1), array-index bounds end-exclusive."""
+    width = grid_max - grid_min + 1
+    steps = range(0, width, tile_size)
+    return [(x0 // tile_size, y0 // tile_size, x0, min(x0 + tile_size, width), y0, min(y0 + tile_size, width))
+            for x0 in steps for y0 in steps]
+
+
+def _attach(name, width):
+    global _worker
+    _worker = _Columns(name, width)
+
+
+def _roll_tile(seed, grid_min, tile):
+    """Step 1 for one tile: roll its rooms into the shared columns; return its key candidates."""
+    tx, ty, x0, x1, y0, y1 = tile
+    rng = np.random.default_rng([seed & _SEED_MASK, tx, ty])
+    xs = np.arange(grid_min + x0, grid_min + x1)[:, None]
+    ys = np.arange(grid_min + y0, grid_min + y1)[None, :]
+    present, types, flags, item_masks, monster_masks = roll_rooms(rng, xs, ys)
+    columns = _worker
+    columns.types[x0:x1, y0:y1] = types
+    columns.flags[x0:x1, y0:y1] = flags
+    columns.item_masks[x0:x1, y0:y1] = item_masks
+    columns.monster_masks[x0:x1, y0:y1] = monster_masks
+    return int(np.count_nonzero(types > ROOM_IDS["throne_room"]))
+
+
+def _stitch_tile(tile):
+    """Step 2 for one tile: set its exit bits, looking one cell into the neighbouring tiles."""
+    _, _, x0, x1, y0, y1 = tile
+    columns = _worker
+    bx0, by0 = max(x0 - 1, 0), max(y0 - 1, 0)
+    bx1, by1 = min(x1 + 1, columns.width), min(y1 + 1, columns.width)
+    exits = exit_flags(columns.types[bx0:bx1, by0:by1] != 0)
+    columns.flags[x0:x1, y0:y1] |= exits[x0 - bx0:x1 - bx0, y0 - by0:y1 - by0]
+
+
+def _run_tiles(seed, grid_min, tile_list):
+    return [_roll_tile(seed, grid_min, tile) for tile in tile_list]
+
+
+def _stitch_tiles(tile_list):
+    for tile in tile_list:
+        _stitch_tile(tile)
+
+
+def _batches(tile_list, workers):
+    """Split the tiles into a few batches per worker, keeping their order."""
+    count = max(1, min(len(tile_list), workers * 4))
+    size = -(-len(tile_list) // count)
+    return [tile_list[i:i + size] for i in range(0, len(tile_list), size)]
+
+
+def place_keys(columns, seed, tile_list, candidates):
+    """Step 3: put silver keys into distinct candidate rooms drawn uniformly over the whole world."""
+    total = sum(candidates)
+    keys = min(world.secret_keys_needed, total)
+    if not keys:
+        return
+    rng = np.random.default_rng([seed & _SEED_MASK, KEY_STREAM])
+    ends = np.cumsum(candidates)
+    for rank in rng.choice(total, size=keys, replace=False).tolist():
+        t = int(np.searchsorted(ends, rank, side="right"))
+        _, _, x0, x1, y0, y1 = tile_list[t]
+        rank -= int(ends[t]) - candidates[t]
+        cells = np.flatnonzero(columns.types[x0:x1, y0:y1] > ROOM_IDS["throne_room"])
+        x, y = divmod(int(cells[rank]), y1 - y0)
+        columns.item_masks[x0 + x, y0 + y] |= ITEM_BITS["silver key"]
+
+
+# ===============================
+# GENERATION
+# ===============================
+def generate_shared(seed, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX, workers=None,
+                    tile_size=TILE_SIZE, name=None):
+    """
+    Generate a world into a new shared memory block and return it as a SharedWorld.
+      - workers: pool size; defaults to os.cpu_count(). 1 generates in-process.
+      - tile_size: tile edge length in cells; part of the world's identity, like the seed.
+      - name: name of the shared memory block (default: a fresh random name).
+    """
+    _require_numpy()
+    global _worker
+    workers = workers or os.cpu_count() or 1
+    width = grid_max - grid_min + 1
+    tile_list = tiles(grid_min, grid_max, tile_size)
+    columns = _Columns(name, width, create=True)
+    try:
+        columns.types[:] = 0  # Fresh blocks are zeroed on Linux but not on every platform.
+        columns.flags[:] = 0
+        columns.item_masks[:] = 0
+        columns.monster_masks[:] = 0
+        if workers == 1:
+            previous, _worker = _worker, columns
+            try:
+                candidates = _run_tiles(seed, grid_min, tile_list)
+                _stitch_tiles(tile_list)
+            finally:
+                _worker = previous
+        else:
+            batches = _batches(tile_list, workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(columns.memory.name, width)) as pool:
+                candidates = []
+                for counts in pool.map(_run_tiles, [seed] * len(batches), [grid_min] * len(batches), batches):
+                    candidates += counts
+                list(pool.map(_stitch_tiles, batches))
+        place_keys(columns, seed, tile_list, candidates)
+    except BaseException:
+        columns.close()
+        columns.memory.unlink()
+        raise
+    block = columns.memory.name
+    columns.close()
+    return SharedWorld(block, grid_min, grid_max, owner=True)
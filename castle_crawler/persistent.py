@@ -0,0 +1,282 @@
+"""
+Persistent game state: versions of a world that cost O(1) to take, for undo and branching.
+
+A PersistentWorld lays a persistent hash trie of changed rooms over a world it never writes to
+(a dict, RoomStore, MappedWorld or ChunkedWorld). Reads look in the trie first and fall back to
+the base world. A command about to change a room asks for it with edit(): the first edit after
+a version was taken copies that room into the trie, which copies only the trie nodes on its
+path (a few 32-way nodes); later edits reuse the copy until the next version is taken. Taking
+a version keeps the trie's root, so versions share every room they did not change.
+
+A GameVersion is a whole game's state built on that: the roots of its grid and special-room
+tries, the player packed into tuples, and the secret-path and combat counters. The game's
+random stream and its turn counter are not part of a version: undoing a fight does not
+re-roll it, and turns keep counting every command typed.
+
+    version = game.version()          # O(1)
+    branch = game.fork()              # a new Game sharing every unchanged room
+    game.restore(version)             # O(1), and the version stays reusable
+"""
+from .content import EQUIPMENT_SLOTS
+from .inventory import ItemBag
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_MISSING = object()
+
+
+# ===============================
+# PERSISTENT HASH TRIE
+# ===============================
+class _Node:
+    """A trie node: bitmap of the 32 slots in use and their entries, packed in slot order."""
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries  # Each a _Node, a (hash, key, value) leaf or a _Collision.
+
+
+class _Collision:
+    """Keys whose 64-bit hashes are all equal."""
+
+    __slots__ = ("hash", "pairs")
+
+    def __init__(self, hash_, pairs):
+        self.hash = hash_
+        self.pairs = pairs
+
+
+def _merge(leaf, other, shift):
+    """A subtrie holding two leaves with different keys that share a slot down to shift."""
+    if shift >= _HASH_BITS:
+        return _Collision(leaf[0], ((leaf[1], leaf[2]), (other[1], other[2])))
+    a, b = (leaf[0] >> shift) & _MASK, (other[0] >> shift) & _MASK
+    if a == b:
+        return _Node(1 << a, (_merge(leaf, other, shift + _BITS),))
+    return _Node((1 << a) | (1 << b), (leaf, other) if a < b else (other, leaf))
+
+
+def _assoc(node, shift, h, key, value):
+    """Return (node with key set to value, whether key is new), copying only the path to it."""
+    bit = 1 << ((h >> shift) & _MASK)
+    index = (node.bitmap & (bit - 1)).bit_count()
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, entries[:index] + ((h, key, value),) + entries[index:]), True
+    entry = entries[index]
+    kind = type(entry)
+    if kind is _Node:
+        child, added = _assoc(entry, shift + _BITS, h, key, value)
+    elif kind is tuple:
+        if entry[0] == h and entry[1] == key:
+            child, added = (h, key, value), False
+        else:
+            child, added = _merge(entry, (h, key, value), shift + _BITS), True
+    else:  # A collision: only keys with all 64 hash bits equal reach it.
+        pairs = tuple(pair for pair in entry.pairs if pair[0] != key)
+        child, added = _Collision(h, pairs + ((key, value),)), len(pairs) == len(entry.pairs)
+    return _Node(node.bitmap, entries[:index] + (child,) + entries[index + 1:]), added
+
+
+def _walk(node):
+    for entry in node.entries:
+        kind = type(entry)
+        if kind is _Node:
+            yield from _walk(entry)
+        elif kind is tuple:
+            yield entry[1], entry[2]
+        else:
+            yield from entry.pairs
+
+
+class PersistentMap:
+    """
+    An immutable hash map (a hash array mapped trie). set() returns a new map sharing all but
+    the path to the changed key with this one; neither map is ever changed afterwards.
+    """
+
+    __slots__ = ("root", "size")
+
+    def __init__(self, root=None, size=0):
+        self.root = root if root is not None else _Node(0, ())
+        self.size = size
+
+    def get(self, key, default=None):
+        h = hash(key) & _HASH_MASK
+        node = self.root
+        shift = 0
+        while True:
+            bit = 1 << ((h >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return default
+            entry = node.entries[(node.bitmap & (bit - 1)).bit_count()]
+            kind = type(entry)
+            if kind is _Node:
+                node = entry
+                shift += _BITS
+            elif kind is tuple:
+                return entry[2] if entry[0] == h and entry[1] == key else default
+            else:
+                for pair_key, value in entry.pairs:
+                    if pair_key == key:
+                        return value
+                return default
+
+    def set(self, key, value):
+        root, added = _assoc(self.root, 0, hash(key) & _HASH_MASK, key, value)
+        return PersistentMap(root, self.size + added)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        return _walk(self.root)
+
+    def __iter__(self):
+        return (key for key, _ in _walk(self.root))
+
+
+EMPTY = PersistentMap()
+
+
+# ===============================
+# COPY-ON-WRITE WORLDS
+# ===============================
+def copy_room(room):
+    """A private copy of a room (a dict or a stored room view) that can be changed freely."""
+    copied = dict(room) if isinstance(room, dict) else room.to_dict()
+    items = copied.get("items")
+    copied["items"] = items.copy() if isinstance(items, ItemBag) else ItemBag(items or ())
+    copied["exits"] = dict(copied["exits"])
+    copied["monsters"] = list(copied["monsters"])
+    return copied
+
+
+class PersistentWorld:
+    """
+    Copy-on-write rooms over a base world, with the grid_rooms interface Game uses.
+      - base: the world the rooms start as; it is only read.
+      - rooms: a PersistentMap of the rooms changed so far (a version of this world).
+    """
+
+    def __init__(self, base, rooms=EMPTY):
+        self.base = base
+        self.rooms = rooms
+        self.owned = set()  # Rooms copied since the last version: changed in place until the next one.
+
+    def edit(self, coord):
+        """Return the room at coord for a change, copying it first if a version still shares it."""
+        if coord in self.owned:
+            return self.rooms.get(coord)
+        room = self.get(coord)
+        if room is None:
+            return None
+        room = copy_room(room)
+        self.rooms = self.rooms.set(coord, room)
+        self.owned.add(coord)
+        return room
+
+    def version(self):
+        """The current rooms, as a map no later edit will change."""
+        self.owned.clear()
+        return self.rooms
+
+    def restore(self, rooms):
+        self.rooms = rooms
+        self.owned.clear()
+
+    def fork(self):
+        """Another world over the same base, starting from this one's current rooms."""
+        return PersistentWorld(self.base, self.version())
+
+    # -------------------------------
+    # grid_rooms interface
+    # -------------------------------
+    def get(self, coord, default=None):
+        room = self.rooms.get(coord, _MISSING)
+        if room is _MISSING:
+            return self.base.get(coord, default)
+        return room
+
+    def __getitem__(self, coord):
+        room = self.get(coord)
+        if room is None:
+            raise KeyError(coord)
+        return room
+
+    def __contains__(self, coord):
+        return coord in self.base  # Rooms are changed, never added or removed.
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def keys(self):
+        return iter(self.base)
+
+    def items(self):
+        rooms = self.rooms
+        for coord, room in self.base.items():
+            changed = rooms.get(coord, _MISSING)
+            yield coord, room if changed is _MISSING else changed
+
+    def values(self):
+        for _, room in self.items():
+            yield room
+
+
+# ===============================
+# GAME VERSIONS
+# ===============================
+class GameVersion:
+    """Everything a command can change in a game, except its random stream and turn counter."""
+
+    __slots__ = ("rooms", "special_rooms", "player", "secret_state", "pending_flee", "damage_taken", "kills")
+
+    def __init__(self, game):
+        self.rooms = game.grid_rooms.version()
+        self.special_rooms = game.special_rooms.version()
+        player_state = game.player_state
+        equipment = player_state["equipment"]
+        self.player = (player_state["position"], player_state["health"], player_state["torch_active"],
+                       player_state["last_room"], tuple(player_state["inventory"].counts.items()),
+                       tuple(equipment[slot] for slot in EQUIPMENT_SLOTS))
+        self.secret_state = game.secret_state
+        self.pending_flee = game.pending_flee
+        self.damage_taken = game.damage_taken
+        self.kills = game.kills
+
+    def same_state(self, other):
+        """Whether other holds the same state (a command between the two changed nothing)."""
+        return (self.rooms is other.rooms and self.special_rooms is other.special_rooms
+                and self.player == other.player and self.secret_state == other.secret_state
+                and self.pending_flee == other.pending_flee and self.damage_taken == other.damage_taken
+                and self.kills == other.kills)
+
+    def player_state(self):
+        """A fresh player_state dict in this version's state."""
+        position, health, torch_active, last_room, stacks, equipment = self.player
+        inventory = ItemBag()
+        inventory.counts = dict(stacks)
+        inventory.total = sum(inventory.counts.values())
+        return {"position": position, "inventory": inventory, "health": health, "torch_active": torch_active,
+                "equipment": dict(zip(EQUIPMENT_SLOTS, equipment)), "last_room": last_room}
+
+    def apply(self, game):
+        """Put game (whose worlds are PersistentWorlds over the same bases) in this version's state."""
+        game.grid_rooms.restore(self.rooms)
+        game.special_rooms.restore(self.special_rooms)
+        game.player_state = self.player_state()
+        game.secret_state = self.secret_state
+        game.pending_flee = self.pending_flee
+        game.damage_taken = self.damage_taken
+        game.kills = self.kills
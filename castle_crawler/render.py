@@ -0,0 +1,81 @@
+"""
+Cache of rendered room descriptions.
+
+What describe_current_room() shows only depends on the room and on whether the player can see
+in it (a dark room without a torch hides its items and monsters). RenderCache keeps the text
+per (coord, visible) along with the room's version when it was rendered. Game.room_changed()
+bumps a room's version whenever a command changes it (take, drop, kills, torches, unlocked
+doors), so a stale entry is simply rendered again the next time it is needed. The same bump
+counts the change against every minimap tile showing the room, so each player's Minimap
+re-renders it too. Share one cache between every game on a world, like its WorldIndex.
+"""
+from .minimap import tiles_showing
+
+MAX_ENTRIES = 65536
+
+
+def render_room(room, visible):
+    """Return the full description of a room as one block of text."""
+    lines = [f"\n{room['description']}"]
+    if not visible:
+        lines.append("It's too dark to see anything clearly.")
+    else:
+        if room["items"]:
+            lines.append("You see:")
+            lines.extend(f"- {item}" for item in room["items"])
+        if room["monsters"]:
+            lines.append("Monsters here:")
+            lines.extend(f"- {monster}" for monster in room["monsters"])
+    exits = room.get("exits")
+    if exits:
+        lines.append("Exits: " + ", ".join(exits.keys()))
+    else:
+        lines.append("There are no obvious exits!")
+    return "\n".join(lines)
+
+
+class RenderCache:
+    """Rendered descriptions of grid rooms, invalidated by per-room version counters."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.versions = {}  # coord -> times the room has changed
+        self.entries = {}   # (coord, visible) -> (version, text)
+        self.tiles = {}     # minimap (tile column, row) -> times a room it shows has changed
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self, coord):
+        self.versions[coord] = self.versions.get(coord, 0) + 1
+        tiles = self.tiles
+        for tile in tiles_showing(coord):
+            tiles[tile] = tiles.get(tile, 0) + 1
+
+    def version(self, coord):
+        return self.versions.get(coord, 0)
+
+    def tile_version(self, tile):
+        return self.tiles.get(tile, 0)
+
+    def describe(self, coord, room, visible):
+        """Return the description of the room at coord, rendering it only if it changed."""
+        key = (coord, visible)
+        version = self.versions.get(coord, 0)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        text = render_room(room, visible)
+        entries = self.entries
+        if entry is None and len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]  # Drop the oldest entry.
+        entries[key] = (version, text)
+        return text
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(), "entries": len(self.entries)}
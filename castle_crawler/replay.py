@@ -0,0 +1,87 @@
+"""
+Headless replay of command journals, with checkpoints for jumping to any turn.
+
+    python -m castle_crawler.replay game.journal --turn 4000 --show 5
+
+A Replay re-executes a journal on a fresh game built from its seed and options, snapshotting
+the state every checkpoint_every turns on the way. game_at(turn) then restores the nearest
+checkpoint at or before turn and replays only the commands after it, so looking around turn
+4,000 costs at most checkpoint_every commands once the journal has been played through.
+
+Admin commands (save, stats, profile) are never journaled, since they take no turn. A 'save'
+in an older journal is refused by the replaying game, which is not an admin, and still takes
+the turn it took when it was recorded.
+"""
+import argparse
+
+from .engine import Game
+from .journal import CommandJournal
+
+CHECKPOINT_EVERY = 500
+
+
+class Replay:
+    """A journal being replayed, with a snapshot of the game every checkpoint_every turns."""
+
+    def __init__(self, journal, checkpoint_every=CHECKPOINT_EVERY):
+        self.journal = journal
+        self.checkpoint_every = checkpoint_every
+        self.head = journal.new_game(quiet=True)  # The game furthest into the journal so far.
+        self.position = 0                          # How many commands head has run.
+        self.checkpoints = {0: self.head.snapshot()}
+
+    def advance(self, turn):
+        """Play head forward to turn (at most the end of the journal), checkpointing on the way."""
+        commands = self.journal.commands
+        turn = min(turn, len(commands))
+        while self.position < turn:
+            self.head.execute(commands[self.position])
+            self.position += 1
+            if self.position % self.checkpoint_every == 0:
+                self.checkpoints[self.position] = self.head.snapshot()
+
+    def game_at(self, turn, quiet=True):
+        """Return a new game in the state after the first turn commands of the journal."""
+        turn = max(0, min(turn, len(self.journal)))
+        self.advance(turn)
+        start = turn - turn % self.checkpoint_every
+        game = Game.from_snapshot(self.checkpoints[start], quiet=True)
+        game.journal.commands = self.journal.commands[:start]
+        for command in self.journal.commands[start:turn]:
+            game.execute(command)
+        if not quiet:
+            game.say = game.output.append  # Speak from here on, without the replayed commands' text.
+        return game
+
+
+def replay(journal, checkpoint_every=CHECKPOINT_EVERY):
+    """Play a whole journal and return the finished game."""
+    return Replay(journal, checkpoint_every).game_at(len(journal))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a Castle Crawler command journal.")
+    parser.add_argument("journal")
+    parser.add_argument("--turn", type=int, default=None, help="stop after this many commands (default: all)")
+    parser.add_argument("--show", type=int, default=0, help="print the text of this many commands before --turn")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    args = parser.parse_args(argv)
+
+    journal = CommandJournal.load(args.journal)
+    session = Replay(journal, args.checkpoint_every)
+    turn = len(journal) if args.turn is None else min(args.turn, len(journal))
+    shown = min(args.show, turn)
+    game = session.game_at(turn - shown, quiet=False)
+    for command in journal.commands[turn - shown:turn]:
+        print(f"> {command}")
+        game.execute(command)
+        for line in game.take_output():
+            print(line)
+    player_state = game.player_state
+    print(f"Turn {turn} of {len(journal)} (seed {journal.seed}): position {player_state['position']}, "
+          f"health {player_state['health']}, secret progress {game.secret_path_progress}, "
+          f"inventory {player_state['inventory'].stacks()}")
+
+
+if __name__ == "__main__":
+    main()
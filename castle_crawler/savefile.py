@@ -0,0 +1,531 @@
+"""
+Binary save files: a memory-mapped world plus an append-only journal of changes.
+
+A save file (format version 1, little-endian) is laid out as
+  header | room records | string table | overflow lists | game state
+  - header: magic, version, grid bounds, generation and the offset of every section;
+  - room records: one fixed-width record per grid cell, in RoomStore order
+    ((x - grid_min) * width + (y - grid_min)): room type, flags (locked, dark, exits),
+    monster bitmask and item bitmask;
+  - string table: every name the file refers to, interned once. It starts with the room,
+    item and monster registries, which give the type ids and bitmask bits their meaning;
+  - overflow lists: the item or monster lists of rooms that are not a set of registry names;
+  - game state: the player, secret-path state, special rooms and the game's random stream, so
+    a loaded game rolls on exactly as the saved one would have.
+
+load_game() maps the file with mmap and plays on a MappedWorld, a RoomStore whose columns are
+strided views of the mapped records, so opening a world costs the same at any size and the OS
+pages rooms in as they are visited. Saving again appends only the records of rooms changed
+since the last save, plus the game state, to the journal <path>.<generation>.journal, which
+is replayed on load. Once the journal outgrows COMPACT_THRESHOLD it is folded into a new base
+file on a background thread.
+"""
+import glob
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from . import content, world
+from .inventory import ItemBag
+from .chunks import ChunkedWorld
+from .store import (DARK, EXIT_BITS, ITEM_BITS, ITEM_NAMES, LOCKED, MONSTER_BITS, MONSTER_NAMES,
+                    ROOM_IDS, ROOM_NAMES, RoomStore, _mask)
+
+MAGIC = b"CCWORLD\x00"
+VERSION = 1
+# magic, version, record size, grid_min, grid_max, generation,
+# records offset, strings offset, strings count, overflow offset, overflow count, state offset, state length
+HEADER = struct.Struct("<8sHHiiIQQIQIQI")
+# room type, flags, monster bitmask, item bitmask
+RECORD = struct.Struct("<BBHI")
+COMPACT_THRESHOLD = 1 << 20  # Journal bytes that trigger a background compaction.
+NO_NAME = 0xFFFF
+EQUIPMENT_SLOTS = list(world.PLAYER_STATE["equipment"])
+REGISTRIES = []  # Refilled with the content; store's tables are refilled first (it subscribed first).
+
+
+def _apply_content(pack):
+    REGISTRIES[:] = ROOM_NAMES[1:] + ITEM_NAMES + MONSTER_NAMES
+
+
+content.subscribe(_apply_content)
+
+_U16 = struct.Struct("<H")
+_ENTRY = struct.Struct("<cI")         # journal entry: tag, payload length
+_ROOM_ENTRY = struct.Struct("<I")     # cell index, followed by a record and its overflow lists
+_OVERFLOW = struct.Struct("<IBH")     # cell index, 0 items / 1 monsters, length
+# position kind (0 grid, 1 special), x, y, special room name, health, torch active, secret state,
+# has last room, last x, last y, turns, damage taken, kills, pending flee damage (-1 for none)
+_STATE = struct.Struct("<BiiHiBIBiiIIIi")
+_TARGET = struct.Struct("<Bii")       # exit target: 0 and a coord, or 1 and a string id in x
+# random.Random.getstate(): version, 625 words of Mersenne Twister state, pending gauss value.
+_RNG_STATE = struct.Struct("<i625I?d")
+
+
+def journal_path(path, generation):
+    return f"{path}.{generation}.journal"
+
+
+# ===============================
+# ENCODING
+# ===============================
+class StringTable:
+    """The file's interned names; the registries come first so their ids never move."""
+
+    def __init__(self, strings=REGISTRIES):
+        self.strings = []
+        self.ids = {}
+        self.added = []  # Strings interned since the caller last wrote them out.
+        for name in strings:
+            self.intern(name)
+        self.added.clear()
+
+    def intern(self, name):
+        string_id = self.ids.get(name)
+        if string_id is None:
+            string_id = self.ids[name] = len(self.strings)
+            self.strings.append(name)
+            self.added.append(name)
+        return string_id
+
+
+def _encode_strings(names):
+    buf = bytearray()
+    for name in names:
+        data = name.encode("utf-8")
+        buf += _U16.pack(len(data)) + data
+    return buf
+
+
+def _encode_room(room, strings):
+    """Return (record bytes, overflow items or None, overflow monsters or None) for a room dict."""
+    flags = (LOCKED if room["locked"] else 0) | (DARK if room["dark"] else 0)
+    for direction in room["exits"]:
+        flags |= EXIT_BITS.get(direction, 0)
+    items, monsters = list(room["items"]), list(room["monsters"])
+    item_mask, monster_mask = _mask(items, ITEM_BITS), _mask(monsters, MONSTER_BITS)
+    record = RECORD.pack(ROOM_IDS[room["name"]], flags, monster_mask or 0, item_mask or 0)
+    return (record,
+            None if item_mask is not None else [strings.intern(name) for name in items],
+            None if monster_mask is not None else [strings.intern(name) for name in monsters])
+
+
+def _pack_ids(ids):
+    if ids is None:
+        return _U16.pack(NO_NAME)
+    return _U16.pack(len(ids)) + struct.pack(f"<{len(ids)}H", *ids)
+
+
+def _unpack_ids(data, offset, strings):
+    (count,) = _U16.unpack_from(data, offset)
+    offset += 2
+    if count == NO_NAME:
+        return None, offset
+    ids = struct.unpack_from(f"<{count}H", data, offset)
+    return [strings[i] for i in ids], offset + 2 * count
+
+
+def _encode_records(grid_rooms, grid_min, grid_max, strings):
+    """Return (records, overflow entries) for a whole world, from its columns when it has them."""
+    width = grid_max - grid_min + 1
+    if isinstance(grid_rooms, MappedWorld):
+        records = bytearray(grid_rooms.records)
+    elif isinstance(grid_rooms, RoomStore):
+        records = bytearray(RECORD.size * width * width)
+        records[0::RECORD.size] = bytes(grid_rooms.types)
+        records[1::RECORD.size] = bytes(grid_rooms.flags)
+        records[2::RECORD.size] = grid_rooms.monster_masks  # One byte per room; the high byte stays 0.
+        items = grid_rooms.item_masks.tobytes()               # Two bytes per room; bytes 6-7 stay 0.
+        records[4::RECORD.size] = items[0::2]
+        records[5::RECORD.size] = items[1::2]
+    else:
+        records = bytearray(RECORD.size * width * width)
+        overflow = []
+        for (x, y), room in grid_rooms.items():
+            i = (x - grid_min) * width + (y - grid_min)
+            record, items, monsters = _encode_room(room, strings)
+            records[i * RECORD.size:(i + 1) * RECORD.size] = record
+            if items is not None:
+                overflow.append((i, 0, items))
+            if monsters is not None:
+                overflow.append((i, 1, monsters))
+        return records, overflow
+    overflow = [(i, 0, [strings.intern(name) for name in values]) for i, values in grid_rooms.overflow_items.items()]
+    overflow += [(i, 1, [strings.intern(name) for name in values])
+                 for i, values in grid_rooms.overflow_monsters.items()]
+    return records, overflow
+
+
+def _pack_bag(bag, strings):
+    stacks = ItemBag(bag).stacks()
+    buf = bytearray(_U16.pack(len(stacks)))
+    for name, count in stacks:
+        buf += struct.pack("<HI", strings.intern(name), count)
+    return buf
+
+
+def _unpack_bag(data, offset, strings):
+    (count,) = _U16.unpack_from(data, offset)
+    offset += 2
+    bag = ItemBag()
+    for _ in range(count):
+        string_id, n = struct.unpack_from("<HI", data, offset)
+        bag.add(strings[string_id], n)
+        offset += 6
+    return bag, offset
+
+
+def _pack_target(target, strings):
+    if isinstance(target, tuple):
+        return _TARGET.pack(0, target[0], target[1])
+    return _TARGET.pack(1, strings.intern(target), 0)
+
+
+def _unpack_target(data, offset, strings):
+    kind, x, y = _TARGET.unpack_from(data, offset)
+    return ((x, y) if kind == 0 else strings[x]), offset + _TARGET.size
+
+
+def pack_rng_state(state):
+    version, words, gauss = state
+    return _RNG_STATE.pack(version, *words, gauss is not None, gauss or 0.0)
+
+
+def unpack_rng_state(data, offset=0):
+    version, *words, has_gauss, gauss = _RNG_STATE.unpack_from(data, offset)
+    return version, tuple(words), gauss if has_gauss else None
+
+
+def encode_state(game, strings):
+    """Encode the player, secret-path state, special rooms and random stream of a game."""
+    player_state = game.player_state
+    pos, last = player_state["position"], player_state["last_room"]
+    grid = isinstance(pos, tuple)
+    buf = bytearray(_STATE.pack(
+        0 if grid else 1, pos[0] if grid else 0, pos[1] if grid else 0, NO_NAME if grid else strings.intern(pos),
+        player_state["health"], player_state["torch_active"], game.secret_state,
+        last is not None, last[0] if last else 0, last[1] if last else 0,
+        game.turns, game.damage_taken, game.kills, -1 if game.pending_flee is None else game.pending_flee))
+    equipment = player_state["equipment"]
+    buf += struct.pack(f"<{len(EQUIPMENT_SLOTS)}H",
+                       *(NO_NAME if equipment[slot] is None else strings.intern(equipment[slot])
+                         for slot in EQUIPMENT_SLOTS))
+    buf += _pack_bag(player_state["inventory"], strings)
+    buf.append(len(game.special_rooms))
+    for name, room in game.special_rooms.items():
+        buf += _U16.pack(strings.intern(name))
+        buf += _pack_bag(room["items"], strings)
+        buf += _pack_ids([strings.intern(monster) for monster in room["monsters"]])
+        buf.append(len(room["exits"]))
+        for direction, target in room["exits"].items():
+            buf += _U16.pack(strings.intern(direction)) + _pack_target(target, strings)
+    buf += pack_rng_state(game.rng.getstate())
+    return buf
+
+
+def decode_state(data, strings, game):
+    """
+    Restore a game's player, secret-path state, special rooms and random stream from
+    encode_state() bytes (saves written before the stream was stored keep the game's own).
+    """
+    (kind, x, y, name_id, health, torch, secret_state, has_last, lx, ly,
+     turns, damage_taken, kills, pending_flee) = _STATE.unpack_from(data, 0)
+    offset = _STATE.size
+    player_state = game.player_state
+    player_state["position"] = (x, y) if kind == 0 else strings[name_id]
+    player_state["health"] = health
+    player_state["torch_active"] = bool(torch)
+    player_state["last_room"] = (lx, ly) if has_last else None
+    game.secret_state = secret_state
+    game.turns, game.damage_taken, game.kills = turns, damage_taken, kills
+    game.pending_flee = None if pending_flee < 0 else pending_flee
+    ids = struct.unpack_from(f"<{len(EQUIPMENT_SLOTS)}H", data, offset)
+    offset += 2 * len(EQUIPMENT_SLOTS)
+    for slot, string_id in zip(EQUIPMENT_SLOTS, ids):
+        player_state["equipment"][slot] = None if string_id == NO_NAME else strings[string_id]
+    player_state["inventory"], offset = _unpack_bag(data, offset, strings)
+    rooms = data[offset]
+    offset += 1
+    for _ in range(rooms):
+        (name_id,) = _U16.unpack_from(data, offset)
+        room = game.edit_room(strings[name_id])
+        room["items"], offset = _unpack_bag(data, offset + 2, strings)
+        room["monsters"], offset = _unpack_ids(data, offset, strings)
+        exits = {}
+        count = data[offset]
+        offset += 1
+        for _ in range(count):
+            (direction,) = _U16.unpack_from(data, offset)
+            exits[strings[direction]], offset = _unpack_target(data, offset + 2, strings)
+        room["exits"] = exits
+    if len(data) - offset >= _RNG_STATE.size:
+        game.rng.setstate(unpack_rng_state(data, offset))
+
+
+def write_base(path, generation, grid_min, grid_max, records, strings, overflow, state):
+    """Write a complete save file to path atomically (write to a temporary file, then rename)."""
+    table = _encode_strings(strings)
+    overflow_data = bytearray()
+    for i, kind, ids in overflow:
+        overflow_data += _OVERFLOW.pack(i, kind, len(ids)) + struct.pack(f"<{len(ids)}H", *ids)
+    records_offset = (HEADER.size + 7) // 8 * 8
+    strings_offset = records_offset + len(records)
+    overflow_offset = strings_offset + len(table)
+    state_offset = overflow_offset + len(overflow_data)
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, grid_min, grid_max, generation,
+                         records_offset, strings_offset, len(strings), overflow_offset, len(overflow),
+                         state_offset, len(state))
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(header.ljust(records_offset, b"\x00"))
+        f.write(records)
+        f.write(table)
+        f.write(overflow_data)
+        f.write(state)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    return state_offset + len(state)
+
+
+# ===============================
+# MAPPED WORLDS
+# ===============================
+class MappedWorld(RoomStore):
+    """
+    A RoomStore over the memory-mapped records of a save file. The mapping is private
+    (copy-on-write): play changes pages in memory, never the file, and Game.save() journals them.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("memory-mapped worlds need a little-endian host")
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        (magic, version, record_size, grid_min, grid_max, self.generation, records_offset, strings_offset,
+         strings_count, overflow_offset, overflow_count, state_offset, state_length) = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Castle Crawler save file")
+        if version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} uses save format version {version}; this version reads {VERSION}")
+        self.path = path
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.width = grid_max - grid_min + 1
+        view = memoryview(self.mmap)
+        self.records = view[records_offset:records_offset + record_size * self.width * self.width]
+        self.types = self.records[0::record_size]
+        self.flags = self.records[1::record_size]
+        self.monster_masks = self.records.cast("H")[1::record_size // 2]
+        self.item_masks = self.records.cast("I")[1::record_size // 4]
+        view.release()
+
+        self.strings = []
+        offset = strings_offset
+        for _ in range(strings_count):
+            (length,) = _U16.unpack_from(self.mmap, offset)
+            self.strings.append(self.mmap[offset + 2:offset + 2 + length].decode("utf-8"))
+            offset += 2 + length
+        if self.strings[:len(REGISTRIES)] != REGISTRIES:
+            raise ValueError(f"{path} was saved with different room, item or monster names")
+
+        self.overflow_items = {}
+        self.overflow_monsters = {}
+        offset = overflow_offset
+        for _ in range(overflow_count):
+            i, kind, length = _OVERFLOW.unpack_from(self.mmap, offset)
+            offset += _OVERFLOW.size
+            names = [self.strings[string_id] for string_id in struct.unpack_from(f"<{length}H", self.mmap, offset)]
+            offset += 2 * length
+            (self.overflow_monsters if kind else self.overflow_items)[i] = names
+        self.state = self.mmap[state_offset:state_offset + state_length]
+        self.rooms = None
+
+    def set_record(self, i, record, items, monsters):
+        """Apply one journaled room record."""
+        self.records[i * RECORD.size:(i + 1) * RECORD.size] = record
+        for overflow, values in ((self.overflow_items, items), (self.overflow_monsters, monsters)):
+            if values is None:
+                overflow.pop(i, None)
+            else:
+                overflow[i] = values
+
+    def room_count(self):
+        if self.rooms is None:
+            self.rooms = len(self.types) - bytes(self.types).count(0)
+        return self.rooms
+
+    def nbytes(self):
+        return len(self.records)
+
+    def close(self):
+        for column in (self.types, self.flags, self.monster_masks, self.item_masks, self.records):
+            column.release()
+        self.mmap.close()
+
+
+# ===============================
+# SAVING AND LOADING
+# ===============================
+class SaveFile:
+    """The save file a game was loaded from or last saved to, and the rooms changed since."""
+
+    def __init__(self, path, generation, strings):
+        self.path = path
+        self.generation = generation
+        self.strings = strings
+        self.dirty = set()
+        self.journal = open(journal_path(path, generation), "ab")
+        self.compactor = None
+
+    def append(self, game):
+        """Journal the rooms changed since the last save and the game state; return the bytes written."""
+        grid_rooms, strings = game.grid_rooms, self.strings
+        width = game.grid_max - game.grid_min + 1
+        rooms = bytearray()
+        for coord in sorted(self.dirty):
+            room = grid_rooms.get(coord)
+            if room is None:
+                continue
+            record, items, monsters = _encode_room(room, strings)
+            i = (coord[0] - game.grid_min) * width + (coord[1] - game.grid_min)
+            payload = _ROOM_ENTRY.pack(i) + record + _pack_ids(items) + _pack_ids(monsters)
+            rooms += _ENTRY.pack(b"R", len(payload)) + payload
+        state = encode_state(game, strings)
+        buf = bytearray()
+        for name in strings.added:  # New names go first so every later entry can refer to them.
+            data = name.encode("utf-8")
+            buf += _ENTRY.pack(b"S", len(data)) + data
+        strings.added.clear()
+        buf += rooms + _ENTRY.pack(b"G", len(state)) + state
+        self.journal.write(buf)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.dirty.clear()
+        if self.journal.tell() > COMPACT_THRESHOLD and not self.compacting():
+            self.compact(game)
+        return len(buf)
+
+    def compact(self, game, background=True):
+        """
+        Fold everything into a new base file. The snapshot and journal rotation happen now;
+        writing the file happens on a background thread unless background is False.
+        """
+        self.wait()
+        records, overflow = _encode_records(game.grid_rooms, game.grid_min, game.grid_max, self.strings)
+        state = encode_state(game, self.strings)
+        strings = list(self.strings.strings)
+        self.strings.added.clear()
+        self.dirty.clear()
+        self.journal.close()
+        self.generation += 1
+        self.journal = open(journal_path(self.path, self.generation), "ab")
+        args = (self.path, self.generation, game.grid_min, game.grid_max, records, strings, overflow, state)
+
+        def run():
+            write_base(*args)
+            generation = self.generation - 1
+            while os.path.exists(journal_path(self.path, generation)):
+                os.remove(journal_path(self.path, generation))
+                generation -= 1
+
+        if background:
+            self.compactor = threading.Thread(target=run, name="save-compactor", daemon=True)
+            self.compactor.start()
+        else:
+            run()
+
+    def compacting(self):
+        """Return whether a background compaction is still writing its base file."""
+        return self.compactor is not None and self.compactor.is_alive()
+
+    def wait(self):
+        """Wait for a background compaction to finish."""
+        if self.compactor is not None:
+            self.compactor.join()
+            self.compactor = None
+
+    def close(self):
+        self.wait()
+        self.journal.close()
+
+
+def save_game(game, path):
+    """
+    Save a game to path and return the bytes written. The first save to a path writes the whole
+    world; later saves of the same game append what changed to the journal.
+    """
+    if isinstance(getattr(game.grid_rooms, "base", game.grid_rooms), ChunkedWorld):
+        raise ValueError("chunked worlds are kept in their save_dir; save files hold dense grids")
+    save_file = game.save_file
+    if save_file is not None and save_file.path == path:
+        return save_file.append(game)
+    if save_file is not None:
+        save_file.close()
+    strings = StringTable()
+    records, overflow = _encode_records(game.grid_rooms, game.grid_min, game.grid_max, strings)
+    state = encode_state(game, strings)
+    size = write_base(path, 0, game.grid_min, game.grid_max, records, strings.strings, overflow, state)
+    strings.added.clear()
+    for stale in glob.glob(glob.escape(path) + ".*.journal"):  # Journals of whatever was saved here before.
+        os.remove(stale)
+    game.save_file = SaveFile(path, 0, strings)
+    return size
+
+
+def load_game(path, **game_options):
+    """
+    Open a saved game: map its world, replay its journal and restore the player.
+    game_options are passed on to Game (seed, quiet, ...).
+    """
+    from .engine import Game
+
+    grid_rooms = MappedWorld(path)
+    strings = StringTable(grid_rooms.strings)
+    state = grid_rooms.state
+    generation = grid_rooms.generation
+    while True:
+        state = _replay(journal_path(path, generation), grid_rooms, strings) or state
+        if not os.path.exists(journal_path(path, generation + 1)):
+            break
+        generation += 1
+    game = Game(grid_rooms=grid_rooms, grid_min=grid_rooms.grid_min, grid_max=grid_rooms.grid_max, **game_options)
+    decode_state(state, strings.strings, game)
+    game.save_file = SaveFile(path, generation, strings)
+    return game
+
+
+def _replay(path, grid_rooms, strings):
+    """
+    Apply one journal file to a mapped world; return the last game state in it, if any.
+    A torn entry at the end (a save that never completed) is cut off the file.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    state = None
+    offset = 0
+    while offset + _ENTRY.size <= len(data):
+        tag, length = _ENTRY.unpack_from(data, offset)
+        start, offset = offset + _ENTRY.size, offset + _ENTRY.size + length
+        if offset > len(data):
+            offset = start - _ENTRY.size
+            break
+        if tag == b"S":
+            strings.intern(data[start:offset].decode("utf-8"))
+        elif tag == b"R":
+            (i,) = _ROOM_ENTRY.unpack_from(data, start)
+            record = data[start + 4:start + 4 + RECORD.size]
+            items, end = _unpack_ids(data, start + 4 + RECORD.size, strings.strings)
+            monsters, end = _unpack_ids(data, end, strings.strings)
+            grid_rooms.set_record(i, record, items, monsters)
+        elif tag == b"G":
+            state = data[start:offset]
+    if offset < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+    strings.added.clear()
+    return state
@@ -0,0 +1,139 @@
+"""
+Streaming matcher for secret paths.
+
+Every secret path is a sequence of moves that opens a door to its reward room. All paths are
+compiled into one Aho-Corasick automaton over the four directions (for a single path this is
+exactly the KMP automaton), stored as a flat transition table. A player's whole secret-path
+state is one integer, the automaton state, and each move costs one table lookup however
+many paths there are. Because mismatches follow failure links instead of resetting to the
+start, overlapping attempts are not lost: "east, east, north" still counts as "east, north".
+
+A path may have locked moves (locked_indices): the door to its reward room then takes a silver
+key per locked move, spent when the trigger completes. The matcher only follows directions;
+Game.move() checks and spends the keys when the path is matched.
+"""
+from . import world
+
+DIRECTIONS = ["north", "south", "east", "west"]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+
+class SecretPath:
+    """
+    One secret path.
+      - sequence: the full secret sequence of moves.
+      - reward_room: key of the special room the path opens.
+      - reward_exits: exits of the reward room besides "back" to where the path was completed.
+      - trigger_length: how many moves of the sequence open the door; by default the door opens
+        at the penultimate step, as it always has.
+      - locked_indices: indices of the trigger moves that are locked; completing the path takes
+        one silver key for each, and without enough keys the door stays shut.
+    """
+
+    def __init__(self, sequence, reward_room="final_boss_room", reward_exits=None, trigger_length=None,
+                 locked_indices=()):
+        self.sequence = list(sequence)
+        self.reward_room = reward_room
+        self.reward_exits = dict(reward_exits or {})
+        self.trigger_length = len(self.sequence) - 1 if trigger_length is None else trigger_length
+        self.locked_indices = frozenset(locked_indices)
+        if not 0 < self.trigger_length <= len(self.sequence):
+            raise ValueError(f"secret path {self.sequence} must trigger after 1..{len(self.sequence)} moves")
+        if not all(0 <= index < self.trigger_length for index in self.locked_indices):
+            raise ValueError(f"locked moves of secret path {self.sequence} must be among its first "
+                             f"{self.trigger_length} moves")
+        unknown = set(self.sequence) - set(DIRECTIONS)
+        if unknown:
+            raise ValueError(f"secret path uses unknown directions: {sorted(unknown)}")
+
+    @property
+    def trigger(self):
+        """The moves that open the reward room."""
+        return self.sequence[:self.trigger_length]
+
+    @property
+    def keys(self):
+        """Silver keys the reward room's door takes."""
+        return len(self.locked_indices)
+
+    def __repr__(self):
+        return f"SecretPath({self.sequence!r}, reward_room={self.reward_room!r})"
+
+
+class SecretMatcher:
+    """Aho-Corasick automaton over a list of SecretPaths. State 0 is the start state."""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        goto = [{}]
+        depth = [0]
+        match = [-1]  # Index of the path whose trigger ends at this state, or -1.
+        for index, path in enumerate(self.paths):
+            state = 0
+            for direction in path.trigger:
+                step = DIRECTION_INDEX[direction]
+                if step not in goto[state]:
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    match.append(-1)
+                    goto[state][step] = len(goto) - 1
+                state = goto[state][step]
+            if match[state] == -1:
+                match[state] = index
+
+        # Breadth-first: resolve failure links into a complete transition table, and let a
+        # state report a match from its longest matching suffix when it has none of its own.
+        fail = [0] * len(goto)
+        table = [None] * len(goto)
+        table[0] = [goto[0].get(step, 0) for step in range(len(DIRECTIONS))]
+        queue = [goto[0][step] for step in sorted(goto[0])]
+        for state in queue:
+            fail[state] = 0
+        for state in queue:
+            if match[state] == -1:
+                match[state] = match[fail[state]]
+            row = []
+            for step in range(len(DIRECTIONS)):
+                child = goto[state].get(step)
+                if child is None:
+                    row.append(table[fail[state]][step])
+                else:
+                    fail[child] = table[fail[state]][step]
+                    row.append(child)
+                    queue.append(child)
+            table[state] = row
+        self.table = [tuple(row) for row in table]
+        self.depth = depth
+        self.match = match
+
+    def step(self, state, direction):
+        """Return the automaton state after a move in direction."""
+        step = DIRECTION_INDEX.get(direction)
+        if step is None:
+            return 0
+        return self.table[state][step]
+
+    def matched(self, state):
+        """Return the SecretPath completed in this state, or None."""
+        index = self.match[state]
+        return None if index < 0 else self.paths[index]
+
+    def feed(self, directions, state=0):
+        """Run a sequence of moves and return the list of paths completed along the way."""
+        found = []
+        for direction in directions:
+            state = self.step(state, direction)
+            path = self.matched(state)
+            if path is not None:
+                found.append(path)
+                state = 0
+        return found
+
+
+# The castle's original secret path: it opens the Final Boss Room, which leads on to the treasure.
+# It has no locked moves: world.secret_locked_indices only sets how many silver keys the castle
+# hands out, as it always has.
+DEFAULT_PATHS = [
+    SecretPath(world.secret_sequence, "final_boss_room", {"continue": "secret_treasure_room"}),
+]
+DEFAULT_MATCHER = SecretMatcher(DEFAULT_PATHS)
@@ -0,0 +1,194 @@
+"""
+Asyncio line-protocol game server: many players, one shared world.
+
+    python -m castle_crawler.server --port 4000
+
+Each connection gets its own Game (player state, secret-path progress, random stream) over
+the server's shared grid_rooms. The client sends one command per line; the server answers
+with the command's text followed by the next prompt ("\\n> ", or the 'run' prompt while a
+monster is chasing the player), without a trailing newline.
+
+Commands run on the event loop, so 'odds' and route searches get a smaller budget than at the
+console (SESSION_ODDS_FIGHTS, SESSION_SEARCH_LIMIT) to keep every other session responsive. A
+line longer than LINE_LIMIT bytes is answered with an error and the connection closed.
+
+With --metrics-port the sessions share one Metrics, served in the Prometheus text format at
+http://127.0.0.1:<port>/; --stats-json writes it to a file on shutdown.
+"""
+import argparse
+import asyncio
+import random
+import resource
+import signal
+import time
+
+from . import combat, content, world
+from .chunks import ChunkedWorld, MAX_CHUNKS
+from .engine import Game, WELCOME_TEXT
+from .connectivity import Connectivity
+from .index import WorldIndex
+from .metrics import Metrics
+from .render import RenderCache
+from .wander import Wanderers
+
+LINE_LIMIT = 2 ** 16            # Longest command line a client may send, in bytes.
+SESSION_ODDS_FIGHTS = 10_000    # Fights simulated by a session's 'odds' (a few milliseconds).
+SESSION_SEARCH_LIMIT = 10_000   # States a session's 'path to' or 'walk to' search may visit.
+LINE_TOO_LONG = b"That line is too long. Goodbye.\n"
+
+
+class GameServer:
+    """
+    Hosts sessions over one world.
+      - grid_rooms: the shared world (a dict, RoomStore or ChunkedWorld).
+      - seed: seeds the per-session random streams, for repeatable load tests.
+      - metrics: a Metrics every session records into (None: sessions are uninstrumented;
+        players cannot run 'stats' or 'profile', which are admin commands).
+      - wandering: if True, monsters roam the world and hunt the players (one Wanderers for
+        every session).
+    Dense worlds get one WorldIndex and one Connectivity that every session keeps up to date;
+    every world gets one RenderCache of room descriptions.
+    """
+
+    def __init__(self, grid_rooms, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX, seed=None, metrics=None,
+                 wandering=False):
+        self.grid_rooms = grid_rooms
+        self.world_index = None if isinstance(grid_rooms, ChunkedWorld) else WorldIndex.build(grid_rooms)
+        self.connectivity = None if isinstance(grid_rooms, ChunkedWorld) else Connectivity.build(grid_rooms)
+        self.render_cache = RenderCache()
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.rng = random.Random(seed)
+        self.sessions = 0
+        self.active = 0
+        self.commands = 0
+        self.metrics = metrics
+        self.wanderers = Wanderers(grid_rooms, seed) if wandering else None
+        if metrics is not None:
+            metrics.gauges["active_sessions"] = lambda: self.active
+            metrics.gauges["render_cache_hit_rate"] = self.render_cache.hit_rate
+
+    def new_game(self):
+        return Game(seed=self.rng.getrandbits(64), grid_rooms=self.grid_rooms,
+                    grid_min=self.grid_min, grid_max=self.grid_max, world_index=self.world_index,
+                    connectivity=self.connectivity, render_cache=self.render_cache,
+                    metrics=self.metrics, wanderers=self.wanderers, odds_fights=SESSION_ODDS_FIGHTS,
+                    search_limit=SESSION_SEARCH_LIMIT)
+
+    @staticmethod
+    def render(game):
+        """The text to send for everything the game said, followed by its prompt."""
+        lines = game.take_output()
+        text = "\n".join(lines) + "\n" if lines else ""
+        return (text + game.prompt).encode()
+
+    async def handle(self, reader, writer):
+        """Play one session until the client quits or disconnects."""
+        self.sessions += 1
+        self.active += 1
+        game = self.new_game()
+        game.say(WELCOME_TEXT)
+        game.describe_current_room()
+        try:
+            writer.write(self.render(game))
+            await writer.drain()
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Longer than LINE_LIMIT: the stream cannot find the line's end.
+                    writer.write(LINE_TOO_LONG)
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                event = game.execute(line.decode(errors="replace"))
+                self.commands += 1
+                if event == "quit":
+                    writer.write(("\n".join(game.take_output()) + "\n").encode())
+                    await writer.drain()
+                    break
+                writer.write(self.render(game))
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self.active -= 1
+            if self.wanderers is not None:
+                self.wanderers.leave(game.wander_token)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=4000, ready=None):
+        """Serve until cancelled (SIGINT/SIGTERM). ready, if given, is set once listening."""
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT, backlog=4096)
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except (NotImplementedError, RuntimeError):
+                pass
+        address = server.sockets[0].getsockname()
+        print(f"Castle Crawler server listening on {address[0]}:{address[1]}", flush=True)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await stop
+        print(f"Served {self.sessions} sessions, {self.commands} commands; "
+              f"room description cache hit rate {self.render_cache.hit_rate():.1%}.", flush=True)
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit permits."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def build_world(seed, grid_min, grid_max, chunk_size=None, max_chunks=MAX_CHUNKS):
+    """Generate the world all sessions share."""
+    if chunk_size is not None:
+        return ChunkedWorld(seed, grid_min, grid_max, chunk_size, max_chunks)
+    rng = random.Random(seed)
+    grid_rooms = world.initialize_grid(rng, grid_min, grid_max)
+    world.distribute_silver_keys(grid_rooms, rng)
+    return grid_rooms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Castle Crawler for many players over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--grid-min", type=int, default=world.GRID_MIN)
+    parser.add_argument("--grid-max", type=int, default=world.GRID_MAX)
+    parser.add_argument("--chunk-size", type=int, default=None, help="serve a lazily generated chunked world")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="record stats for every session and serve them for Prometheus on this local port")
+    parser.add_argument("--stats-json", help="record stats for every session and write them here on shutdown")
+    parser.add_argument("--wandering", action="store_true", help="let monsters roam and hunt the players")
+    parser.add_argument("--content", help="serve a world of this JSON or TOML content pack")
+    args = parser.parse_args(argv)
+
+    raise_file_limit()
+    combat._load_numpy()  # Imported now rather than during the first session's 'odds'.
+    if args.content:
+        content.use(args.content)
+    seed = args.seed if args.seed is not None else random.getrandbits(64)
+    metrics = Metrics() if args.metrics_port is not None or args.stats_json else None
+    if metrics is not None:
+        started = time.perf_counter()
+    grid_rooms = build_world(seed, args.grid_min, args.grid_max, args.chunk_size)
+    if metrics is not None:
+        metrics.observe("generate_world", time.perf_counter() - started)
+        if args.chunk_size is None:
+            metrics.count("rooms_generated", len(grid_rooms))
+        if args.metrics_port is not None:
+            metrics.serve_prometheus(args.metrics_port)
+    server = GameServer(grid_rooms, args.grid_min, args.grid_max, seed, metrics, args.wandering)
+    asyncio.run(server.serve(args.host, args.port))
+    if args.stats_json:
+        metrics.dump_json(args.stats_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Sharded world hosting: the grid split across worker processes, with a router in front.
+
+    python -m castle_crawler.shards --shards 4 --port 4000 [--grid-min -2000 --grid-max 2000]
+
+The grid is cut into one stripe of columns per shard. Every shard is a process that generates
+only the rooms of its own stripe and runs the games of the players standing in it. Rooms come
+from ChunkedWorld's per-chunk seeds (see build_stripe), so every shard rolls the same rooms,
+exits and silver keys for the columns it owns, whatever the other stripes are. The router
+(ShardRouter) talks to the shards over pipes, knows which shard holds each player, and forwards
+every command there; the TCP front end speaks the same line protocol as castle_crawler.server,
+so loadgen runs against it unchanged.
+
+A player crosses into another shard when a move() heads for a room the shard does not own.
+The shard stops at the point where the room is entered (Game.enter()), packs the whole player
+(position, health, inventory, equipment, secret-path progress, special rooms, counters, random
+stream and explored rooms) and gives up its game; the router passes the package to the owning
+shard, which finishes the move there: unlocking the door with a silver key, or turning the
+player back at a locked door, in which case the package goes straight back. A player is live
+in exactly one shard at every moment, or in the router's hands in between, and the router
+handles one command per player at a time, so nothing else sees a half-moved player.
+
+Rooms are not shared between shards, so 'path to', 'walk to', 'locate' and the map only see
+the rooms of the shard the player is in. Wandering monsters and undo are not available.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import multiprocessing
+import random
+import signal
+import threading
+
+from . import content, world
+from .chunks import CHUNK_SIZE, ChunkedWorld, MAX_CHUNKS
+from .connectivity import Connectivity
+from .engine import Game, WELCOME_TEXT
+from .index import WorldIndex
+from .render import RenderCache
+from .savefile import StringTable, decode_state, encode_state
+from .server import LINE_LIMIT, LINE_TOO_LONG, raise_file_limit
+
+
+def stripe_bounds(grid_min, grid_max, shards):
+    """Return the shards + 1 column bounds of the stripes: shard i owns bounds[i] <= x < bounds[i + 1]."""
+    width = grid_max - grid_min + 1
+    if not 1 <= shards <= width:
+        raise ValueError(f"cannot split {width} columns into {shards} shards")
+    return [grid_min + i * width // shards for i in range(shards + 1)]
+
+
+def stripe_of(bounds, coord):
+    """Return the shard owning a grid coordinate."""
+    return min(max(bisect.bisect_right(bounds, coord[0]) - 1, 0), len(bounds) - 2)
+
+
+def build_stripe(seed, grid_min, grid_max, lo=None, hi=None, chunk_size=None, max_chunks=MAX_CHUNKS):
+    """
+    Return the rooms of the columns lo <= x < hi of a sharded world (all of them by default).
+    With chunk_size, a lazily generated ChunkedWorld (a ShardWorld hides the other columns);
+    otherwise a dict of every room in the stripe, from only the CHUNK_SIZE chunks over it.
+    """
+    if chunk_size is not None:
+        return ChunkedWorld(seed, grid_min, grid_max, chunk_size, max_chunks)
+    lo = grid_min if lo is None else lo
+    hi = grid_max + 1 if hi is None else hi
+    return ChunkedWorld(seed, grid_min, grid_max, CHUNK_SIZE).generate_columns(lo, hi)
+
+
+# ===============================
+# ONE SHARD
+# ===============================
+class ShardWorld:
+    """The rooms of one stripe of a world; other coordinates read as no room at all."""
+
+    def __init__(self, base, lo, hi):
+        self.base = base
+        self.lo = lo
+        self.hi = hi
+
+    def owns(self, coord):
+        return self.lo <= coord[0] < self.hi
+
+    def get(self, coord, default=None):
+        if self.lo <= coord[0] < self.hi:
+            return self.base.get(coord, default)
+        return default
+
+    def __getitem__(self, coord):
+        room = self.get(coord)
+        if room is None:
+            raise KeyError(coord)
+        return room
+
+    def __contains__(self, coord):
+        return self.lo <= coord[0] < self.hi and coord in self.base
+
+    def items(self):
+        lo, hi = self.lo, self.hi
+        return ((coord, room) for coord, room in self.base.items() if lo <= coord[0] < hi)
+
+    def mark_dirty(self, coord):
+        mark_dirty = getattr(self.base, "mark_dirty", None)
+        if mark_dirty is not None:
+            mark_dirty(coord)
+
+
+class ShardGame(Game):
+    """A Game on one shard: entering a room another shard owns leaves the rest of the move to it."""
+
+    handoff = None  # (coord, mode) once the player has to go to the shard owning coord.
+
+    def enter(self, new_coord):
+        if self.grid_rooms.owns(new_coord):
+            return Game.enter(self, new_coord)
+        self.handoff = (new_coord, "enter")
+        return "handoff"
+
+    def describe_current_room(self):
+        pos = self.player_state["position"]
+        if isinstance(pos, tuple) and not self.grid_rooms.owns(pos):
+            # Already there (fleeing, or out of a special room): the owner describes it.
+            self.handoff = (pos, "arrive")
+            return "handoff"
+        return Game.describe_current_room(self)
+
+
+def pack_player(game):
+    """Everything about a player that goes with them to another shard, as picklable values."""
+    strings = StringTable(())
+    state = encode_state(game, strings)
+    return {"seed": game.seed, "state": bytes(state), "strings": strings.strings,
+            "explored": game.explored.words}
+
+
+class Shard:
+    """One stripe of the world and the games of the players in it (runs in a worker process)."""
+
+    def __init__(self, bounds, index, seed, grid_min, grid_max, chunk_size=None, max_chunks=MAX_CHUNKS):
+        lo, hi = bounds[index], bounds[index + 1]
+        rooms = build_stripe(seed, grid_min, grid_max, lo, hi, chunk_size, max_chunks)
+        self.grid_rooms = ShardWorld(rooms, lo, hi)
+        dense = not isinstance(rooms, ChunkedWorld)
+        self.world_index = WorldIndex.build(self.grid_rooms) if dense else None
+        self.connectivity = Connectivity.build(self.grid_rooms) if dense else None
+        self.render_cache = RenderCache()
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.games = {}  # player id -> ShardGame
+
+    def new_game(self, seed):
+        return ShardGame(seed=seed, grid_rooms=self.grid_rooms, grid_min=self.grid_min, grid_max=self.grid_max,
+                         world_index=self.world_index, connectivity=self.connectivity,
+                         render_cache=self.render_cache)
+
+    def reply(self, player, game, event):
+        """
+        ("done", lines, event, prompt) once the player is settled here, or ("handoff", lines, event,
+        coord, mode, package) if they have to move on, after giving up their game.
+        """
+        lines = game.take_output()
+        handoff = game.handoff
+        pos = game.player_state["position"]
+        if handoff is None and isinstance(pos, tuple) and not self.grid_rooms.owns(pos):
+            handoff = (pos, "resume")  # Turned back at another shard's door.
+        if handoff is None:
+            self.games[player] = game
+            return ("done", lines, event, game.prompt)
+        self.games.pop(player, None)
+        coord, mode = handoff
+        return ("handoff", lines, event, coord, mode, pack_player(game))
+
+    # -------------------------------
+    # Requests from the router
+    # -------------------------------
+    def join(self, player, seed):
+        game = self.new_game(seed)
+        game.say(WELCOME_TEXT)
+        event = game.describe_current_room()
+        return self.reply(player, game, event)
+
+    def command(self, player, command):
+        game = self.games[player]
+        return self.reply(player, game, game.execute(command))
+
+    def adopt(self, player, package, coord, mode):
+        """Take a player over from another shard and finish what they were doing (see ShardGame)."""
+        game = self.new_game(package["seed"])
+        decode_state(package["state"], package["strings"], game)
+        game.explored.words = dict(package["explored"])
+        event = None
+        if mode == "enter":
+            event = game.enter(coord)
+        elif mode == "arrive":
+            game.describe_current_room()  # The command's own event ("fled") stands.
+        elif mode == "restore":  # Back where it came from after the handoff failed.
+            self.games[player] = game
+            return ("done", game.take_output(), None, game.prompt)
+        return self.reply(player, game, event)
+
+    def leave(self, player):
+        self.games.pop(player, None)
+        return ("done", [], "quit", "")
+
+
+def serve_shard(conn, bounds, index, seed, grid_min, grid_max, chunk_size, max_chunks):
+    """Worker process: build one Shard and answer the router's requests until told to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C stops the router, which stops the shards.
+    shard = Shard(bounds, index, seed, grid_min, grid_max, chunk_size, max_chunks)
+    conn.send(("ready",))
+    while True:
+        request = conn.recv()
+        if request[0] == "stop":
+            break
+        try:
+            conn.send(getattr(shard, request[0])(*request[1:]))
+        except Exception as error:  # Report it to the router and keep serving the other players.
+            conn.send(("error", f"{type(error).__name__}: {error}"))
+    conn.close()
+
+
+# ===============================
+# ROUTER
+# ===============================
+class ShardRouter:
+    """
+    Starts the shard processes and routes every player's commands to the shard holding them.
+      - seed: seeds the world (the same in every shard) and the players' random streams.
+      - shards: how many worker processes to split the grid's columns between.
+      - chunk_size: if set, every shard plays in a lazily generated ChunkedWorld.
+    One thread at a time talks to a shard; commands for different shards run in parallel.
+    """
+
+    def __init__(self, seed, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX, shards=4, chunk_size=None,
+                 max_chunks=MAX_CHUNKS):
+        self.bounds = stripe_bounds(grid_min, grid_max, shards)
+        self.rng = random.Random(seed)
+        self.where = {}        # player id -> shard index
+        self.ids = itertools.count()  # Player ids; join() runs on executor threads, and next() is atomic.
+        self.handoffs = 0
+        self.conns = []
+        self.processes = []
+        self.locks = [threading.Lock() for _ in range(shards)]
+        for index in range(shards):
+            conn, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=serve_shard, daemon=True, name=f"castle-crawler-shard-{index}",
+                args=(child, self.bounds, index, seed, grid_min, grid_max, chunk_size, max_chunks))
+            process.start()
+            child.close()
+            self.conns.append(conn)
+            self.processes.append(process)
+        for conn in self.conns:
+            conn.recv()  # "ready": the shard has built its rooms.
+
+    def call(self, shard, *request):
+        with self.locks[shard]:
+            self.conns[shard].send(request)
+            reply = self.conns[shard].recv()
+        if reply[0] == "error":
+            raise RuntimeError(f"shard {shard}: {reply[1]}")
+        return reply
+
+    def join(self):
+        """Start a new player in the Entry Hall; return (player id, lines, prompt)."""
+        player = next(self.ids)
+        shard = stripe_of(self.bounds, world.PLAYER_STATE["position"])
+        self.where[player] = shard
+        lines, prompt, _ = self.settle(player, shard, self.call(shard, "join", player, self.rng.getrandbits(64)))
+        return player, lines, prompt
+
+    def execute(self, player, command):
+        """Run one command for a player; return (lines, prompt, event)."""
+        shard = self.where[player]
+        return self.settle(player, shard, self.call(shard, "command", player, command))
+
+    def settle(self, player, shard, reply):
+        """Follow a reply's handoffs until the player is settled in a shard."""
+        lines = list(reply[1])
+        event = reply[2]
+        while reply[0] == "handoff":
+            _, _, _, coord, mode, package = reply
+            target = stripe_of(self.bounds, coord)
+            try:
+                reply = self.call(target, "adopt", player, package, coord, mode)
+            except RuntimeError:
+                self.call(shard, "adopt", player, package, coord, "restore")
+                raise
+            self.where[player] = shard = target
+            self.handoffs += 1
+            lines += reply[1]
+            event = reply[2] or event
+        return lines, reply[3], event
+
+    def leave(self, player):
+        shard = self.where.pop(player, None)
+        if shard is not None:
+            self.call(shard, "leave", player)
+
+    def close(self):
+        for lock, conn in zip(self.locks, self.conns):
+            with lock:
+                try:
+                    conn.send(("stop",))
+                except OSError:
+                    pass
+                conn.close()
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ===============================
+# TCP FRONT END
+# ===============================
+async def handle(router, reader, writer):
+    """Play one session through the router until the client quits or disconnects."""
+    loop = asyncio.get_running_loop()
+    player, lines, prompt = await loop.run_in_executor(None, router.join)
+    try:
+        writer.write(("\n".join(lines) + "\n" + prompt).encode())
+        await writer.drain()
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:  # Longer than LINE_LIMIT.
+                writer.write(LINE_TOO_LONG)
+                await writer.drain()
+                break
+            if not line:
+                break
+            lines, prompt, event = await loop.run_in_executor(None, router.execute, player,
+                                                              line.decode(errors="replace"))
+            text = "\n".join(lines) + "\n" if lines else ""
+            if event == "quit":
+                writer.write(text.encode())
+                await writer.drain()
+                break
+            writer.write((text + prompt).encode())
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        await loop.run_in_executor(None, router.leave, player)
+        writer.close()
+
+
+async def serve(router, host="127.0.0.1", port=4000):
+    server = await asyncio.start_server(lambda reader, writer: handle(router, reader, writer), host, port,
+                                        limit=LINE_LIMIT, backlog=4096)
+    address = server.sockets[0].getsockname()
+    print(f"Castle Crawler shard router listening on {address[0]}:{address[1]} "
+          f"({len(router.conns)} shards)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host one Castle Crawler world split across shard processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--grid-min", type=int, default=world.GRID_MIN)
+    parser.add_argument("--grid-max", type=int, default=world.GRID_MAX)
+    parser.add_argument("--chunk-size", type=int, default=None, help="serve a lazily generated chunked world")
+    parser.add_argument("--content", help="serve a world of this JSON or TOML content pack")
+    args = parser.parse_args(argv)
+
+    raise_file_limit()
+    if args.content:
+        content.use(args.content)  # Also seen by the shard processes, through the environment.
+    seed = args.seed if args.seed is not None else random.getrandbits(64)
+    try:
+        stripe_bounds(args.grid_min, args.grid_max, args.shards)
+    except ValueError as error:
+        parser.error(str(error))
+    with ShardRouter(seed, args.grid_min, args.grid_max, args.shards, args.chunk_size) as router:
+        try:
+            asyncio.run(serve(router, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        print(f"Handed players between shards {router.handoffs} times.", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Headless batch simulation: play many seeded games with a policy and collect aggregate stats.
+
+    python -m castle_crawler.sim --games 100000 --policy random --workers 8
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import Game
+from .world import secret_sequence
+
+GO_COMMANDS = ["go north", "go south", "go east", "go west"]
+EQUIPPABLE = {"sword": "weapon_right", "helmet": "helmet", "armor": "armor", "shield": "shield",
+              "boots": "boots", "gloves": "gloves"}
+
+
+# ===============================
+# POLICIES
+# ===============================
+# A policy is called with (game, rng) before every turn and returns the next command,
+# or None when it has nothing left to do. Policies must be picklable so they can be
+# shipped to worker processes.
+class RandomPolicy:
+    """Wander at random, picking up and equipping what it finds and fighting what it meets."""
+
+    def __init__(self, attack_chance=0.5):
+        self.attack_chance = attack_chance
+
+    def __call__(self, game, rng):
+        if game.pending_flee is not None:
+            return "run"
+        room = game.get_current_room()
+        if room["monsters"] and rng.random() < self.attack_chance:
+            return "attack " + room["monsters"][0]
+        if room["items"]:
+            return "take all"
+        inventory = game.player_state["inventory"]
+        if inventory:
+            equipment = game.player_state["equipment"]
+            for item, slot in EQUIPPABLE.items():
+                if item in inventory and equipment[slot] is None:
+                    return "equip " + item
+            if "health potion" in inventory and game.player_state["health"] <= 75:
+                return "use health potion"
+        return rng.choice(GO_COMMANDS)
+
+
+class ScriptedPolicy:
+    """Play a fixed list of commands once, then stop."""
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+
+    def __call__(self, game, rng):
+        if game.turns < len(self.commands):
+            return self.commands[game.turns]
+        return None
+
+
+def secret_path_script():
+    """Commands that arm the player and walk the secret path straight to the treasure."""
+    walk = ["go " + direction for direction in secret_sequence[:-1]]
+    return ["take all", "equip sword"] + walk + ["go continue"]
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "secret": lambda: ScriptedPolicy(secret_path_script()),
+}
+
+
+# ===============================
+# RUNNING GAMES
+# ===============================
+def play_game(seed, policy, max_turns=1000):
+    """Play one quiet game to death, treasure, policy exhaustion or max_turns and return its stats."""
+    game = Game(seed=seed, quiet=True)
+    rng = random.Random(~seed)
+    execute = game.execute
+    while game.turns < max_turns:
+        command = policy(game, rng)
+        if command is None:
+            break
+        execute(command)
+        if game.dead or game.found_treasure:
+            break
+    return {
+        "seed": seed,
+        "turns": game.turns,
+        "dead": game.dead,
+        "treasure": game.found_treasure,
+        "damage_taken": game.damage_taken,
+        "kills": game.kills,
+    }
+
+
+def new_totals():
+    return {
+        "games": 0,
+        "deaths": 0,
+        "treasures": 0,
+        "turns": 0,
+        "kills": 0,
+        "damage_taken": 0,
+        "turns_to_treasure_sum": 0,
+        "turns_to_treasure_min": None,
+        "turns_to_treasure_max": None,
+    }
+
+
+def add_game(totals, result):
+    """Fold one play_game() result into running totals."""
+    totals["games"] += 1
+    totals["turns"] += result["turns"]
+    totals["kills"] += result["kills"]
+    totals["damage_taken"] += result["damage_taken"]
+    if result["dead"]:
+        totals["deaths"] += 1
+    if result["treasure"]:
+        turns = result["turns"]
+        totals["treasures"] += 1
+        totals["turns_to_treasure_sum"] += turns
+        if totals["turns_to_treasure_min"] is None or turns < totals["turns_to_treasure_min"]:
+            totals["turns_to_treasure_min"] = turns
+        if totals["turns_to_treasure_max"] is None or turns > totals["turns_to_treasure_max"]:
+            totals["turns_to_treasure_max"] = turns
+
+
+def merge_totals(totals, other):
+    """Fold the totals of another batch into totals."""
+    for key in ("games", "deaths", "treasures", "turns", "kills", "damage_taken", "turns_to_treasure_sum"):
+        totals[key] += other[key]
+    for key, pick in (("turns_to_treasure_min", min), ("turns_to_treasure_max", max)):
+        values = [v for v in (totals[key], other[key]) if v is not None]
+        totals[key] = pick(values) if values else None
+
+
+def play_seeds(seeds, policy, max_turns=1000):
+    """Play every seed in seeds and return their combined totals (the unit of work for one worker)."""
+    totals = new_totals()
+    for seed in seeds:
+        add_game(totals, play_game(seed, policy, max_turns))
+    return totals
+
+
+def run_batch(games, policy, seed=0, workers=None, max_turns=1000, chunk_size=500):
+    """
+    Play games seeded seed, seed+1, ... across a process pool and return aggregate stats.
+      - policy: a picklable policy callable (see POLICIES).
+      - workers: pool size; defaults to os.cpu_count(). 1 runs in-process.
+    The results only depend on seed, games, policy and max_turns, never on the worker count.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [range(start, min(start + chunk_size, seed + games)) for start in range(seed, seed + games, chunk_size)]
+    totals = new_totals()
+    started = time.perf_counter()
+    if workers == 1:
+        for chunk in chunks:
+            merge_totals(totals, play_seeds(chunk, policy, max_turns))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(play_seeds, chunks, [policy] * len(chunks), [max_turns] * len(chunks)):
+                merge_totals(totals, part)
+    elapsed = time.perf_counter() - started
+    return summarize(totals, elapsed, workers)
+
+
+def summarize(totals, elapsed, workers):
+    games = totals["games"] or 1
+    treasures = totals["treasures"]
+    return {
+        "games": totals["games"],
+        "deaths": totals["deaths"],
+        "death_rate": totals["deaths"] / games,
+        "treasures": treasures,
+        "treasure_rate": treasures / games,
+        "turns_to_treasure_mean": totals["turns_to_treasure_sum"] / treasures if treasures else None,
+        "turns_to_treasure_min": totals["turns_to_treasure_min"],
+        "turns_to_treasure_max": totals["turns_to_treasure_max"],
+        "damage_taken_mean": totals["damage_taken"] / games,
+        "kills_mean": totals["kills"] / games,
+        "commands": totals["turns"],
+        "seconds": elapsed,
+        "workers": workers,
+        "commands_per_second": totals["turns"] / elapsed if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless Castle Crawler games and report stats.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--script", help="file of commands (one per line) to play instead of a policy")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.script:
+        with open(args.script) as f:
+            policy = ScriptedPolicy(line.strip() for line in f if line.strip())
+    else:
+        policy = POLICIES[args.policy]()
+    stats = run_batch(args.games, policy, args.seed, args.workers, args.max_turns)
+    for key, value in stats.items():
+        print(f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
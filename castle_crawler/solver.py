@@ -0,0 +1,336 @@
+"""
+Automated solver: the fewest commands from a game's state to the treasure (or any room).
+
+    python -m castle_crawler.solver --seeds 0-9999 --workers 8 [--goal 12,-3] [--verify]
+
+solve() searches the states move() can reach, (position, secret-path matcher state, silver
+keys picked up, doors unlocked, keys spent on secret paths), with A* over a transposition table
+of the best turn count per state, capped at max_states entries. Successors follow move() exactly:
+  - every direction typed in a grid room advances the secret-path matcher, even one that is
+    blocked, walled or locked, and a completed trigger moves the player to its reward room,
+    spending a key per locked move of the path (short of keys, the move goes ahead as usual);
+  - a locked room takes a silver key to enter and stays unlocked; without a key the player
+    stays where they are;
+  - special rooms only have their named exits ('continue', 'back');
+  - 'take all' in a room holding silver keys picks them up.
+Torches are left out of the state: burnout only changes what the player sees, never where a
+move leads. The heuristic is admissible: on the way to a reward room, the trigger moves still
+missing plus the exits from the reward room to the goal; for a grid goal, the Manhattan distance.
+
+Keys are interchangeable, so a state records which key rooms were emptied and which doors
+were opened as bitmasks rather than sets of coordinates.
+"""
+import argparse
+import heapq
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .connectivity import KEY, find_keys
+from .engine import Game
+from .world import get_offset
+
+GOAL = "secret_treasure_room"
+MAX_STATES = 2_000_000  # Transposition table entries a single search may hold before giving up.
+DIRECTIONS = ("north", "south", "east", "west")
+
+
+class Solution:
+    """A shortest command list to the goal, with the search's cost."""
+
+    def __init__(self, commands, states, seconds):
+        self.commands = commands
+        self.states = states      # Entries of the transposition table when the goal was reached.
+        self.seconds = seconds
+
+    @property
+    def par(self):
+        return len(self.commands)
+
+    def __repr__(self):
+        return f"Solution(par={self.par}, states={self.states}, seconds={self.seconds:.4f})"
+
+
+class Solver:
+    """The search space of one game: its world, matcher and special rooms."""
+
+    def __init__(self, game, goal=GOAL, max_states=MAX_STATES):
+        self.grid_rooms = game.grid_rooms
+        self.grid_min = game.grid_min
+        self.grid_max = game.grid_max
+        self.matcher = game.secret_matcher
+        self.special_rooms = game.special_rooms
+        self.goal = goal
+        self.max_states = max_states
+        self.key_rooms = {}   # coord -> (bit, keys there), numbered as the search finds them; (0, 0) if none
+        self.key_counts = {}  # bit -> keys there, for the rooms that hold some
+        self.doors = {}       # coord -> bit of a locked door, likewise
+        self.start_keys = game.player_state["inventory"].count(KEY)
+        # Exits of special rooms besides 'back', which depends on where the trigger was completed.
+        self.special_exits = {key: {name: target for name, target in room["exits"].items() if name != "back"}
+                              for key, room in game.special_rooms.items()}
+        for path in self.matcher.paths:
+            self.special_exits[path.reward_room] = dict(path.reward_exits)
+        self.reward_rooms = {path.reward_room for path in self.matcher.paths}
+        self.special_distance = self.special_distances()
+
+    def special_distances(self):
+        """Moves from every special room to the goal through special exits alone (when it is one)."""
+        distance = {self.goal: 0} if isinstance(self.goal, str) else {}
+        changed = True
+        while changed:
+            changed = False
+            for room, exits in self.special_exits.items():
+                for target in exits.values():
+                    if target in distance and distance.get(room, distance[target] + 2) > distance[target] + 1:
+                        distance[room] = distance[target] + 1
+                        changed = True
+        return distance
+
+    # -------------------------------
+    # Heuristic
+    # -------------------------------
+    def estimate(self, position, back, matcher_state):
+        """A lower bound on the commands still needed from a state."""
+        goal = self.goal
+        if isinstance(goal, tuple):
+            if isinstance(position, str):
+                if back is None:
+                    return 1
+                position, extra = back, 1
+            else:
+                extra = 0
+            return extra + abs(position[0] - goal[0]) + abs(position[1] - goal[1])
+        if isinstance(position, str):
+            return self.special_distance.get(position, 1)
+        depth = self.matcher.depth[matcher_state]
+        best = None
+        for path in self.matcher.paths:
+            tail = self.special_distance.get(path.reward_room)
+            if tail is not None:
+                moves = max(path.trigger_length - depth, 1) + tail
+                best = moves if best is None else min(best, moves)
+        return 0 if best is None else best
+
+    # -------------------------------
+    # Successors
+    # -------------------------------
+    def key_room(self, coord):
+        entry = self.key_rooms.get(coord)
+        if entry is None:
+            room = self.grid_rooms.get(coord)
+            count = room["items"].count(KEY) if room is not None else 0
+            entry = self.key_rooms[coord] = (1 << len(self.key_counts), count) if count else (0, 0)
+            if count:
+                self.key_counts[entry[0]] = count
+        return entry
+
+    def door(self, coord):
+        bit = self.doors.get(coord)
+        if bit is None:
+            bit = self.doors[coord] = 1 << len(self.doors)
+        return bit
+
+    def successors(self, state):
+        """Yield (command, next state) for every command that changes the state."""
+        position, back, matcher_state, taken, opened, spent = state
+        if isinstance(position, str):
+            for name, target in self.special_exits.get(position, {}).items():
+                yield f"go {name}", (target, back, matcher_state, taken, opened, spent)
+            if back is not None and position in self.reward_rooms:
+                yield "go back", (back, None, matcher_state, taken, opened, spent)
+            return
+        bit, count = self.key_room(position)
+        if bit and not taken & bit:
+            yield "take all", (position, None, matcher_state, taken | bit, opened, spent)
+        keys = self.start_keys - bin(opened).count("1") - spent
+        if taken:
+            keys += sum(count for key_bit, count in self.key_counts.items() if taken & key_bit)
+        for direction in DIRECTIONS:
+            command = f"go {direction}"
+            next_matcher = self.matcher.step(matcher_state, direction)
+            path = self.matcher.matched(next_matcher)
+            if path is not None:
+                if path.keys <= keys:
+                    yield command, (path.reward_room, position, 0, taken, opened, spent + path.keys)
+                    continue
+                next_matcher = 0  # The door stays shut and the move goes ahead.
+            dx, dy = get_offset(direction)
+            target = (position[0] + dx, position[1] + dy)
+            room = None
+            if self.grid_min <= target[0] <= self.grid_max and self.grid_min <= target[1] <= self.grid_max:
+                room = self.grid_rooms.get(target)
+            if room is None:
+                # Blocked, but the matcher moved.
+                yield command, (position, None, next_matcher, taken, opened, spent)
+                continue
+            if room["locked"]:
+                door = self.door(target)
+                if not opened & door:
+                    if keys <= 0:
+                        yield command, (position, None, next_matcher, taken, opened, spent)
+                        continue
+                    yield command, (target, None, next_matcher, taken, opened | door, spent)
+                    continue
+            yield command, (target, None, next_matcher, taken, opened, spent)
+
+    # -------------------------------
+    # Search
+    # -------------------------------
+    def solve(self, position, matcher_state=0, back=None):
+        """Return the shortest Solution from a state, or None if there is none within max_states."""
+        started = time.perf_counter()
+        if isinstance(self.goal, tuple) and self.grid_rooms.get(self.goal) is None:
+            return None
+        start = (position, back, matcher_state, 0, 0, 0)
+        best = {start: 0}                    # The transposition table: state -> fewest commands.
+        came_from = {start: None}
+        order = itertools.count()
+        frontier = [(self.estimate(position, back, matcher_state), 0, next(order), start)]
+        goal = self.goal
+        while frontier:
+            _, cost, _, state = heapq.heappop(frontier)
+            if cost > best[state]:
+                continue
+            if state[0] == goal:
+                commands = []
+                while came_from[state] is not None:
+                    state, command = came_from[state]
+                    commands.append(command)
+                commands.reverse()
+                return Solution(commands, len(best), time.perf_counter() - started)
+            for command, following in self.successors(state):
+                if cost + 1 >= best.get(following, cost + 2):
+                    continue
+                if len(best) >= self.max_states:
+                    return None
+                best[following] = cost + 1
+                came_from[following] = (state, command)
+                estimate = self.estimate(following[0], following[1], following[2])
+                heapq.heappush(frontier, (cost + 1 + estimate, cost + 1, next(order), following))
+        return None
+
+
+def solve(game, goal=GOAL, max_states=MAX_STATES):
+    """Return the shortest Solution from game's current state to goal (a special room or a coord)."""
+    position = game.player_state["position"]
+    back = game.special_rooms[position]["exits"].get("back") if isinstance(position, str) else None
+    return Solver(game, goal, max_states).solve(position, game.secret_state, back)
+
+
+def verify(game, solution, goal=GOAL):
+    """Play a solution's commands on game and return whether they end at goal."""
+    for command in solution.commands:
+        game.execute(command)
+    return game.player_state["position"] == goal
+
+
+# ===============================
+# BATCHES OF SEEDS
+# ===============================
+def solve_seed(seed, goal=GOAL, options=None, check=False, max_states=MAX_STATES):
+    """Generate the world of a seed, solve it and return a result dict for reports."""
+    options = options or {}
+    game = Game(seed=seed, quiet=True, **options)
+    started = time.perf_counter()
+    solution = solve(game, goal, max_states)
+    seconds = time.perf_counter() - started
+    result = {"seed": seed, "solved": solution is not None, "seconds": seconds,
+              "par": solution.par if solution else None, "states": solution.states if solution else None,
+              "keys": sum(find_keys(game.grid_rooms).values())}
+    if check and solution is not None:
+        result["verified"] = verify(Game(seed=seed, quiet=True, **options), solution, goal)
+    return result
+
+
+def _solve_seeds(seeds, goal, options, check, max_states):
+    return [solve_seed(seed, goal, options, check, max_states) for seed in seeds]
+
+
+def solve_batch(seeds, goal=GOAL, options=None, workers=None, check=False, max_states=MAX_STATES, chunk_size=50):
+    """Solve the world of every seed across a process pool; return the results in seed order."""
+    seeds = list(seeds)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return _solve_seeds(seeds, goal, options, check, max_states)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(partial(_solve_seeds, goal=goal, options=options, check=check, max_states=max_states),
+                              chunks):
+            results += chunk
+    return results
+
+
+def summarize(results, elapsed):
+    solved = [result for result in results if result["solved"]]
+    times = sorted(result["seconds"] for result in results)
+    pars = {}
+    for result in solved:
+        pars[result["par"]] = pars.get(result["par"], 0) + 1
+    return {
+        "worlds": len(results),
+        "solved": len(solved),
+        "unsolved_seeds": [result["seed"] for result in results if not result["solved"]],
+        "par": dict(sorted(pars.items())),
+        "mean_seconds": sum(times) / len(times) if times else 0.0,
+        "p99_seconds": times[min(len(times) - 1, int(len(times) * 0.99))] if times else 0.0,
+        "max_seconds": times[-1] if times else 0.0,
+        "slowest": sorted(results, key=lambda result: -result["seconds"])[:5],
+        "verified": sum(1 for result in results if result.get("verified")),
+        "elapsed": elapsed,
+    }
+
+
+def _parse_seeds(text):
+    if "-" in text[1:]:
+        first, last = text.split("-", 1)
+        return range(int(first), int(last) + 1)
+    return range(int(text))
+
+
+def _parse_goal(text):
+    if "," in text:
+        x, y = text.split(",")
+        return (int(x), int(y))
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve generated Castle Crawler worlds and report their par.")
+    parser.add_argument("--seeds", default="1000", help="a count (N: seeds 0..N-1) or a range (A-B)")
+    parser.add_argument("--goal", default=GOAL, help="a special room or a grid coordinate x,y")
+    parser.add_argument("--grid-min", type=int, default=None)
+    parser.add_argument("--grid-max", type=int, default=None)
+    parser.add_argument("--winnable", action="store_true", help="solve worlds generated with winnable=True")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-states", type=int, default=MAX_STATES)
+    parser.add_argument("--verify", action="store_true", help="play every solution on a fresh game")
+    args = parser.parse_args(argv)
+
+    options = {"winnable": args.winnable}
+    if args.grid_min is not None:
+        options["grid_min"] = args.grid_min
+    if args.grid_max is not None:
+        options["grid_max"] = args.grid_max
+    started = time.perf_counter()
+    results = solve_batch(_parse_seeds(args.seeds), _parse_goal(args.goal), options, args.workers,
+                          args.verify, args.max_states)
+    report = summarize(results, time.perf_counter() - started)
+    print(f"{report['solved']}/{report['worlds']} worlds solved in {report['elapsed']:.2f}s")
+    print("par: " + ", ".join(f"{par} turns x{count}" for par, count in report["par"].items()))
+    print(f"solve time: mean {report['mean_seconds'] * 1e3:.2f}ms, p99 {report['p99_seconds'] * 1e3:.2f}ms, "
+          f"max {report['max_seconds'] * 1e3:.2f}ms")
+    for result in report["slowest"]:
+        print(f"  seed {result['seed']}: {result['seconds'] * 1e3:.2f}ms, par {result['par']}, "
+              f"{result['states']} states")
+    if args.verify:
+        print(f"verified {report['verified']}/{report['solved']} solutions on a fresh game")
+    if report["unsolved_seeds"]:
+        print(f"unsolved: {report['unsolved_seeds'][:20]}")
+
+
+if __name__ == "__main__":
+    main()
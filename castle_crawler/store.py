@@ -0,0 +1,370 @@
+"""
+Compact, array-backed room storage for dense grids.
+
+Instead of one dict per room, a RoomStore keeps one small integer per cell in each of a
+few flat arrays (struct of arrays), indexed by (x - grid_min) * width + (y - grid_min):
+  - types:         room type id from ROOM_NAMES (0 means "no room here");
+  - flags:         bit 0 locked, bit 1 dark, bits 4-7 the exit mask (north, south, east, west);
+  - item_masks:    bitmask over the first ITEM_MASK_BITS of ITEM_NAMES;
+  - monster_masks: bitmask over the first MONSTER_MASK_BITS of MONSTER_NAMES.
+Exit targets are never stored; they are recomputed from get_offset(). A room whose item or
+monster list cannot be a bitmask (duplicates, or names without a bit) keeps a plain list in
+a small overflow dict instead.
+
+store.get(coord) returns a RoomView, which reads and writes through to the arrays and
+behaves enough like a room dict for Game's commands to use it unchanged.
+"""
+from array import array
+from collections.abc import MutableSequence
+
+from . import content, world
+from .world import get_offset
+
+# -------------------------------
+# Registries (name <-> small int)
+# -------------------------------
+# Refilled in place from the active content pack. Only the first ITEM_MASK_BITS items and
+# MONSTER_MASK_BITS monsters get a bit; rooms holding any others use the overflow lists.
+ITEM_MASK_BITS = 16
+MONSTER_MASK_BITS = 8
+ROOM_NAMES = []
+ITEM_NAMES = []
+MONSTER_NAMES = []
+ROOM_IDS = {}
+ITEM_BITS = {}
+MONSTER_BITS = {}
+ROOM_DESCRIPTIONS = []
+
+
+def _apply_content(pack):
+    ROOM_NAMES[:] = [None, "entry_hall", "throne_room"] + pack.room_names
+    ITEM_NAMES[:] = pack.item_names
+    MONSTER_NAMES[:] = pack.monster_names
+    ROOM_IDS.clear()
+    ROOM_IDS.update((name, i) for i, name in enumerate(ROOM_NAMES))
+    ITEM_BITS.clear()
+    ITEM_BITS.update((name, 1 << i) for i, name in enumerate(ITEM_NAMES[:ITEM_MASK_BITS]))
+    MONSTER_BITS.clear()
+    MONSTER_BITS.update((name, 1 << i) for i, name in enumerate(MONSTER_NAMES[:MONSTER_MASK_BITS]))
+    ROOM_DESCRIPTIONS[:] = [None, world.entry_hall()["description"], world.throne_room()["description"]] + \
+        pack.room_descriptions
+
+
+content.subscribe(_apply_content)
+
+LOCKED = 0x01
+DARK = 0x02
+DIRECTIONS = ["north", "south", "east", "west"]
+EXIT_BITS = {direction: 0x10 << i for i, direction in enumerate(DIRECTIONS)}
+EXIT_MASK = 0xF0
+
+
+def _names(mask, names):
+    """Expand a bitmask into the registry names it holds, in registry order."""
+    result = []
+    i = 0
+    while mask:
+        if mask & 1:
+            result.append(names[i])
+        mask >>= 1
+        i += 1
+    return result
+
+
+def _mask(values, bits):
+    """Return the bitmask for a list of names, or None if it cannot be represented as one."""
+    mask = 0
+    for value in values:
+        bit = bits.get(value)
+        if bit is None or mask & bit:
+            return None
+        mask |= bit
+    return mask
+
+
+class RoomStore:
+    """Struct-of-arrays storage for every cell from grid_min to grid_max on both axes."""
+
+    def __init__(self, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX):
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.width = grid_max - grid_min + 1
+        cells = self.width * self.width
+        self.types = bytearray(cells)
+        self.flags = bytearray(cells)
+        self.item_masks = array("H", bytes(2 * cells))
+        self.monster_masks = bytearray(cells)
+        self.overflow_items = {}     # index -> list, for item lists that are not a set of known items
+        self.overflow_monsters = {}  # index -> list, likewise for monsters
+
+    @classmethod
+    def from_grid(cls, grid_rooms, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX):
+        """Build a store holding the same rooms as a grid_rooms dict."""
+        store = cls(grid_min, grid_max)
+        for coord, room in grid_rooms.items():
+            store.set_room(coord, room)
+        store.compute_exits()
+        return store
+
+    # -------------------------------
+    # Addressing
+    # -------------------------------
+    def index(self, coord):
+        """Return the array index of coord, or -1 if it lies outside the grid."""
+        x = coord[0] - self.grid_min
+        y = coord[1] - self.grid_min
+        if 0 <= x < self.width and 0 <= y < self.width:
+            return x * self.width + y
+        return -1
+
+    def coord(self, index):
+        return (index // self.width + self.grid_min, index % self.width + self.grid_min)
+
+    # -------------------------------
+    # Whole-room access
+    # -------------------------------
+    def set_room(self, coord, room):
+        """Store a room dict at coord (its exits are recomputed by compute_exits)."""
+        i = self.index(coord)
+        if i < 0:
+            raise KeyError(coord)
+        self.types[i] = ROOM_IDS[room["name"]]
+        self.flags[i] = (LOCKED if room["locked"] else 0) | (DARK if room["dark"] else 0)
+        self.set_items(i, room["items"])
+        self.set_monsters(i, room["monsters"])
+
+    def compute_exits(self):
+        """Set every room's exit mask from which of its four neighbours hold a room."""
+        types, flags, width = self.types, self.flags, self.width
+        for i in range(len(types)):
+            if not types[i]:
+                continue
+            y = i % width
+            mask = 0
+            if y + 1 < width and types[i + 1]:
+                mask |= EXIT_BITS["north"]
+            if y > 0 and types[i - 1]:
+                mask |= EXIT_BITS["south"]
+            if i + width < len(types) and types[i + width]:
+                mask |= EXIT_BITS["east"]
+            if i >= width and types[i - width]:
+                mask |= EXIT_BITS["west"]
+            flags[i] = (flags[i] & ~EXIT_MASK) | mask
+
+    def get_items(self, i):
+        overflow = self.overflow_items.get(i)
+        return list(overflow) if overflow is not None else _names(self.item_masks[i], ITEM_NAMES)
+
+    def set_items(self, i, values):
+        mask = _mask(values, ITEM_BITS)
+        if mask is None:
+            self.item_masks[i] = 0
+            self.overflow_items[i] = list(values)
+        else:
+            self.item_masks[i] = mask
+            self.overflow_items.pop(i, None)
+
+    def get_monsters(self, i):
+        overflow = self.overflow_monsters.get(i)
+        return list(overflow) if overflow is not None else _names(self.monster_masks[i], MONSTER_NAMES)
+
+    def set_monsters(self, i, values):
+        mask = _mask(values, MONSTER_BITS)
+        if mask is None:
+            self.monster_masks[i] = 0
+            self.overflow_monsters[i] = list(values)
+        else:
+            self.monster_masks[i] = mask
+            self.overflow_monsters.pop(i, None)
+
+    def exits(self, i):
+        """Return the exits dict of the room at index i, derived from its exit mask."""
+        flags = self.flags[i]
+        x, y = self.coord(i)
+        exits = {}
+        for direction in DIRECTIONS:
+            if flags & EXIT_BITS[direction]:
+                dx, dy = get_offset(direction)
+                exits[direction] = (x + dx, y + dy)
+        return exits
+
+    def has_item(self, coord, item_name):
+        """Membership test without materialising the item list."""
+        i = self.index(coord)
+        if i < 0 or not self.types[i]:
+            return False
+        overflow = self.overflow_items.get(i)
+        if overflow is not None:
+            return item_name in overflow
+        return bool(self.item_masks[i] & ITEM_BITS.get(item_name, 0))
+
+    def iter_contents(self):
+        """Yield (coord, items, monsters) for every room that holds anything, straight from the arrays."""
+        types, item_masks, monster_masks = self.types, self.item_masks, self.monster_masks
+        width, grid_min = self.width, self.grid_min
+        for i in range(len(types)):
+            if types[i] and (item_masks[i] or monster_masks[i] or i in self.overflow_items
+                             or i in self.overflow_monsters):
+                yield ((i // width + grid_min, i % width + grid_min), self.get_items(i), self.get_monsters(i))
+
+    def nbytes(self):
+        """Bytes held by the arrays and overflow lists (excluding per-object overhead of the store itself)."""
+        total = len(self.types) + len(self.flags) + self.item_masks.itemsize * len(self.item_masks) + len(self.monster_masks)
+        for overflow in (self.overflow_items, self.overflow_monsters):
+            total += sum(64 + 8 * len(values) for values in overflow.values())
+        return total
+
+    def room_count(self):
+        return len(self.types) - self.types.count(0)
+
+    # -------------------------------
+    # grid_rooms interface
+    # -------------------------------
+    def get(self, coord, default=None):
+        i = self.index(coord)
+        if i < 0 or not self.types[i]:
+            return default
+        return RoomView(self, i)
+
+    def __getitem__(self, coord):
+        room = self.get(coord)
+        if room is None:
+            raise KeyError(coord)
+        return room
+
+    def __contains__(self, coord):
+        i = self.index(coord)
+        return i >= 0 and self.types[i] != 0
+
+    def __iter__(self):
+        types = self.types
+        for i in range(len(types)):
+            if types[i]:
+                yield self.coord(i)
+
+    def __len__(self):
+        return self.room_count()
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for coord in self:
+            yield coord, self.get(coord)
+
+    def values(self):
+        for coord in self:
+            yield self.get(coord)
+
+
+class RoomList(MutableSequence):
+    """A room's items or monsters list, read from and written back to the store."""
+
+    def __init__(self, store, cell, field):
+        self.store = store
+        self.cell = cell
+        self.getter = getattr(store, "get_" + field)
+        self.setter = getattr(store, "set_" + field)
+
+    def __getitem__(self, i):
+        return self.getter(self.cell)[i]
+
+    def __setitem__(self, i, value):
+        values = self.getter(self.cell)
+        values[i] = value
+        self.setter(self.cell, values)
+
+    def __delitem__(self, i):
+        values = self.getter(self.cell)
+        del values[i]
+        self.setter(self.cell, values)
+
+    def __len__(self):
+        return len(self.getter(self.cell))
+
+    def __iter__(self):
+        return iter(self.getter(self.cell))
+
+    def __contains__(self, value):
+        return value in self.getter(self.cell)
+
+    def __eq__(self, other):
+        return self.getter(self.cell) == list(other)
+
+    def __repr__(self):
+        return repr(self.getter(self.cell))
+
+    def insert(self, i, value):
+        values = self.getter(self.cell)
+        values.insert(i, value)
+        self.setter(self.cell, values)
+
+    def clear(self):
+        self.setter(self.cell, [])
+
+
+class RoomView:
+    """Dict-like view of one room in a RoomStore; writes go straight to the arrays."""
+
+    __slots__ = ("store", "index")
+
+    KEYS = ("name", "description", "items", "exits", "locked", "dark", "monsters")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store, i = self.store, self.index
+        if key == "locked":
+            return bool(store.flags[i] & LOCKED)
+        if key == "dark":
+            return bool(store.flags[i] & DARK)
+        if key == "items":
+            return RoomList(store, i, "items")
+        if key == "monsters":
+            return RoomList(store, i, "monsters")
+        if key == "exits":
+            return store.exits(i)
+        if key == "name":
+            return ROOM_NAMES[store.types[i]]
+        if key == "description":
+            return ROOM_DESCRIPTIONS[store.types[i]]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        store, i = self.store, self.index
+        if key == "locked":
+            store.flags[i] = (store.flags[i] | LOCKED) if value else (store.flags[i] & ~LOCKED)
+        elif key == "dark":
+            store.flags[i] = (store.flags[i] | DARK) if value else (store.flags[i] & ~DARK)
+        elif key == "items":
+            store.set_items(i, value)
+        elif key == "monsters":
+            store.set_monsters(i, value)
+        else:
+            raise KeyError(f"{key!r} cannot be changed on a stored room")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        return self[key]
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        """Return a plain room dict with the same content."""
+        return {key: (list(self[key]) if key in ("items", "monsters") else self[key]) for key in self.KEYS}
+
+    def __eq__(self, other):
+        if isinstance(other, RoomView):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return f"RoomView({self.to_dict()!r})"
@@ -0,0 +1,178 @@
+"""
+NumPy-vectorized world generation.
+
+Draws every roll initialize_grid() and create_random_room() make, but as whole arrays from
+a seeded numpy.random.Generator, and computes exits with shifted-array ANDs instead of
+per-room dict lookups. Arrays are indexed [x - grid_min, y - grid_min], the same layout as
+RoomStore, so a generated world can be copied into a store without touching single rooms.
+
+The world follows the same distributions as initialize_grid() but not the same sequence of
+random numbers, so a seed gives a different (equally valid) world than the loop generator.
+"""
+from array import array
+from itertools import combinations
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from . import world
+from .inventory import ItemBag
+from .store import (RoomStore, ROOM_IDS, ITEM_BITS, MONSTER_BITS, LOCKED, DARK, EXIT_BITS,
+                    ROOM_NAMES, ITEM_NAMES, MONSTER_NAMES, ROOM_DESCRIPTIONS, _names)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("vectorized generation requires numpy (pip install numpy)")
+
+
+def _require_bits():
+    """Spawn items and monsters are sampled as bitmasks, so every one of them needs a bit."""
+    for pool, bits, kind in ((world.items_pool, ITEM_BITS, "item"), (world.monsters_pool, MONSTER_BITS, "monster")):
+        missing = [name for name in pool if name not in bits]
+        if missing:
+            raise ValueError(f"vectorized generation needs a bitmask bit for every spawn {kind}; "
+                             f"{len(missing)} (such as {missing[0]!r}) have none")
+
+
+def _subset_masks(names, bits, size):
+    """Bitmasks of every size-element subset of names, for uniform table-driven sampling."""
+    return np.array([sum(bits[name] for name in subset) for subset in combinations(names, size)])
+
+
+def roll_rooms(rng, xs, ys):
+    """
+    Roll the rooms of the cells at x coordinates xs (a column) and y coordinates ys (a row),
+    forced cells included, and return (present, types, flags, item_masks, monster_masks)
+    arrays without exits.
+    """
+    _require_bits()
+    shape = (len(xs), ys.shape[1])
+
+    # Room presence and type.
+    present = rng.random(shape) < world.ROOM_PROBABILITY
+    types = (rng.integers(0, len(world.room_types), shape, dtype=np.uint8) + ROOM_IDS[world.room_types[0]])
+
+    # Locked (30%) and dark (50%) flags.
+    flags = np.where(rng.random(shape) < 0.3, LOCKED, 0).astype(np.uint8)
+    flags |= np.where(rng.integers(0, 2, shape, dtype=np.uint8) == 1, DARK, 0).astype(np.uint8)
+
+    # 1-3 distinct items: pick the count, then a uniformly random subset of that size.
+    item_counts = rng.integers(1, min(3, len(world.items_pool)) + 1, shape)
+    item_picks = rng.random(shape)
+    item_masks = np.zeros(shape, dtype=np.uint16)
+    for count in range(1, min(3, len(world.items_pool)) + 1):
+        table = _subset_masks(world.items_pool, ITEM_BITS, count)
+        chosen = table[(item_picks * len(table)).astype(np.int64)]
+        item_masks = np.where(item_counts == count, chosen, item_masks).astype(np.uint16)
+
+    # Monsters: 50% none, 30% one, 20% two distinct.
+    monster_roll = rng.random(shape)
+    monster_picks = rng.random(shape)
+    one = _subset_masks(world.monsters_pool, MONSTER_BITS, 1)
+    two = _subset_masks(world.monsters_pool, MONSTER_BITS, min(2, len(world.monsters_pool)))
+    monster_masks = np.where(monster_roll < 0.5, 0,
+                             np.where(monster_roll < 0.8,
+                                      one[(monster_picks * len(one)).astype(np.int64)],
+                                      two[(monster_picks * len(two)).astype(np.int64)])).astype(np.uint8)
+
+    # Forced cells: no rooms on the centre column below the entry hall, then the two fixed rooms.
+    present &= ~((xs == 0) & (ys < 0))
+    x_min, y_min = int(xs[0, 0]), int(ys[0, 0])
+    for coord, make_room in (((0, 0), world.entry_hall), ((0, 1), world.throne_room)):
+        x, y = coord[0] - x_min, coord[1] - y_min
+        if 0 <= x < shape[0] and 0 <= y < shape[1]:
+            room = make_room()
+            present[x, y] = True
+            types[x, y] = ROOM_IDS[room["name"]]
+            flags[x, y] = 0
+            item_masks[x, y] = sum(ITEM_BITS[item] for item in room["items"])
+            monster_masks[x, y] = 0
+    types[~present] = 0
+    flags[~present] = 0
+    item_masks[~present] = 0
+    monster_masks[~present] = 0
+    return present, types, flags, item_masks, monster_masks
+
+
+def exit_flags(present):
+    """
+    The exit bits of every cell of present, from which neighbours hold a room. present may carry
+    a one-cell border of neighbouring cells (see parallelgen); the result has present's shape.
+    """
+    shape = present.shape
+    flags = np.zeros(shape, dtype=np.uint8)
+    # A room has an exit wherever the shifted presence array says its neighbour exists.
+    flags[:, :-1] |= np.where(present[:, :-1] & present[:, 1:], EXIT_BITS["north"], 0).astype(np.uint8)
+    flags[:, 1:] |= np.where(present[:, 1:] & present[:, :-1], EXIT_BITS["south"], 0).astype(np.uint8)
+    flags[:-1, :] |= np.where(present[:-1, :] & present[1:, :], EXIT_BITS["east"], 0).astype(np.uint8)
+    flags[1:, :] |= np.where(present[1:, :] & present[:-1, :], EXIT_BITS["west"], 0).astype(np.uint8)
+    return flags
+
+
+def generate_arrays(seed, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX):
+    """
+    Generate a world as arrays and return a dict of them:
+      - types (uint8):         room type id from store.ROOM_NAMES, 0 for no room;
+      - flags (uint8):         LOCKED, DARK and the four EXIT_BITS;
+      - item_masks (uint16):   bitmask over store.ITEM_NAMES;
+      - monster_masks (uint8): bitmask over store.MONSTER_NAMES.
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    xs = np.arange(grid_min, grid_max + 1)[:, None]
+    ys = np.arange(grid_min, grid_max + 1)[None, :]
+    present, types, flags, item_masks, monster_masks = roll_rooms(rng, xs, ys)
+    flags |= exit_flags(present)
+
+    # Silver keys go into randomly selected rooms, excluding the forced ones.
+    candidates = np.flatnonzero(present & (types > ROOM_IDS["throne_room"]))
+    keys = min(world.secret_keys_needed, len(candidates))
+    chosen = rng.choice(candidates, size=keys, replace=False)
+    item_masks.reshape(-1)[chosen] |= ITEM_BITS["silver key"]
+
+    return {"types": types, "flags": flags, "item_masks": item_masks, "monster_masks": monster_masks}
+
+
+def generate_store(seed, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX):
+    """Generate a world straight into a RoomStore, without building any room dicts."""
+    arrays = generate_arrays(seed, grid_min, grid_max)
+    store = RoomStore(grid_min, grid_max)
+    store.types[:] = arrays["types"].tobytes()
+    store.flags[:] = arrays["flags"].tobytes()
+    store.item_masks = array("H", arrays["item_masks"].astype(np.uint16).tobytes())
+    store.monster_masks[:] = arrays["monster_masks"].tobytes()
+    return store
+
+
+def generate_grid(seed, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX):
+    """Generate a world and return it as a grid_rooms dict, like initialize_grid() does."""
+    arrays = generate_arrays(seed, grid_min, grid_max)
+    xs, ys = np.nonzero(arrays["types"])
+    # Convert to Python ints once, in bulk, rather than element by element.
+    cells = zip((xs + grid_min).tolist(), (ys + grid_min).tolist(), arrays["types"][xs, ys].tolist(),
+                arrays["flags"][xs, ys].tolist(), arrays["item_masks"][xs, ys].tolist(),
+                arrays["monster_masks"][xs, ys].tolist())
+    grid_rooms = {}
+    for x, y, room_type, room_flags, items, monsters in cells:
+        exits = {}
+        if room_flags & EXIT_BITS["north"]:
+            exits["north"] = (x, y + 1)
+        if room_flags & EXIT_BITS["south"]:
+            exits["south"] = (x, y - 1)
+        if room_flags & EXIT_BITS["east"]:
+            exits["east"] = (x + 1, y)
+        if room_flags & EXIT_BITS["west"]:
+            exits["west"] = (x - 1, y)
+        grid_rooms[(x, y)] = {
+            "name": ROOM_NAMES[room_type],
+            "description": ROOM_DESCRIPTIONS[room_type],
+            "items": ItemBag(_names(items, ITEM_NAMES)),
+            "exits": exits,
+            "locked": bool(room_flags & LOCKED),
+            "dark": bool(room_flags & DARK),
+            "monsters": _names(monsters, MONSTER_NAMES),
+        }
+    return grid_rooms
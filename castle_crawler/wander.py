@@ -0,0 +1,339 @@
+"""
+Wandering monsters: a world clock that moves monsters between turns, near players only.
+
+The world is hashed into square regions of REGION_SIZE cells. A region is active while a
+player is within ACTIVE_RADIUS regions of it; only monsters in active regions are simulated.
+Every region counts the players within reach of it, updated only when a player changes
+region, and players are bucketed by the region they are in, so hunting and respawning look only
+at the regions nearby and a command costs the same however many players there are.
+Each simulated monster is a wanderer with its next move in a priority queue keyed by world
+turn, so a tick pops only the moves that are due instead of visiting every room:
+  - a wanderer moves every MOVE_EVERY turns (drawn per move), through the room's exits and
+    never into a locked room (monsters carry no silver keys), the rules move() applies;
+  - within HUNT_RADIUS moves of a player it steps towards the nearest one, and stays put
+    once it shares the player's room;
+  - a killed monster respawns RESPAWN_TURNS later in a random open room of its region,
+    chosen from the region's open rooms in one pass.
+
+A wanderer whose move comes due outside the active regions is parked with its region. When a
+player comes near again the parked wanderers are fast-forwarded without replaying their moves:
+after more than MIX_STEPS moves a random walk has forgotten where it started, so the wanderer
+is placed by the walk's stationary distribution (open rooms of its region reachable from
+where it was parked, weighted by their open exits); fewer moves are simply walked. Monsters of
+a region no player has been near yet start wandering when it first becomes active.
+
+One Wanderers serves every game on a world (like its WorldIndex). The clock advances one turn
+per round of commands: a round ends when a player who has already acted in it acts again, so
+monsters move as fast with many players as with one, and an idle player never holds the world
+up. A single player advances it on every command.
+"""
+import heapq
+import itertools
+import random
+from collections import Counter
+
+from . import content
+
+REGION_SIZE = 8
+ACTIVE_RADIUS = 1       # Regions simulated around a player's region, in each direction.
+MOVE_EVERY = (3, 8)     # Turns between two moves of a wanderer, drawn uniformly.
+HUNT_RADIUS = 6
+RESPAWN_TURNS = 200
+MIX_STEPS = 64
+
+_MOVE, _RESPAWN = 0, 1
+
+
+class Wanderers:
+    """
+    The wandering monsters of one world.
+      - grid_rooms: the world (a dict, RoomStore or ChunkedWorld).
+      - seed: seeds the moves, so a world's monsters wander the same way every time.
+    """
+
+    def __init__(self, grid_rooms, seed=0, region_size=REGION_SIZE, active_radius=ACTIVE_RADIUS):
+        self.grid_rooms = grid_rooms
+        self.rng = random.Random(seed)
+        self.region_size = region_size
+        self.active_radius = active_radius
+        self.turn = 0
+        self.queue = []                # (due turn, sequence, kind, wanderer id or coord)
+        self.sequence = itertools.count()
+        self.wanderers = {}            # id -> [monster name, coord]
+        self.next_id = itertools.count()
+        self.at = {}                   # coord -> ids of the wanderers there
+        self.players = {}              # player token -> coord
+        self.in_region = {}            # region -> Counter of the coords of the players in it
+        self.acted = set()             # Players who have run a command this turn.
+        self.active = Counter()        # Regions being simulated -> players within reach of them.
+        self.seen = set()              # Regions whose monsters have been picked up as wanderers.
+        self.parked = {}               # region -> [(wanderer id, turn parked)]
+        self.moves = 0                 # Moves simulated, for benchmarks.
+
+    def region_of(self, coord):
+        return (coord[0] // self.region_size, coord[1] // self.region_size)
+
+    # -------------------------------
+    # Players
+    # -------------------------------
+    def place_player(self, token, coord):
+        """
+        Record where a player is (None or a special room: not on the grid) and return the regions
+        that became active, in order, for the caller to activate.
+        """
+        old = self.players.get(token)
+        if isinstance(coord, tuple):
+            self.players[token] = coord
+        else:
+            self.players.pop(token, None)
+            coord = None
+        if old == coord:
+            return []
+        before = None if old is None else self.region_of(old)
+        after = None if coord is None else self.region_of(coord)
+        if old is not None:
+            here = self.in_region[before]
+            here[old] -= 1
+            if not here[old]:
+                del here[old]
+                if not here:
+                    del self.in_region[before]
+        if coord is not None:
+            self.in_region.setdefault(after, Counter())[coord] += 1
+        if before == after:
+            return []
+        woken = []
+        if after is not None:  # Counted up before counting down, so a shared region never drops to 0.
+            for region in self.reach(after):
+                self.active[region] += 1
+                if self.active[region] == 1:
+                    woken.append(region)
+        if before is not None:
+            for region in self.reach(before):
+                self.active[region] -= 1
+                if not self.active[region]:
+                    del self.active[region]
+        return sorted(woken)
+
+    def reach(self, region):
+        """The regions a player in region keeps active."""
+        r = self.active_radius
+        rx, ry = region
+        return [(x, y) for x in range(rx - r, rx + r + 1) for y in range(ry - r, ry + r + 1)]
+
+    def leave(self, token):
+        """Forget a player who quit; regions only they kept active go quiet at once."""
+        self.place_player(token, None)
+        self.acted.discard(token)
+
+    def activate(self, region, game):
+        if region not in self.seen:
+            self.seen.add(region)
+            self.pick_up(region)
+        for wanderer_id, since in self.parked.pop(region, ()):
+            if wanderer_id in self.wanderers:
+                self.fast_forward(wanderer_id, self.turn - since, game)
+                self.schedule(wanderer_id)
+
+    def pick_up(self, region):
+        """Turn the monsters of a region's rooms into wanderers (except those already tracked)."""
+        size = self.region_size
+        x0, y0 = region[0] * size, region[1] * size
+        get = self.grid_rooms.get
+        for x in range(x0, x0 + size):
+            for y in range(y0, y0 + size):
+                room = get((x, y))
+                if room is None or not room["monsters"]:
+                    continue
+                known = Counter(self.wanderers[wanderer_id][0] for wanderer_id in self.at.get((x, y), ()))
+                for name in room["monsters"]:
+                    if known[name]:
+                        known[name] -= 1
+                        continue
+                    self.schedule(self.add(name, (x, y)))
+
+    def add(self, name, coord):
+        wanderer_id = next(self.next_id)
+        self.wanderers[wanderer_id] = [name, coord]
+        self.at.setdefault(coord, []).append(wanderer_id)
+        return wanderer_id
+
+    # -------------------------------
+    # Clock
+    # -------------------------------
+    def schedule(self, wanderer_id):
+        due = self.turn + self.rng.randint(*MOVE_EVERY)
+        heapq.heappush(self.queue, (due, next(self.sequence), _MOVE, wanderer_id))
+
+    def tick(self, game):
+        """
+        Account for a command of game: advance the world one turn if it starts a new round, and
+        return the moves made as (monster name, from coord, to coord, hunting) tuples.
+        """
+        token = game.wander_token
+        for region in self.place_player(token, game.player_state["position"]):
+            self.activate(region, game)
+        if self.acted and token not in self.acted:
+            self.acted.add(token)
+            return []
+        self.acted = {token}
+        self.turn += 1
+        moves = []
+        queue = self.queue
+        while queue and queue[0][0] <= self.turn:
+            due, _, kind, target = heapq.heappop(queue)
+            if kind == _RESPAWN:
+                self.respawn(target, game)
+                continue
+            wanderer = self.wanderers.get(target)
+            if wanderer is None:
+                continue  # Killed since the move was scheduled.
+            region = self.region_of(wanderer[1])
+            if region not in self.active:
+                self.parked.setdefault(region, []).append((target, due))
+                continue
+            move = self.step(target, game)
+            if move is not None:
+                moves.append(move)
+            self.schedule(target)
+        return moves
+
+    # -------------------------------
+    # Moving monsters
+    # -------------------------------
+    def open_exits(self, coord):
+        """Grid rooms a monster in the room at coord can move to: through an exit, not locked."""
+        room = self.grid_rooms.get(coord)
+        if room is None:
+            return []
+        get = self.grid_rooms.get
+        targets = []
+        for target in room["exits"].values():
+            if isinstance(target, tuple):
+                neighbour = get(target)
+                if neighbour is not None and not neighbour["locked"]:
+                    targets.append(target)
+        return targets
+
+    def step(self, wanderer_id, game):
+        """Move one wanderer one room (towards a nearby player if there is one); return the move."""
+        name, coord = self.wanderers[wanderer_id]
+        prey = self.nearest_player(coord)
+        if prey is not None and prey == coord:
+            return None  # Found a player; stay and fight.
+        targets = self.open_exits(coord)
+        if not targets:
+            return None
+        if prey is not None:
+            px, py = prey
+            best = min(abs(x - px) + abs(y - py) for x, y in targets)
+            targets = [(x, y) for x, y in targets if abs(x - px) + abs(y - py) == best]
+        target = targets[0] if len(targets) == 1 else self.rng.choice(targets)
+        self.relocate(wanderer_id, target, game)
+        return name, coord, target, prey is not None
+
+    def nearest_player(self, coord):
+        """The closest player within HUNT_RADIUS moves of coord (the lowest coord of a tie), or None."""
+        x, y = coord
+        best, best_distance = None, HUNT_RADIUS + 1
+        x0, y0 = self.region_of((x - HUNT_RADIUS, y - HUNT_RADIUS))
+        x1, y1 = self.region_of((x + HUNT_RADIUS, y + HUNT_RADIUS))
+        in_region = self.in_region
+        for rx in range(x0, x1 + 1):
+            for ry in range(y0, y1 + 1):
+                for player in in_region.get((rx, ry), ()):
+                    distance = abs(player[0] - x) + abs(player[1] - y)
+                    if distance < best_distance or (distance == best_distance and best is not None and player < best):
+                        best, best_distance = player, distance
+        return best
+
+    def relocate(self, wanderer_id, target, game):
+        """Move a wanderer's monster from its room's monster list to target's."""
+        wanderer = self.wanderers[wanderer_id]
+        name, source = wanderer
+        source_room, target_room = self.grid_rooms.get(source), self.grid_rooms.get(target)
+        source_room["monsters"].remove(name)
+        target_room["monsters"].append(name)
+        wanderer[1] = target
+        self.untrack(source, wanderer_id)
+        self.at.setdefault(target, []).append(wanderer_id)
+        self.moves += 1
+        game.room_changed(source)
+        game.room_changed(target)
+        if game.world_index is not None:
+            game.world_index.monster_removed(source, name, source_room)
+            game.world_index.monster_added(target, name)
+
+    def untrack(self, coord, wanderer_id):
+        ids = self.at[coord]
+        ids.remove(wanderer_id)
+        if not ids:
+            del self.at[coord]
+
+    def fast_forward(self, wanderer_id, turns, game):
+        """Move a parked wanderer to where turns' worth of random moves would likely have taken it."""
+        steps = turns * 2 // sum(MOVE_EVERY)
+        if steps <= MIX_STEPS:
+            for _ in range(steps):
+                targets = self.open_exits(self.wanderers[wanderer_id][1])
+                if not targets:
+                    break
+                self.relocate(wanderer_id, self.rng.choice(targets), game)
+            return
+        coord = self.wanderers[wanderer_id][1]
+        region = self.region_of(coord)
+        rooms, weights = [], []
+        seen, frontier = {coord}, [coord]
+        while frontier:
+            here = frontier.pop()
+            exits = [target for target in self.open_exits(here) if self.region_of(target) == region]
+            if here != coord or not self.grid_rooms.get(coord)["locked"]:
+                rooms.append(here)
+                weights.append(len(exits))
+            for target in exits:
+                if target not in seen:
+                    seen.add(target)
+                    frontier.append(target)
+        if sum(weights):
+            target = self.rng.choices(rooms, weights)[0]
+            if target != coord:
+                self.relocate(wanderer_id, target, game)
+
+    # -------------------------------
+    # Deaths & respawns
+    # -------------------------------
+    def killed(self, coord, name):
+        """A player killed name at coord: forget its wanderer and schedule a respawn in its region."""
+        for wanderer_id in self.at.get(coord, ()):
+            if self.wanderers[wanderer_id][0] == name:
+                break
+        else:
+            return  # A monster of a region no player has been near yet: it never wandered.
+        del self.wanderers[wanderer_id]
+        self.untrack(coord, wanderer_id)
+        heapq.heappush(self.queue, (self.turn + RESPAWN_TURNS, next(self.sequence), _RESPAWN, coord))
+
+    def respawn(self, coord, game):
+        """
+        Put a new monster in a random open room of coord's region, away from players. A region
+        without one (every open room taken by a player) gets no monster back.
+        """
+        size = self.region_size
+        rx, ry = self.region_of(coord)
+        get = self.grid_rooms.get
+        taken = self.in_region.get((rx, ry), ())
+        rooms = []
+        for x in range(rx * size, rx * size + size):
+            for y in range(ry * size, ry * size + size):
+                room = get((x, y))
+                if room is not None and not room["locked"] and (x, y) not in taken:
+                    rooms.append((x, y))
+        if not rooms:
+            return
+        target = self.rng.choice(rooms)
+        name = self.rng.choice(content.active().spawn_monsters)
+        get(target)["monsters"].append(name)
+        game.room_changed(target)
+        if game.world_index is not None:
+            game.world_index.monster_added(target, name)
+        self.schedule(self.add(name, target))
@@ -0,0 +1,240 @@
+import copy
+import random
+
+from . import content
+from .inventory import ITEMS, ItemBag
+
+# ===============================
+# GRID CONFIGURATION & GLOBALS
+# ===============================
+GRID_MIN = -5       # Minimum x/y coordinate
+GRID_MAX = 5        # Maximum x/y coordinate
+ROOM_PROBABILITY = 0.7  # Chance a cell (non-forced) gets a room
+
+# -------------------------------
+# Secret Path Variables
+# -------------------------------
+# The secret sequence of moves to eventually trigger the Final Boss Room.
+secret_sequence = ["east", "north", "west", "south", "east", "north", "west", "south"]
+# Indices (0-indexed) that are locked and require a silver key.
+secret_locked_indices = {1, 4, 6}
+secret_keys_needed = len(secret_locked_indices)  # Number of silver keys to distribute and require in secret moves
+
+# ===============================
+# Room Types, Items & Monsters
+# ===============================
+# Filled from the active content pack (see content.py), in place, so modules that imported
+# these tables see a pack installed later. Room types are numbered by position in room_types.
+room_types = []
+room_descriptions = []          # By room type id.
+room_type_descriptions = {}
+items_pool = []                 # The items random rooms draw from.
+monsters_pool = []              # The monsters random rooms draw from.
+item_names = []                 # Every item the castle knows about, in item-id order.
+
+
+def _apply_content(pack):
+    room_types[:] = pack.room_names
+    room_descriptions[:] = pack.room_descriptions
+    room_type_descriptions.clear()
+    room_type_descriptions.update(zip(pack.room_names, pack.room_descriptions))
+    items_pool[:] = pack.spawn_items
+    monsters_pool[:] = pack.spawn_monsters
+    item_names[:] = pack.item_names
+    for name in item_names:
+        ITEMS.intern(name)
+
+
+content.subscribe(_apply_content)
+
+# ===============================
+# SPECIAL ROOMS (Not on the Grid)
+# ===============================
+SPECIAL_ROOMS = {
+    "final_boss_room": {
+        "name": "final_boss_room",
+        "description": ("You have entered the final chamber. A massive figure looms before you—the Final Boss, "
+                        "radiating unfathomable malice. This is the threshold to the treasure..."),
+        "items": [],
+        "exits": {},  # To be set dynamically.
+        "locked": False,
+        "dark": False,
+        "monsters": ["final boss"]
+    },
+    "secret_treasure_room": {
+        "name": "secret_treasure_room",
+        "description": ("Incredible! You've discovered the secret treasure room filled with riches beyond imagination. "
+                        "Glittering gold, rare weapons, enchanted armor, and ancient relics are piled high."),
+        "items": ["legendary sword", "enchanted armor", "infinite health potion", "golden crown"],
+        "exits": {},
+        "locked": False,
+        "dark": False,
+        "monsters": []
+    }
+}
+
+# ===============================
+# PLAYER STATE
+# ===============================
+# The player's "position" is a tuple for grid rooms, or a string key if in a special room.
+PLAYER_STATE = {
+    "position": (0, 0),       # Starting at (0,0) – the Entry Hall.
+    "inventory": ItemBag(),
+    "health": 100,
+    "torch_active": False,    # If True, a torch is active and will burn out on the next move.
+    # Equipment slots: one each for helmet, armor, shield, boots, gloves; two weapon slots.
+    "equipment": dict.fromkeys(content.EQUIPMENT_SLOTS),
+    "last_room": None         # Stores the grid coordinate from which the player entered the Final Boss Room.
+}
+
+
+def new_special_rooms():
+    """Return a fresh copy of the special rooms, safe to mutate for one game."""
+    rooms = copy.deepcopy(SPECIAL_ROOMS)
+    for room in rooms.values():
+        room["items"] = ItemBag(room["items"])
+    return rooms
+
+
+def new_player_state():
+    """Return a fresh player state starting in the Entry Hall."""
+    return copy.deepcopy(PLAYER_STATE)
+
+
+# ===============================
+# HELPER FUNCTIONS
+# ===============================
+_OFFSETS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+
+
+def get_offset(direction):
+    """Return (dx, dy) for the given cardinal direction."""
+    return _OFFSETS.get(direction, (0, 0))
+
+
+# ===============================
+# ROOM GENERATION FUNCTIONS
+# ===============================
+def entry_hall():
+    """Return the forced Entry Hall room at (0, 0)."""
+    return {
+        "name": "entry_hall",
+        "description": ("You stand in a bright, welcoming entry hall of Castle Crawler. "
+                        "Sunlight streams through a stained-glass window."),
+        "items": ItemBag(["torch", "sword"]),
+        "exits": {},
+        "locked": False,
+        "dark": False,
+        "monsters": []
+    }
+
+
+def throne_room():
+    """Return the forced Throne Room at (0, 1)."""
+    return {
+        "name": "throne_room",
+        "description": "You enter the grand throne room, echoes of past royalty haunting the air.",
+        "items": ItemBag(),
+        "exits": {},
+        "locked": False,
+        "dark": False,
+        "monsters": []
+    }
+
+
+def create_random_room(room_type, rng=random):
+    """Create a random room of the room type named room_type (see create_room)."""
+    return create_room(room_types.index(room_type), rng)
+
+
+def create_room(type_id, rng=random):
+    """
+    Create a random room of the room type numbered type_id in room_types.
+      - The room's name and description are the content's strings for that type.
+      - It gets 1–3 items randomly chosen from the items pool.
+      - It has a random chance to be dark.
+      - It gets a random list of monsters.
+      - It is marked as locked with a 30% chance.
+    All rolls are drawn from rng, so a seeded random.Random gives a repeatable room.
+    """
+    room = {
+        "name": room_types[type_id],
+        "description": room_descriptions[type_id],
+        "items": ItemBag(rng.sample(items_pool, rng.randint(1, min(3, len(items_pool))))),
+        "exits": {},  # Exits will be computed later.
+        "locked": (rng.random() < 0.3),  # 30% chance the room is locked.
+        "dark": rng.choice([True, False]),
+        "monsters": []
+    }
+    # Determine monsters: 50% chance no monster; 30% one monster; 20% two monsters.
+    roll = rng.random()
+    if roll < 0.5:
+        room["monsters"] = []
+    elif roll < 0.8:
+        room["monsters"] = [rng.choice(monsters_pool)]
+    else:
+        if len(monsters_pool) >= 2:
+            room["monsters"] = rng.sample(monsters_pool, 2)
+        else:
+            room["monsters"] = [rng.choice(monsters_pool)]
+    return room
+
+
+def compute_exits(grid_rooms):
+    """Compute exits for each room based on adjacent coordinates."""
+    for (x, y), room in grid_rooms.items():
+        exits = {}
+        if (x, y + 1) in grid_rooms:
+            exits["north"] = (x, y + 1)
+        if (x, y - 1) in grid_rooms:
+            exits["south"] = (x, y - 1)
+        if (x + 1, y) in grid_rooms:
+            exits["east"] = (x + 1, y)
+        if (x - 1, y) in grid_rooms:
+            exits["west"] = (x - 1, y)
+        room["exits"] = exits
+
+
+def initialize_grid(rng=random, grid_min=GRID_MIN, grid_max=GRID_MAX):
+    """
+    Pre-generate the grid for coordinates from grid_min to grid_max and return it.
+      - Each cell (other than forced ones) gets a room with probability ROOM_PROBABILITY.
+      - Forced cells: (0,0) is the Entry Hall; (0,1) is the Throne Room.
+      - Additionally, no room is created for cells where x == 0 and y < 0.
+      - For each random room, a room type is randomly chosen from room_types.
+    """
+    grid_rooms = {}
+    for x in range(grid_min, grid_max + 1):
+        for y in range(grid_min, grid_max + 1):
+            coord = (x, y)
+            # Skip cells along the center column with negative y.
+            if x == 0 and y < 0:
+                continue
+            if coord == (0, 0):
+                grid_rooms[coord] = entry_hall()
+            elif coord == (0, 1):
+                grid_rooms[coord] = throne_room()
+            else:
+                if rng.random() < ROOM_PROBABILITY:
+                    # Draws exactly what rng.choice(room_types) did, as a type id.
+                    grid_rooms[coord] = create_room(rng.randrange(len(room_types)), rng)
+    compute_exits(grid_rooms)
+    return grid_rooms
+
+
+# After grid initialization, distribute silver keys.
+def distribute_silver_keys(grid_rooms, rng=random, index=None):
+    """
+    Distribute 'silver key' into randomly selected grid rooms (excluding forced rooms).
+    If a WorldIndex is given, the keys are recorded in it as well.
+    """
+    available_coords = [coord for coord in grid_rooms if grid_rooms[coord]["name"] not in ["entry_hall", "throne_room"]]
+    if len(available_coords) < secret_keys_needed:
+        selected_coords = available_coords  # if not enough, assign to all.
+    else:
+        selected_coords = rng.sample(available_coords, secret_keys_needed)
+    for coord in selected_coords:
+        grid_rooms[coord]["items"].append("silver key")
+        if index is not None:
+            index.item_added(coord, "silver key")
+    return selected_coords
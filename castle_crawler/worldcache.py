@@ -0,0 +1,50 @@
+"""
+Pre-generated world cache: generated grids kept as save files, keyed by seed, grid config
+and content pack.
+
+Game(world_cache=directory) looks for the world its seed and options would generate before
+generating it. A cached world is opened with mmap as a MappedWorld (see savefile), so starting
+a game costs the same however large the grid is; a missing one is generated as usual and
+written for next time. The file's game-state section holds the state of the game's random
+stream after generation, so every later roll (and a replay of the game's journal) is the same
+whether the world came from the cache or not.
+
+Only the dense worlds Game generates itself are cached: not chunked worlds (already lazy),
+nor winnable ones (their keys are repaired with the same random stream after generation).
+They must be compact: a save file keeps a room's items and monsters as bitmasks, as a RoomStore
+does, so a mapped world lists them in a RoomStore's order and a dict grid's order is lost.
+"""
+import os
+
+from . import content
+from .savefile import (_RNG_STATE, MappedWorld, StringTable, _encode_records, pack_rng_state, unpack_rng_state,
+                       write_base)
+
+
+def cache_path(cache_dir, seed, grid_min, grid_max, vectorized=False, compact=True):
+    """The file the world of this seed and grid config is cached in, under the active content pack."""
+    kind = ("v" if vectorized else "g") + ("c" if compact else "")
+    pack = content.active().digest.hex()[:8]
+    return os.path.join(cache_dir, f"world-{kind}-{seed}-{grid_min}-{grid_max}-{pack}.ccw")
+
+
+def load_world(path):
+    """Return (MappedWorld, random state after generation) for a cached world, or None if it isn't cached."""
+    try:
+        grid_rooms = MappedWorld(path)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None  # Written by another version of the game; it is regenerated and replaced.
+    if len(grid_rooms.state) != _RNG_STATE.size:
+        grid_rooms.close()
+        return None
+    return grid_rooms, unpack_rng_state(grid_rooms.state)
+
+
+def store_world(path, grid_rooms, grid_min, grid_max, rng_state):
+    """Write a freshly generated world and the random state after generating it to path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    strings = StringTable()
+    records, overflow = _encode_records(grid_rooms, grid_min, grid_max, strings)
+    return write_base(path, 0, grid_min, grid_max, records, strings.strings, overflow, pack_rng_state(rng_state))
@@ -0,0 +1,93 @@
+"""
+Where a game's world comes from: the grid bounds and the options that pick a generator.
+
+A WorldConfig groups everything besides the seed that decides which world a Game generates,
+and builds it:
+
+    config = WorldConfig(grid_min=-500, grid_max=500, compact=True, world_cache="worlds")
+    game = Game(seed=7, world_config=config)
+
+Game also takes the same options as keywords (Game(seed=7, compact=True)) and turns them into a
+WorldConfig. options() is the part a command journal records to rebuild the same world.
+"""
+import time
+
+from . import world
+from .chunks import ChunkedWorld, MAX_CHUNKS
+from .store import RoomStore
+
+
+class WorldConfig:
+    """
+    The world source of a Game.
+      - grid_min/grid_max: the grid bounds.
+      - chunk_size: if set, a lazily generated ChunkedWorld with chunks of this size, keeping at
+        most max_chunks loaded and writing modified chunks to save_dir on eviction.
+      - compact: if True, keep a generated grid in an array-backed RoomStore instead of dicts.
+      - vectorized: if True, generate the grid with NumPy (see vectorgen) instead of room by room.
+      - winnable: if True, a newly generated finite world has its silver keys moved within
+        reach when locked rooms would wall them off (the Game repairs them; see
+        connectivity.repair_keys).
+      - world_cache: a directory of pre-generated worlds (see worldcache): a generated world
+        is loaded from it when cached there and written to it when not. Needs compact, since
+        a cached world is mapped with its items and monsters kept as bitmasks.
+    """
+
+    def __init__(self, grid_min=world.GRID_MIN, grid_max=world.GRID_MAX, chunk_size=None, max_chunks=MAX_CHUNKS,
+                 save_dir=None, compact=False, vectorized=False, winnable=False, world_cache=None):
+        if world_cache is not None and not compact and chunk_size is None:
+            raise ValueError("world_cache needs compact=True: cached worlds are compact")
+        self.grid_min = grid_min
+        self.grid_max = grid_max
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.save_dir = save_dir
+        self.compact = compact
+        self.vectorized = vectorized
+        self.winnable = winnable
+        self.world_cache = world_cache
+
+    def options(self):
+        """The options that decide the world, as keywords for Game (where it is stored is left out)."""
+        return {"grid_min": self.grid_min, "grid_max": self.grid_max, "chunk_size": self.chunk_size,
+                "max_chunks": self.max_chunks, "compact": self.compact, "vectorized": self.vectorized,
+                "winnable": self.winnable}
+
+    def build(self, seed, rng, metrics=None):
+        """
+        Return the world of seed: loaded from the world cache (which also restores rng to its
+        state after generation), or generated with rng. metrics, if given, times it.
+        """
+        grid_min, grid_max = self.grid_min, self.grid_max
+        if self.chunk_size is not None:
+            return ChunkedWorld(seed, grid_min, grid_max, self.chunk_size, self.max_chunks, self.save_dir)
+        started = time.perf_counter()
+        cached = None
+        if self.world_cache is not None and not self.winnable:
+            from . import worldcache
+            cached = worldcache.cache_path(self.world_cache, seed, grid_min, grid_max, self.vectorized, self.compact)
+            loaded = worldcache.load_world(cached)
+            if loaded is not None:
+                grid_rooms, rng_state = loaded
+                rng.setstate(rng_state)
+                if metrics is not None:
+                    metrics.observe("load_world", time.perf_counter() - started)
+                return grid_rooms
+        if self.vectorized:
+            from . import vectorgen
+            generate = vectorgen.generate_store if self.compact else vectorgen.generate_grid
+            grid_rooms = generate(seed, grid_min, grid_max)
+        else:
+            grid_rooms = world.initialize_grid(rng, grid_min, grid_max)
+            world.distribute_silver_keys(grid_rooms, rng)
+            if self.compact:
+                grid_rooms = RoomStore.from_grid(grid_rooms, grid_min, grid_max)
+        if cached is not None:
+            worldcache.store_world(cached, grid_rooms, grid_min, grid_max, rng.getstate())
+        if metrics is not None:
+            metrics.observe("generate_world", time.perf_counter() - started)
+            metrics.count("rooms_generated", len(grid_rooms))
+        return grid_rooms
+
+    def __repr__(self):
+        return f"WorldConfig({', '.join(f'{key}={value!r}' for key, value in self.options().items())})"
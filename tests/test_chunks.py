@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from castle_crawler import Game, world
+from castle_crawler.chunks import ChunkedWorld
+
+SEED, LOW, HIGH = 21, -40, 40
+
+
+def rooms_of(grid_rooms, coords):
+    return {coord: grid_rooms.get(coord) for coord in coords}
+
+
+def test_world_does_not_depend_on_what_was_loaded_before():
+    coords = [(x, y) for x in range(-20, 21) for y in range(-20, 21)]
+    dense = ChunkedWorld(SEED, LOW, HIGH, chunk_size=8).generate_columns(LOW, HIGH + 1)
+    shuffled = list(coords)
+    random.Random(SEED).shuffle(shuffled)
+    lazy = ChunkedWorld(SEED, LOW, HIGH, chunk_size=8, max_chunks=8)
+    assert rooms_of(lazy, shuffled) == {coord: dense.get(coord) for coord in shuffled}
+    assert lazy.chunks_evicted > 0
+
+
+def test_exits_match_neighbours_across_chunk_borders():
+    lazy = ChunkedWorld(SEED, LOW, HIGH, chunk_size=8, max_chunks=16)
+    offsets = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+    for x in range(LOW, HIGH + 1):
+        for y in range(LOW, HIGH + 1):
+            room = lazy.get((x, y))
+            if room is None:
+                continue
+            for direction, (dx, dy) in offsets.items():
+                neighbour = (x + dx, y + dy)
+                assert (direction in room["exits"]) == (lazy.get(neighbour) is not None)
+
+
+def test_silver_keys_are_placed_in_the_classic_area():
+    lazy = ChunkedWorld(SEED, -1000, 1000, chunk_size=16)
+    assert len(lazy.key_coords) == world.secret_keys_needed
+    for coord in lazy.key_coords:
+        assert world.GRID_MIN <= min(coord) and max(coord) <= world.GRID_MAX
+        assert "silver key" in lazy.get(coord)["items"]
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_changes_survive_eviction(tmp_path, on_disk):
+    game = Game(seed=SEED, quiet=True, chunk_size=4, max_chunks=2, grid_min=LOW, grid_max=HIGH,
+                save_dir=str(tmp_path) if on_disk else None)
+    start = game.get_current_room()
+    assert start["items"]
+    game.execute("take all")
+    taken = sorted(game.player_state["inventory"])
+    grid_rooms = game.grid_rooms
+    for coord in [(x, y) for x in range(LOW, HIGH + 1, 4) for y in range(LOW, HIGH + 1, 4)]:
+        grid_rooms.get(coord)  # Cycles every chunk through the two slots.
+    assert grid_rooms.chunks_evicted > 2
+    assert grid_rooms.get((0, 0))["items"] == []
+    assert sorted(game.player_state["inventory"]) == taken
+    if on_disk:
+        assert list(tmp_path.iterdir())
@@ -0,0 +1,51 @@
+import pytest
+
+from castle_crawler import combat
+from castle_crawler.combat import fight_odds
+
+ARMED = {slot: None for slot in combat.ARMOR_SLOTS + ["weapon_left", "weapon_right"]}
+ARMED["weapon_right"] = "sword"
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """Run a test against the NumPy estimator and again against the pure-Python one."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(combat, "_load_numpy", lambda: None)
+    return request.param
+
+
+def test_one_hit_fights_follow_the_rules(engine):
+    # With one health point every hit is fatal: an armed player only wins if the monster
+    # neither strikes first nor survives the attack; an unarmed one never wins.
+    odds = fight_odds("goblin", ARMED, health=1, fights=20_000, seed=3)
+    assert odds["death"] == pytest.approx(0.25 + 0.75 * 0.25, abs=0.02)
+    assert odds["win"] == pytest.approx(1 - odds["death"])
+    assert fight_odds("goblin", health=1, fights=1000, seed=3)["death"] == 1.0
+
+
+def test_probabilities_add_up(engine):
+    odds = fight_odds("orc", ARMED, health=100, fights=5000, max_rounds=2, seed=5)
+    assert odds["unresolved"] > 0
+    assert odds["win"] + odds["death"] + odds["unresolved"] == pytest.approx(1)
+    assert sum(odds["damage_distribution"].values()) == pytest.approx(1)
+    expected = sum(damage * p for damage, p in odds["damage_distribution"].items())
+    assert odds["expected_damage"] == pytest.approx(expected)
+
+
+def test_a_seed_repeats_the_estimate(engine):
+    first = fight_odds("zombie", ARMED, health=40, fights=2000, seed=11)
+    assert fight_odds("zombie", ARMED, health=40, fights=2000, seed=11) == first
+
+
+def test_numpy_and_python_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    fast = fight_odds("orc", ARMED, health=50, progress=2, fights=50_000, seed=1)
+    monkeypatch.setattr(combat, "_load_numpy", lambda: None)
+    slow = fight_odds("orc", ARMED, health=50, progress=2, fights=50_000, seed=1)
+    assert fast["damage_per_hit"] == slow["damage_per_hit"]
+    for key in ("win", "death", "expected_rounds"):
+        assert fast[key] == pytest.approx(slow[key], abs=0.02)
+    assert fast["expected_damage"] == pytest.approx(slow["expected_damage"], rel=0.05)
@@ -0,0 +1,85 @@
+import random
+from collections import deque
+
+from castle_crawler import Game
+from castle_crawler.connectivity import Connectivity, find_path
+
+DIRECTIONS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+
+
+def shortest(grid_rooms, start, goal, keys):
+    """Moves on the shortest route by breadth-first search over (room, keys used), or None."""
+    seen = {(start, 0): 0}
+    queue = deque([(start, 0)])
+    while queue:
+        coord, used = queue.popleft()
+        if coord == goal:
+            return seen[(coord, used)]
+        for dx, dy in DIRECTIONS.values():
+            other = (coord[0] + dx, coord[1] + dy)
+            room = grid_rooms.get(other)
+            if room is None:
+                continue
+            state = (other, used + room["locked"])
+            if state[1] <= keys and state not in seen:
+                seen[state] = seen[(coord, used)] + 1
+                queue.append(state)
+    return None
+
+
+def follow(start, path):
+    x, y = start
+    for direction in path:
+        dx, dy = DIRECTIONS[direction]
+        x, y = x + dx, y + dy
+    return x, y
+
+
+def test_components_match_a_flood_fill():
+    game = Game(seed=4, quiet=True)
+    rooms, connectivity = game.grid_rooms, game.get_connectivity()
+    open_rooms = [coord for coord, room in rooms.items() if not room["locked"]]
+    for coord in open_rooms:
+        assert connectivity.component_size(coord) == sum(
+            1 for other in open_rooms if shortest(rooms, coord, other, 0) is not None)
+    door = min(connectivity.locked)
+    rooms[door]["locked"] = False
+    connectivity.unlocked(door)
+    assert connectivity.door_graph() == Connectivity.build(rooms).door_graph()
+    assert connectivity.component_size(door) == sum(
+        1 for coord, room in rooms.items() if not room["locked"] and shortest(rooms, door, coord, 0) is not None)
+
+
+def test_routes_are_shortest_and_respect_keys():
+    rng = random.Random(2)
+    for seed in range(3):
+        game = Game(seed=seed, quiet=True)
+        rooms, connectivity = game.grid_rooms, game.get_connectivity()
+        coords = sorted(rooms)
+        for _ in range(40):
+            start, goal, keys = rng.choice(coords), rng.choice(coords), rng.randrange(3)
+            if rooms[start]["locked"]:
+                continue
+            path = find_path(rooms, start, goal, keys, game.grid_min, game.grid_max, connectivity)
+            expected = shortest(rooms, start, goal, keys)
+            if expected is None:
+                assert path is None
+                continue
+            assert len(path) == expected
+            assert follow(start, path) == goal
+            visited = [follow(start, path[:i]) for i in range(1, len(path) + 1)]
+            assert sum(rooms[coord]["locked"] for coord in visited) <= keys
+
+
+def test_walk_to_follows_the_route():
+    game = Game(seed=1, quiet=True)
+    rooms, connectivity = game.grid_rooms, game.get_connectivity()
+    for coord in rooms:
+        rooms[coord]["monsters"] = []  # Nothing to stop the walk.
+    goal = max((coord for coord in rooms if connectivity.connected((0, 0), coord)),
+               key=lambda coord: abs(coord[0]) + abs(coord[1]))
+    assert game.execute(f"walk to {goal[0]},{goal[1]}") == "walked"
+    assert game.player_state["position"] == goal
+    far = next(coord for coord in sorted(connectivity.locked) if shortest(rooms, goal, coord, 0) is None)
+    assert game.execute(f"walk to {far[0]},{far[1]}") == "unreachable"
+    assert game.player_state["position"] == goal
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from castle_crawler import Game, content, world
+
+
+@pytest.fixture
+def restore_content(monkeypatch, tmp_path):
+    """Put the castle's own content back after a test installs another pack."""
+    monkeypatch.delenv(content.ENV_VAR, raising=False)
+    yield
+    content.use(content.DEFAULT_PACK, cache_dir=tmp_path)
+
+
+def castle_rooms(seed):
+    return Game(seed=seed, quiet=True).grid_rooms
+
+
+def write_pack(path, edit=None):
+    with open(content.DEFAULT_PACK) as f:
+        data = json.load(f)
+    if edit is not None:
+        edit(data)
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_compiled_pack_round_trips(tmp_path, monkeypatch):
+    pack = shutil.copy(content.DEFAULT_PACK, str(tmp_path / "castle.json"))
+    compiled = content.load(pack, cache_dir=tmp_path)
+    assert os.path.exists(content.cache_path(pack, tmp_path))
+
+    def no_compiling(*args):
+        raise AssertionError("the pack was compiled again")
+
+    monkeypatch.setattr(content, "compile_pack", no_compiling)
+    cached = content.load(pack, cache_dir=tmp_path)
+    assert content.encode(cached) == content.encode(compiled)
+    assert vars(cached).keys() == vars(compiled).keys()
+    for name in ("room_names", "room_descriptions", "item_names", "spawn_items", "monster_names",
+                 "monster_damages", "spawn_monsters", "item_ids"):
+        assert getattr(cached, name) == getattr(compiled, name)
+
+
+def test_cached_pack_generates_the_same_world(tmp_path, restore_content):
+    expected = castle_rooms(5)
+    pack = shutil.copy(content.DEFAULT_PACK, str(tmp_path / "castle.json"))
+    content.load(pack, cache_dir=tmp_path)
+    content.use(pack, cache_dir=tmp_path)  # Read back from the .ccpack.
+    assert os.environ[content.ENV_VAR] == os.path.abspath(pack)
+    assert castle_rooms(5) == expected
+
+
+def test_edited_pack_is_compiled_again(tmp_path, restore_content):
+    pack = write_pack(tmp_path / "castle.json")
+    content.load(pack, cache_dir=tmp_path)
+
+    def one_room(data):
+        data["rooms"] = [{"name": "cellar", "description": "A damp cellar."}]
+
+    write_pack(tmp_path / "castle.json", one_room)
+    assert content.use(pack, cache_dir=tmp_path).room_names == ["cellar"]
+    rooms = castle_rooms(5)
+    assert {room["name"] for coord, room in rooms.items() if coord not in ((0, 0), (0, 1))} == {"cellar"}
+    assert sum(room["items"].count("silver key") for room in rooms.values()) == world.secret_keys_needed
+
+
+def test_pack_missing_a_required_item_is_refused(tmp_path):
+    def no_torch(data):
+        data["items"] = [item for item in data["items"] if item["name"] != "torch"]
+
+    with pytest.raises(ValueError):
+        content.load(write_pack(tmp_path / "broken.json", no_torch), cache_dir=tmp_path)
+    assert not os.path.exists(content.cache_path(str(tmp_path / "broken.json"), tmp_path))
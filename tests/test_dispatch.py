@@ -0,0 +1,70 @@
+import io
+
+from castle_crawler.console import play_script
+from castle_crawler.engine import COMMAND_TRIE, Game, build_command_trie, match_command
+
+
+def test_longest_whole_word_command_wins():
+    entry, name, argument = match_command("take all")
+    assert entry[0] is Game.take_all and (name, argument) == ("take all", "")
+    entry, name, argument = match_command("take all the gold")
+    assert entry[0] is Game.take and (name, argument) == ("take", "all the gold")
+    entry, name, argument = match_command("take silver key")
+    assert entry[0] is Game.take and argument == "silver key"
+
+
+def test_same_words_with_and_without_an_argument():
+    assert match_command("map")[0][0] is Game.show_map and match_command("map")[2] == ""
+    entry, _, argument = match_command("map 12")
+    assert entry[0] is Game.show_map and entry[1] and argument == "12"
+    assert match_command("undo")[0][1] is False and match_command("undo 5")[0][1] is True
+
+
+def test_prefixes_of_words_and_missing_arguments_are_not_commands():
+    assert match_command("ta") is None       # No abbreviations beyond the aliases.
+    assert match_command("takeall") is None
+    assert match_command("go") is None       # 'go' needs a direction.
+    assert match_command("path") is None     # Only 'path to <x>,<y>'.
+    assert match_command("") is None
+
+
+def test_aliases_expand_to_whole_commands():
+    assert match_command("n")[1:] == ("go", "north")
+    assert match_command("i")[0][0] is Game.show_inventory
+    assert match_command("x")[0][0] is match_command("l")[0][0] is Game.describe_current_room
+    assert match_command("n orth") is None   # Aliases stand for whole lines only.
+
+
+def test_admin_entries_are_marked():
+    assert match_command("save game.ccs")[0][2] is True
+    assert match_command("stats save out.json")[0][2] is True
+    assert match_command("locate sword")[0][2] is True
+    assert match_command("look")[0][2] is False
+    look = Game.describe_current_room
+    trie = build_command_trie([("a b", look, False)], [("a", Game.save, True)])
+    assert trie["a"][""] == (Game.save, True, True)
+    assert trie["a"]["b"][None] == (look, False, False)
+    assert "" not in COMMAND_TRIE
+
+
+def test_script_answers_the_run_prompt_inline():
+    game = Game(seed=2, grid_min=-3, grid_max=3)
+    game.get_current_room()["monsters"].append("goblin")
+    out = io.StringIO()
+    assert play_script(game, ["attack goblin", "wait", "run", "look"], out) == 4
+    assert game.pending_flee is None
+    text = out.getvalue()
+    assert "You hesitate!" in text
+    assert game.turns == 4 and game.journal.commands[1:3] == ["wait", "run"]
+
+
+def test_admin_commands_are_unknown_outside_the_local_console():
+    game = Game(seed=3, grid_min=-5, grid_max=5)
+    game.take_output()
+    for command in ["locate silver key", "stats", "profile on"]:
+        assert game.execute(command) == "unknown"
+        assert game.take_output() == ["I don't understand that command."]
+    assert game.player_state["position"] == (0, 0)
+    admin = Game(seed=3, grid_min=-5, grid_max=5, admin=True)
+    assert admin.execute("locate silver key") == "located"
+    assert admin.journal.commands == []
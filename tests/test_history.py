@@ -0,0 +1,68 @@
+import pytest
+
+from castle_crawler import Game
+
+
+def state(game):
+    """What a player can observe: their own state and the rooms around the entry hall."""
+    rooms = {coord: (list(room["items"]), list(room["monsters"]), room["locked"])
+             for coord in [(x, y) for x in range(-2, 3) for y in range(-2, 3)]
+             for room in [game.grid_rooms.get(coord)] if room is not None}
+    return repr((game.player_state, game.secret_state, rooms))
+
+
+def test_undo_takes_back_commands_that_changed_something():
+    game = Game(seed=3, quiet=True, history=True)
+    before = state(game)
+    game.execute("take all")
+    after_take = state(game)
+    game.execute("go north")
+    game.execute("inventory")          # Changes nothing, so 'undo' skips it.
+    assert game.execute("undo") == "undone"
+    assert state(game) == after_take
+    game.execute("undo")
+    assert state(game) == before
+
+
+def test_undo_several_and_restore_a_checkpoint():
+    game = Game(seed=4, quiet=True, history=True)
+    game.execute("take all")
+    game.execute("checkpoint armed")
+    armed = state(game)
+    for command in ["go east", "go north", "drop all", "go west"]:
+        game.execute(command)
+    moved = state(game)
+    assert game.execute("restore armed") == "restored"
+    assert state(game) == armed
+    game.execute("undo")                # Takes the restore back.
+    assert state(game) == moved
+
+
+def test_fork_never_affects_its_parent():
+    parent = Game(seed=5, quiet=True, history=True)
+    parent.execute("take all")
+    before = state(parent)
+    child = parent.fork()
+    for command in ["drop all", "go north", "take all", "go east", "drop all"]:
+        child.execute(command)
+    assert state(parent) == before
+    assert state(child) != before
+    parent.execute("drop all")
+    assert state(child) != state(parent)
+
+
+def test_forks_of_one_version_are_isolated_from_each_other():
+    game = Game(seed=6, quiet=True, history=True)
+    version = game.version()
+    first, second = game.fork(version), game.fork(version)
+    assert first.get_current_room()["items"]  # Both start in the entry hall, with its items.
+    first.execute("take all")
+    assert not first.get_current_room()["items"]
+    assert second.get_current_room()["items"] == game.get_current_room()["items"]
+    game.restore(version)
+    assert state(game) == state(second)
+
+
+def test_history_refuses_wandering_monsters():
+    with pytest.raises(ValueError):
+        Game(seed=7, quiet=True, history=True, wandering=True)
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from castle_crawler import Game
+from castle_crawler.inventory import ItemBag
+
+
+def test_counts_and_length():
+    bag = ItemBag(["torch", "silver key", "torch"])
+    bag.add("silver key", 3)
+    assert bag.count("torch") == 2
+    assert bag.count("silver key") == 4
+    assert bag.count("sword") == 0
+    assert len(bag) == 6
+    assert bag.stacks() == [("torch", 2), ("silver key", 4)]
+
+
+def test_discard_removes_at_most_what_is_held():
+    bag = ItemBag(["torch", "torch"])
+    assert bag.discard("torch", 5) == 2
+    assert "torch" not in bag and len(bag) == 0 and not bag
+    assert bag.discard("torch") == 0
+    with pytest.raises(ValueError):
+        bag.remove("torch")
+
+
+def test_update_merges_bags_count_by_count():
+    bag = ItemBag(["torch"])
+    bag.update(ItemBag(["torch", "sword"]))
+    bag.extend(["sword"])
+    assert bag.counts == {"torch": 2, "sword": 2}
+    assert len(bag) == 4
+
+
+def test_iterates_grouped_by_name_and_compares_with_lists():
+    bag = ItemBag(["torch", "sword", "torch"])
+    assert list(bag) == ["torch", "torch", "sword"]
+    assert bag == ["sword", "torch", "torch"]
+    assert bag != ["sword", "torch"]
+
+
+def test_copy_and_pickle_keep_counts():
+    bag = ItemBag(["silver key"] * 3)
+    copied = bag.copy()
+    copied.discard("silver key")
+    restored = pickle.loads(pickle.dumps(bag))
+    assert bag.count("silver key") == 3 and copied.count("silver key") == 2
+    assert restored.count("silver key") == 3 and len(restored) == 3
+
+
+def test_take_and_drop_all_move_counts_between_room_and_player():
+    game = Game(seed=1, quiet=True)
+    room = game.get_current_room()
+    room["items"].add("silver key", 4)
+    held = len(room["items"])
+    game.execute("take all")
+    inventory = game.player_state["inventory"]
+    assert inventory.count("silver key") == 4 and len(inventory) == held
+    assert not room["items"]
+    game.execute("drop all")
+    assert room["items"].count("silver key") == 4 and not inventory
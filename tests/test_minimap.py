@@ -0,0 +1,45 @@
+import random
+
+from castle_crawler import Game
+from castle_crawler.minimap import Minimap
+
+SEED = 8  # Locked rooms east and west of the entry hall.
+
+
+def map_lines(game, radius=2):
+    game.take_output()
+    game.execute(f"map {radius}")
+    return "\n".join(game.take_output()).splitlines()[:-1]  # The rows, without the legend.
+
+
+def fresh_map(game, radius=2):
+    game.minimap = Minimap(game.render_cache)
+    return map_lines(game, radius)
+
+
+def test_map_shows_a_door_another_player_unlocked():
+    a = Game(seed=SEED, grid_min=-5, grid_max=5)
+    b = Game(seed=SEED + 1, grid_rooms=a.grid_rooms, grid_min=-5, grid_max=5, render_cache=a.render_cache)
+    before = map_lines(a, 1)
+    assert "#-@-#" in before
+    for coord in [(1, 0), (-1, 0)]:
+        b.edit_room(coord)["locked"] = False
+        b.room_changed(coord)
+    after = map_lines(a, 1)
+    assert " -@-" in after and not any("#" in row for row in after)
+    assert after == fresh_map(a, 1)
+
+
+def test_cached_map_matches_a_fresh_one_while_exploring():
+    game = Game(seed=SEED, grid_min=-8, grid_max=8)
+    game.player_state["inventory"].add("silver key", 50)
+    rng = random.Random(SEED)
+    for _ in range(200):
+        game.execute(rng.choice(["go north", "go south", "go east", "go west", "take all", "drop all"]))
+        if not isinstance(game.player_state["position"], tuple):
+            game.execute("go back")
+        cached = map_lines(game, 4)
+        saved = game.minimap
+        assert cached == fresh_map(game, 4)
+        game.minimap = saved
+    assert game.minimap.hits > game.minimap.misses
@@ -0,0 +1,60 @@
+import pytest
+
+from castle_crawler import world
+
+pytest.importorskip("numpy")
+from castle_crawler import parallelgen  # noqa: E402
+from castle_crawler.parallelgen import SharedWorld, generate_shared  # noqa: E402
+
+GRID, TILE = 40, 16  # 81 columns: six tiles a side, the last one narrower.
+OFFSETS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+
+
+def columns(store):
+    return (bytes(store.types), bytes(store.flags), bytes(store.item_masks), bytes(store.monster_masks))
+
+
+def test_any_number_of_workers_makes_the_same_world():
+    one = generate_shared(5, -GRID, GRID, workers=1, tile_size=TILE)
+    try:
+        for workers in (2, 3):
+            many = generate_shared(5, -GRID, GRID, workers=workers, tile_size=TILE)
+            try:
+                assert columns(many) == columns(one)
+            finally:
+                many.close()
+        other = generate_shared(6, -GRID, GRID, workers=1, tile_size=TILE)
+        try:
+            assert columns(other) != columns(one)
+        finally:
+            other.close()
+    finally:
+        one.close()
+
+
+def test_exits_are_stitched_across_tiles():
+    shared = generate_shared(7, -GRID, GRID, workers=2, tile_size=TILE)
+    try:
+        assert len(parallelgen.tiles(-GRID, GRID, TILE)) == 36
+        assert shared[(0, 0)]["name"] == "entry_hall" and shared[(0, 1)]["name"] == "throne_room"
+        keys = 0
+        for (x, y), room in shared.items():
+            keys += room["items"].count("silver key")
+            for direction, (dx, dy) in OFFSETS.items():
+                assert (direction in room["exits"]) == ((x + dx, y + dy) in shared)
+        assert keys == world.secret_keys_needed
+    finally:
+        shared.close()
+
+
+def test_another_process_can_attach_by_name():
+    shared = generate_shared(8, -GRID, GRID, workers=1, tile_size=TILE)
+    try:
+        attached = SharedWorld(shared.name, -GRID, GRID)
+        try:
+            assert columns(attached) == columns(shared)
+            assert attached.room_count() == shared.room_count() == len(list(shared))
+        finally:
+            attached.close()
+    finally:
+        shared.close()
@@ -0,0 +1,66 @@
+import random
+
+from castle_crawler import Game
+from castle_crawler.render import render_room
+
+SEED = 8  # Items in the entry hall, and a locked room east of it.
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "drop all", "take torch", "drop torch",
+            "use torch", "attack goblin", "attack orc", "run", "look"]
+
+
+def shared(players=2):
+    first = Game(seed=SEED, grid_min=-5, grid_max=5)
+    games = [first] + [Game(seed=SEED + i, grid_rooms=first.grid_rooms, grid_min=-5, grid_max=5,
+                            render_cache=first.render_cache) for i in range(1, players)]
+    for game in games:
+        game.take_output()
+    return games
+
+
+def looks_like(game):
+    """What 'look' shows now, both from the cache and rendered from scratch."""
+    game.execute("look")
+    room = game.get_current_room()
+    visible = not room["dark"] or "torch" in game.player_state["inventory"]
+    return game.take_output()[-1], render_room(room, visible)
+
+
+def test_take_by_another_player_is_shown():
+    a, b = shared()
+    cached, _ = looks_like(a)
+    assert "You see:" in cached
+    b.execute("take all")
+    cached, fresh = looks_like(a)
+    assert cached == fresh and "You see:" not in cached
+    b.execute("drop all")
+    cached, fresh = looks_like(a)
+    assert cached == fresh and "You see:" in cached
+
+
+def test_unlocked_room_is_rendered_again():
+    a, = shared(1)
+    cache, door = a.render_cache, a.grid_rooms[(1, 0)]
+    assert door["locked"]
+    cache.describe((1, 0), door, True)
+    version, misses = cache.version((1, 0)), cache.misses
+    a.player_state["inventory"].append("silver key")
+    a.execute("go east")
+    assert a.player_state["position"] == (1, 0) and not door["locked"]
+    assert cache.version((1, 0)) == version + 1 and cache.misses == misses + 1
+    cached, fresh = looks_like(a)
+    assert cached == fresh
+
+
+def test_cached_descriptions_never_go_stale():
+    rng = random.Random(3)
+    games = shared(3)
+    for _ in range(400):
+        game = rng.choice(games)
+        game.execute(rng.choice(COMMANDS))
+        if game.player_state["health"] <= 0 or not isinstance(game.player_state["position"], tuple):
+            continue
+        for other in games:
+            if isinstance(other.player_state["position"], tuple):
+                cached, fresh = looks_like(other)
+                assert cached == fresh
+    assert games[0].render_cache.hits > 0
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from castle_crawler import Game
+from castle_crawler.journal import CommandJournal
+from castle_crawler.replay import Replay, replay
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "drop all", "equip sword",
+            "attack goblin", "attack orc", "attack skeleton", "run", "use torch", "use health potion"]
+
+
+def played(seed, turns, keep=(), **options):
+    """Play turns random commands; return the game and its snapshots after the turns in keep."""
+    game = Game(seed=seed, quiet=True, **options)
+    rng = random.Random(seed)
+    states = {}
+    for turn in range(1, turns + 1):
+        game.execute(rng.choice(COMMANDS))
+        if turn in keep:
+            states[turn] = game.snapshot()
+    return game, states
+
+
+def same_state(a, b):
+    return (a.player_state == b.player_state and a.secret_state == b.secret_state and a.turns == b.turns
+            and a.rng.getstate() == b.rng.getstate())
+
+
+@pytest.mark.parametrize("options", [{}, {"compact": True}, {"wandering": True}])
+def test_replay_rebuilds_the_game(options):
+    game, _ = played(11, 600, **options)
+    assert same_state(replay(game.journal, checkpoint_every=50), game)
+
+
+def test_game_at_any_turn_matches_the_game_then():
+    turns = (400, 1, 64, 65, 250, 128, 399)
+    game, states = played(12, 400, keep=turns)
+    session = Replay(game.journal, checkpoint_every=64)
+    for turn in turns:
+        assert same_state(session.game_at(turn), Game.from_snapshot(states[turn], quiet=True))
+
+
+def test_journal_file_round_trip(tmp_path):
+    path = str(tmp_path / "game.journal")
+    game = Game(seed=13, quiet=True, journal=path, grid_min=-8, grid_max=8)
+    for command in ["take all", "go north", "go east", "attack goblin", "run"]:
+        game.execute(command)
+    game.journal.close()
+    journal = CommandJournal.load(path)
+    assert journal.seed == 13 and journal.commands == game.journal.commands
+    assert same_state(replay(journal), game)
+
+
+def test_admin_commands_are_not_journaled(tmp_path):
+    game = Game(seed=14, quiet=True, admin=True)
+    game.execute("go north")
+    game.execute(f"save {tmp_path / 'game.ccs'}")
+    game.execute("stats on")
+    game.execute("go south")
+    assert game.journal.commands == ["go north", "go south"]
+    assert game.turns == 2
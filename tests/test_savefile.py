@@ -0,0 +1,86 @@
+import os
+import random
+
+from castle_crawler import Game, savefile
+from castle_crawler.savefile import journal_path, load_game, save_game
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "equip sword", "attack goblin",
+            "attack orc", "run", "use torch", "look"]
+
+
+def play(game, commands):
+    return [(game.execute(command), game.take_output()) for command in commands]
+
+
+def commands(seed, count):
+    rng = random.Random(seed)
+    return [rng.choice(COMMANDS) for _ in range(count)]
+
+
+def test_save_then_load_restores_the_game(tmp_path):
+    path = str(tmp_path / "game.ccs")
+    game = Game(seed=3, quiet=True)
+    play(game, commands(3, 150))
+    save_game(game, path)
+    loaded = load_game(path, quiet=True)
+    assert loaded.player_state == game.player_state
+    assert (loaded.turns, loaded.kills, loaded.secret_state) == (game.turns, game.kills, game.secret_state)
+    for coord in [(0, 0), (1, 0), (0, 1), (-1, 0), (0, -1)]:
+        assert (loaded.grid_rooms.get(coord) is None) == (game.grid_rooms.get(coord) is None)
+        if game.grid_rooms.get(coord) is not None:
+            assert loaded.grid_rooms[coord]["items"] == game.grid_rooms[coord]["items"]
+            assert loaded.grid_rooms[coord]["monsters"] == game.grid_rooms[coord]["monsters"]
+
+
+def test_loaded_game_continues_like_the_saved_one(tmp_path):
+    path = str(tmp_path / "game.ccs")
+    script = commands(4, 300)
+    # Compact rooms keep items as bitmasks, like the save file, so both list them in the same order.
+    straight, saved = Game(seed=4, compact=True), Game(seed=4, compact=True)
+    play(straight, script[:100])
+    play(saved, script[:100])
+    save_game(saved, path)
+    loaded = load_game(path)
+    assert play(loaded, script[100:]) == play(straight, script[100:])
+
+
+def test_second_save_appends_a_delta_journal(tmp_path):
+    path = str(tmp_path / "game.ccs")
+    game = Game(seed=5, quiet=True, grid_min=-30, grid_max=30)
+    base = save_game(game, path)
+    play(game, ["take all", "go east", "take all", "go north"])
+    delta = save_game(game, path)
+    assert 0 < delta < base / 10
+    assert os.path.getsize(path) == base
+    assert os.path.getsize(journal_path(path, 0)) == delta
+    game.save_file.close()
+    loaded = load_game(path, quiet=True)
+    assert loaded.player_state == game.player_state
+    assert loaded.grid_rooms[(0, 0)]["items"] == game.grid_rooms[(0, 0)]["items"]
+
+
+def test_save_is_refused_outside_the_local_console(tmp_path):
+    path = tmp_path / "game.ccs"
+    assert Game(seed=1, quiet=True).execute(f"save {path}") == "unknown"
+    assert not path.exists()
+    assert Game(seed=1, quiet=True, admin=True).execute(f"save {path}") == "saved"
+    assert path.exists()
+
+
+def test_journal_is_compacted_again_and_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(savefile, "COMPACT_THRESHOLD", 2000)
+    path = str(tmp_path / "game.ccs")
+    game = Game(seed=6, quiet=True, grid_min=-30, grid_max=30)
+    save_game(game, path)
+    generations = set()
+    for command in commands(6, 60):
+        play(game, [command, "take all"])
+        delta = save_game(game, path)
+        if game.save_file.compactor is not None:
+            game.save_file.compactor.join()  # Finished, but left for the next save to notice.
+        generations.add(game.save_file.generation)
+        assert os.path.getsize(journal_path(path, game.save_file.generation)) <= 2000 + delta
+    assert len(generations) > 3
+    game.save_file.close()
+    loaded = load_game(path, quiet=True)
+    assert loaded.player_state == game.player_state
@@ -0,0 +1,77 @@
+import pytest
+
+from castle_crawler import Game, world
+from castle_crawler.secret_paths import DEFAULT_MATCHER, SecretMatcher, SecretPath
+from castle_crawler.solver import solve, verify
+
+
+def test_overlapping_attempt_still_matches():
+    path = SecretPath(["east", "north", "west"])  # Opens after "east, north".
+    matcher = SecretMatcher([path])
+    assert matcher.feed(["east", "east", "north"]) == [path]
+    assert matcher.feed(["east", "west", "north"]) == []
+
+
+def test_overlap_inside_a_longer_path():
+    path = SecretPath(["east", "east", "north", "west"])
+    matcher = SecretMatcher([path])
+    assert matcher.feed(["east", "east", "east", "north"]) == [path]
+
+
+def test_several_paths_share_one_automaton():
+    first = SecretPath(["north", "east", "south"], reward_room="a")
+    second = SecretPath(["east", "south", "west"], reward_room="b")
+    matcher = SecretMatcher([first, second])
+    assert matcher.feed(["north", "east", "south"]) == [first]
+    assert matcher.feed(["west", "east", "south"]) == [second]
+
+
+def test_state_resets_after_unknown_direction():
+    assert DEFAULT_MATCHER.step(5, "up") == 0
+
+
+def test_game_reaches_reward_room_after_a_false_start():
+    game = Game(seed=1, quiet=True)
+    trigger = world.secret_sequence[:-1]
+    events = [game.move(direction) for direction in [trigger[0]] + trigger]
+    assert events[-1] == "secret_path"
+    assert game.player_state["position"] == "final_boss_room"
+
+
+LOCKED = SecretPath(world.secret_sequence, "final_boss_room", {"continue": "secret_treasure_room"},
+                    locked_indices=world.secret_locked_indices)
+
+
+def test_locked_moves_must_be_in_the_trigger():
+    assert LOCKED.keys == len(world.secret_locked_indices)
+    with pytest.raises(ValueError):
+        SecretPath(["east", "north", "west"], locked_indices={2})
+
+
+def test_locked_path_takes_a_key_per_locked_move():
+    game = Game(seed=1, quiet=True, secret_matcher=SecretMatcher([LOCKED]))
+    game.player_state["inventory"].add("silver key", LOCKED.keys - 1)
+    trigger = world.secret_sequence[:-1]
+    assert [game.move(direction) for direction in trigger][-1] == "moved"  # Shut: one key short.
+    assert game.secret_state == 0 and isinstance(game.player_state["position"], tuple)
+    game.player_state["inventory"].add("silver key", 2)
+    game.player_state["position"] = (0, 0)
+    assert [game.move(direction) for direction in trigger][-1] == "secret_path"
+    assert game.player_state["inventory"].count("silver key") == 1
+
+
+def test_solver_pays_for_locked_paths():
+    game = Game(seed=1, quiet=True, secret_matcher=SecretMatcher([LOCKED]))
+    game.player_state["inventory"].add("silver key", LOCKED.keys)
+    solution = solve(game)
+    assert solution is not None
+    assert verify(game, solution)
+
+
+def test_solver_collects_the_keys_a_locked_path_needs():
+    def locked_game():
+        return Game(seed=0, quiet=True, winnable=True, secret_matcher=SecretMatcher([LOCKED]))
+
+    solution = solve(locked_game())
+    assert solution is not None and solution.commands.count("take all") == LOCKED.keys
+    assert verify(locked_game(), solution)
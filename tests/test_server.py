@@ -0,0 +1,42 @@
+import asyncio
+
+from castle_crawler.server import LINE_LIMIT, LINE_TOO_LONG, SESSION_SEARCH_LIMIT, GameServer, build_world
+
+
+async def read_prompt(reader):
+    return (await reader.readuntil(b"> ")).decode()
+
+
+async def session_with_a_long_line():
+    server = GameServer(build_world(1, -5, 5), -5, 5, seed=1)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=LINE_LIMIT)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        other_reader, other_writer = await asyncio.open_connection("127.0.0.1", port)
+        await read_prompt(reader)
+        await read_prompt(other_reader)
+        writer.write(b"take " + b"x" * LINE_LIMIT + b"\n")
+        await writer.drain()
+        reply = await reader.read()  # Answered, then closed.
+        other_writer.write(b"look\n")
+        await other_writer.drain()
+        look = await read_prompt(other_reader)
+        other_writer.close()
+        while server.active:
+            await asyncio.sleep(0.01)
+    return server, reply, look
+
+
+def test_overlong_line_is_refused_and_the_server_carries_on():
+    server, reply, look = asyncio.run(session_with_a_long_line())
+    assert reply == LINE_TOO_LONG
+    assert "Exits:" in look
+    assert server.commands == 1
+
+
+def test_sessions_get_a_smaller_search_budget():
+    server = GameServer(build_world(2, -5, 5), -5, 5, seed=2)
+    game = server.new_game()
+    assert game.search_limit == SESSION_SEARCH_LIMIT
+    assert not game.admin
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from castle_crawler import Game, world
+from castle_crawler.render import RenderCache
+from castle_crawler.shards import ShardRouter, build_stripe, stripe_bounds, stripe_of
+
+SEED, GRID = 1, 3  # Seed 1 has an open room east of the entry hall, and a square of rooms north of both.
+SHARDS = 2 * GRID + 1  # One column per shard: every step east or west hands the player to another process.
+COMMANDS = ["go north", "go south", "go east", "go west", "go east", "take all", "drop all", "use torch",
+            "equip sword", "attack goblin", "attack orc", "run", "inventory", "equipment", "look"]
+
+
+def test_stripes_split_the_columns():
+    bounds = stripe_bounds(-10, 10, 4)
+    assert bounds[0] == -10 and bounds[-1] == 11
+    assert [stripe_of(bounds, (x, 0)) for x in (-10, bounds[1] - 1, bounds[1], 10)] == [0, 0, 1, 3]
+    with pytest.raises(ValueError):
+        stripe_bounds(0, 2, 4)
+
+
+def test_handoff_keeps_inventory_and_secret_progress():
+    with ShardRouter(SEED, -GRID, GRID, shards=SHARDS) as router:
+        player, _, _ = router.join()
+        router.execute(player, "take all")
+        router.execute(player, "equip sword")
+        events = [router.execute(player, "go " + direction)[2] for direction in world.secret_sequence[:-1]]
+        assert router.handoffs == 3  # The last step leads into the boss room rather than across a stripe.
+        assert events == ["moved"] * 6 + ["secret_path"]
+        assert any("torch" in line for line in router.execute(player, "inventory")[0])
+        assert any("sword" in line for line in router.execute(player, "equipment")[0])
+
+
+def test_sharded_play_matches_one_process():
+    rooms, cache = build_stripe(SEED, -GRID, GRID), RenderCache()
+    seeds = random.Random(SEED)  # The router draws each player's seed from the same stream.
+    rng = random.Random(SEED)
+    with ShardRouter(SEED, -GRID, GRID, shards=SHARDS) as router:
+        players = []
+        for _ in range(3):
+            game = Game(seed=seeds.getrandbits(64), grid_rooms=rooms, grid_min=-GRID, grid_max=GRID,
+                        render_cache=cache)
+            game.take_output()
+            players.append((router.join()[0], game))
+        for _ in range(300):
+            player, game = rng.choice(players)
+            command = rng.choice(COMMANDS)
+            lines, prompt, event = router.execute(player, command)
+            assert event == game.execute(command)
+            assert (lines, prompt) == (game.take_output(), game.prompt)
+        assert router.handoffs > 0
@@ -0,0 +1,46 @@
+from castle_crawler import Game
+from castle_crawler.connectivity import find_path
+from castle_crawler.solver import solve, solve_batch, solve_seed, verify
+
+WINNABLE = {"winnable": True}
+
+
+def test_winnable_worlds_are_solved():
+    for seed in range(5):
+        result = solve_seed(seed, options=WINNABLE, check=True)
+        assert result["solved"] and result["verified"]
+        assert result["par"] >= 7  # At least the trigger moves and the way into the treasure room.
+
+
+def test_grid_routes_are_shortest():
+    game = Game(seed=3, quiet=True)
+    connectivity = game.get_connectivity()
+    for goal in sorted(game.grid_rooms):
+        if not connectivity.connected((0, 0), goal):
+            continue
+        route = find_path(game.grid_rooms, (0, 0), goal, 0, game.grid_min, game.grid_max, connectivity)
+        solution = solve(game, goal)
+        assert solution.par == len(route)
+    assert verify(Game(seed=3, quiet=True), solution, goal)
+
+
+def test_a_locked_goal_sends_the_player_for_a_key():
+    game = Game(seed=8, quiet=True)  # Locked rooms east and west of the entry hall.
+    solution = solve(game, (1, 0))
+    assert solution is not None and "take all" in solution.commands
+    assert verify(Game(seed=8, quiet=True), solution, (1, 0))
+
+
+def test_searches_give_up_at_max_states():
+    assert solve(Game(seed=1, quiet=True), max_states=5) is None
+    assert not solve_seed(1, max_states=5)["solved"]
+
+
+def test_batches_match_single_seeds():
+    def plain(results):
+        return [{key: value for key, value in result.items() if key != "seconds"} for result in results]
+
+    seeds = range(6)
+    expected = plain([solve_seed(seed, options=WINNABLE) for seed in seeds])
+    assert plain(solve_batch(seeds, options=WINNABLE, workers=1)) == expected
+    assert plain(solve_batch(seeds, options=WINNABLE, workers=2, chunk_size=2)) == expected
@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+from castle_crawler import Game
+from castle_crawler.store import RoomStore
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "drop all", "take sword", "drop torch",
+            "equip sword", "attack goblin", "attack orc", "run", "use torch", "use health potion"]
+
+
+def contents(room):
+    """What a room holds; bitmasks keep items in a fixed order, so order is left out."""
+    return (room["name"], room["description"], room["locked"], room["dark"], dict(room["exits"]),
+            Counter(room["items"]), Counter(room["monsters"]))
+
+
+def test_compact_world_holds_the_same_rooms_as_the_dict_world():
+    plain = Game(seed=31, quiet=True, grid_min=-25, grid_max=25)
+    compact = Game(seed=31, quiet=True, grid_min=-25, grid_max=25, compact=True)
+    assert isinstance(compact.grid_rooms, RoomStore)
+    assert set(compact.grid_rooms) == set(plain.grid_rooms)
+    assert len(compact.grid_rooms) == len(plain.grid_rooms)
+    for coord, room in plain.grid_rooms.items():
+        assert contents(compact.grid_rooms[coord]) == contents(room)
+
+
+def test_compact_game_plays_like_the_dict_game():
+    plain = Game(seed=32, quiet=True, grid_min=-10, grid_max=10)
+    compact = Game(seed=32, quiet=True, grid_min=-10, grid_max=10, compact=True)
+    rng = random.Random(32)
+    for _ in range(1500):
+        command = rng.choice(COMMANDS)
+        assert plain.execute(command) == compact.execute(command)
+    assert plain.player_state["position"] == compact.player_state["position"]
+    assert Counter(plain.player_state["inventory"]) == Counter(compact.player_state["inventory"])
+    for coord, room in plain.grid_rooms.items():
+        assert contents(compact.grid_rooms[coord]) == contents(room)
+
+
+def test_rooms_that_do_not_fit_a_bitmask_overflow():
+    store = RoomStore.from_grid({(0, 0): {"name": "entry_hall", "description": "", "items": ["torch", "torch"],
+                                          "monsters": ["goblin"], "locked": False, "dark": False, "exits": {}}},
+                                -2, 2)
+    room = store[(0, 0)]
+    assert list(room["items"]) == ["torch", "torch"]
+    room["items"].remove("torch")
+    assert list(room["items"]) == ["torch"]
+    room["locked"] = True
+    assert store.get((0, 0))["locked"] and store.get((1, 0)) is None
+    assert store.nbytes() < 5 * 5 * 8
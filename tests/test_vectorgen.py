@@ -0,0 +1,61 @@
+import random
+from collections import Counter
+
+import pytest
+
+from castle_crawler import Game, world
+
+pytest.importorskip("numpy")
+from castle_crawler import vectorgen  # noqa: E402
+
+OFFSETS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+
+
+def contents(room):
+    return (room["name"], room["locked"], room["dark"], dict(room["exits"]), Counter(room["items"]),
+            Counter(room["monsters"]))
+
+
+def loop_grid(seed, grid_min, grid_max):
+    rng = random.Random(seed)
+    grid_rooms = world.initialize_grid(rng, grid_min, grid_max)
+    world.distribute_silver_keys(grid_rooms, rng)
+    return grid_rooms
+
+
+def test_grid_and_store_hold_the_same_world():
+    grid = vectorgen.generate_grid(41, -30, 30)
+    store = vectorgen.generate_store(41, -30, 30)
+    assert set(store) == set(grid)
+    for coord, room in grid.items():
+        assert contents(store[coord]) == contents(room)
+    game = Game(seed=41, quiet=True, grid_min=-30, grid_max=30, vectorized=True)
+    assert {coord: contents(room) for coord, room in game.grid_rooms.items()} == \
+        {coord: contents(room) for coord, room in grid.items()}
+
+
+def test_vectorized_world_follows_the_rules_of_the_loop_generator():
+    grid = vectorgen.generate_grid(42, -30, 30)
+    assert grid[(0, 0)]["name"] == "entry_hall" and grid[(0, 1)]["name"] == "throne_room"
+    assert not any(x == 0 and y < 0 for x, y in grid)
+    assert sum(room["items"].count("silver key") for room in grid.values()) == world.secret_keys_needed
+    for (x, y), room in grid.items():
+        for direction, (dx, dy) in OFFSETS.items():
+            assert (direction in room["exits"]) == ((x + dx, y + dy) in grid)
+        if (x, y) not in ((0, 0), (0, 1)):
+            items = [item for item in room["items"] if item != "silver key"]
+            assert 1 <= len(items) <= 3 and len(set(items)) == len(items)
+            assert len(room["monsters"]) <= 2
+
+
+def test_vectorized_world_has_the_loop_generators_distributions():
+    def shares(grid_rooms, cells):
+        rooms = [room for coord, room in grid_rooms.items() if coord not in ((0, 0), (0, 1))]
+        return (len(grid_rooms) / cells, sum(room["locked"] for room in rooms) / len(rooms),
+                sum(room["dark"] for room in rooms) / len(rooms),
+                sum(len(room["monsters"]) for room in rooms) / len(rooms))
+
+    cells = 101 * 101 - 50
+    vectorized = shares(vectorgen.generate_grid(43, -50, 50), cells)
+    looped = shares(loop_grid(43, -50, 50), cells)
+    assert vectorized == pytest.approx(looped, abs=0.03)
@@ -0,0 +1,90 @@
+import random
+
+from castle_crawler import Game
+from castle_crawler.wander import HUNT_RADIUS, MIX_STEPS, MOVE_EVERY, Wanderers
+
+COMMANDS = ["go north", "go south", "go east", "go west", "look"]
+
+
+def monsters_match(wanderers, grid_rooms):
+    """Every wanderer is listed in its room, and every room lists its wanderers."""
+    for coord, ids in wanderers.at.items():
+        names = sorted(wanderers.wanderers[wanderer_id][0] for wanderer_id in ids)
+        room_names = list(grid_rooms[coord]["monsters"])
+        assert all(room_names.count(name) >= names.count(name) for name in names)
+    return True
+
+
+def test_clock_advances_once_per_round():
+    game = Game(seed=1, quiet=True, grid_min=-20, grid_max=20, wandering=True)
+    other = Game(seed=2, quiet=True, grid_rooms=game.grid_rooms, grid_min=-20, grid_max=20,
+                 wanderers=game.wanderers)
+    clock = game.wanderers
+    for command in ["look", "look", "look"]:
+        game.execute(command)
+    assert clock.turn == 3  # One player: every command is a round.
+    for _ in range(4):
+        game.execute("look")
+        other.execute("look")
+    assert clock.turn == 7
+    other.execute("look")
+    other.execute("look")   # The other player went idle: no waiting for them.
+    assert clock.turn == 9
+
+
+def test_nearest_player_matches_a_scan_of_every_player():
+    wanderers = Wanderers({}, region_size=4)
+    rng = random.Random(3)
+    players = {}
+    for token in range(40):
+        players[token] = (rng.randint(-30, 30), rng.randint(-30, 30))
+        wanderers.place_player(token, players[token])
+    for token in range(0, 40, 3):  # Some move, some leave.
+        players[token] = (rng.randint(-30, 30), rng.randint(-30, 30))
+        wanderers.place_player(token, players[token])
+    for token in range(1, 40, 7):
+        del players[token]
+        wanderers.leave(token)
+    for _ in range(500):
+        x, y = rng.randint(-35, 35), rng.randint(-35, 35)
+        within = [(abs(px - x) + abs(py - y), (px, py)) for px, py in players.values()
+                  if abs(px - x) + abs(py - y) <= HUNT_RADIUS]
+        assert wanderers.nearest_player((x, y)) == (min(within)[1] if within else None)
+    assert sum(map(sum, (counts.values() for counts in wanderers.in_region.values()))) == len(players)
+
+
+def test_wanderers_park_away_from_players_and_fast_forward_on_return():
+    game = Game(seed=4, quiet=True, grid_min=-40, grid_max=40, wandering=True)
+    wanderers = game.wanderers
+    game.execute("look")
+    home = set(wanderers.active)
+    assert wanderers.wanderers
+    game.player_state["position"] = (32, 32)  # Far from every region active around the entry hall.
+    turns = (MIX_STEPS + 10) * sum(MOVE_EVERY) // 2
+    for _ in range(turns):
+        game.execute("look")
+    assert home.isdisjoint(wanderers.active)
+    parked = {wanderer_id: region for region, ids in wanderers.parked.items() if region in home
+              for wanderer_id, since in ids if (wanderers.turn - since) * 2 // sum(MOVE_EVERY) > MIX_STEPS}
+    assert parked
+    game.player_state["position"] = (0, 0)
+    game.execute("look")
+    assert not set(parked.values()) & set(wanderers.parked)
+    for wanderer_id, region in parked.items():  # Placed in their region, as a long walk would leave them.
+        assert wanderers.region_of(wanderers.wanderers[wanderer_id][1]) == region
+    assert monsters_match(wanderers, game.grid_rooms)
+
+
+def test_sharing_players_keep_playing_like_one_world():
+    game = Game(seed=5, quiet=True, grid_min=-20, grid_max=20, wandering=True)
+    others = [Game(seed=6 + i, quiet=True, grid_rooms=game.grid_rooms, grid_min=-20, grid_max=20,
+                   wanderers=game.wanderers) for i in range(4)]
+    rng = random.Random(5)
+    games = [game] + others
+    for _ in range(2000):
+        rng.choice(games).execute(rng.choice(COMMANDS))
+    wanderers = game.wanderers
+    positions = [g.player_state["position"] for g in games if isinstance(g.player_state["position"], tuple)]
+    bucketed = [coord for counts in wanderers.in_region.values() for coord in counts.elements()]
+    assert sorted(bucketed) == sorted(positions)
+    assert monsters_match(wanderers, game.grid_rooms)
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from castle_crawler import Game, WorldConfig
+from castle_crawler.savefile import MappedWorld
+
+COMMANDS = ["go north", "go south", "go east", "go west", "take all", "drop all", "equip sword",
+            "attack goblin", "attack orc", "run", "use torch", "inventory", "look"]
+
+
+def transcript(seed, **options):
+    game = Game(seed=seed, grid_min=-10, grid_max=10, **options)
+    rng = random.Random(seed)
+    lines = game.take_output()
+    for _ in range(400):
+        command = rng.choice(COMMANDS)
+        lines += [command, game.execute(command)] + game.take_output()
+    return type(game.grid_rooms), lines
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_cached_world_plays_like_a_generated_one(tmp_path, vectorized):
+    options = {"compact": True, "vectorized": vectorized}
+    _, uncached = transcript(42, **options)
+    first_kind, first = transcript(42, world_cache=str(tmp_path), **options)
+    cached_kind, cached = transcript(42, world_cache=str(tmp_path), **options)
+    assert first_kind is not MappedWorld and cached_kind is MappedWorld
+    assert first == uncached
+    assert cached == uncached
+
+
+def test_world_cache_needs_a_compact_world(tmp_path):
+    with pytest.raises(ValueError):
+        WorldConfig(world_cache=str(tmp_path))